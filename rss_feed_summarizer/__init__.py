@@ -9,12 +9,28 @@ __version__ = "1.0.0"
 __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
-from .pipeline import run_pipeline
-from .fetcher import RSSFetcher
-from .distributor import MarkdownDistributor
-
 __all__ = [
     "run_pipeline",
     "RSSFetcher", 
     "MarkdownDistributor",
 ]
+
+# Public API is resolved lazily, so `import rss_feed_summarizer` (and CLI commands
+# like `status` or `validate`) don't pull in LangChain, feedparser or markdown
+_LAZY_ATTRIBUTES = {
+    "run_pipeline": ".pipeline",
+    "RSSFetcher": ".fetcher",
+    "MarkdownDistributor": ".distributor",
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value  # Cache so __getattr__ isn't hit again
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
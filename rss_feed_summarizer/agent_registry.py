@@ -0,0 +1,80 @@
+"""
+Process-level agent registry
+Builds each LLM agent once and hands the same instance (and its HTTP connection
+pool, cache setup and trackers) to every helper call and pipeline stage
+"""
+import importlib
+import threading
+import time
+from typing import Any, Dict
+
+# Agent name -> (module, class), imported on first use
+AGENT_CLASSES = {
+    "relevance": ("relevance", "RelevanceAgent"),
+    "macro_summary": ("overall_summary", "MacroSummaryAgent"),
+    "categorization": ("categorization", "CategorizationAgent"),
+    "ranking": ("ranking", "RankingAgent"),
+    "micro_summary": ("summaries", "MicroSummaryAgent"),
+}
+
+
+class AgentRegistry:
+    def __init__(self):
+        self._agents = {}
+        self._lock = threading.Lock()
+        self.construction_times = {}
+        self.requests = {}
+
+    def get(self, name: str) -> Any:
+        """Get the shared instance of an agent, building it on first use"""
+        if name not in AGENT_CLASSES:
+            raise ValueError(f"Unknown agent '{name}'. Available: {', '.join(AGENT_CLASSES)}")
+
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+            if name not in self._agents:
+                module_name, class_name = AGENT_CLASSES[name]
+                module = importlib.import_module(f"{__package__}.{module_name}")
+                start = time.perf_counter()
+                self._agents[name] = getattr(module, class_name)()
+                self.construction_times[name] = time.perf_counter() - start
+            return self._agents[name]
+
+    def reset(self):
+        """Drop all agents (e.g. after changing config in a long-lived process)"""
+        with self._lock:
+            self._agents.clear()
+            self.construction_times.clear()
+            self.requests.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Construction cost paid vs. constructions avoided by reusing agents"""
+        with self._lock:
+            built = len(self.construction_times)
+            build_time = sum(self.construction_times.values())
+            reuses = sum(self.requests.values()) - built
+        average = build_time / built if built else 0
+        return {
+            'built': built,
+            'reuses': reuses,
+            'construction_time': f"{build_time * 1000:.1f}ms",
+            'estimated_time_saved': f"{reuses * average * 1000:.1f}ms",
+        }
+
+
+_registry = AgentRegistry()
+
+
+def get_agent(name: str) -> Any:
+    """Get the process-wide shared agent instance by name (e.g. "ranking")"""
+    return _registry.get(name)
+
+
+def reset_agents():
+    """Drop all shared agent instances"""
+    _registry.reset()
+
+
+def get_registry_stats() -> Dict[str, Any]:
+    """Construction statistics for the shared agents"""
+    return _registry.get_stats()
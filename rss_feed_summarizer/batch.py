@@ -0,0 +1,386 @@
+"""
+Batch execution mode for non-urgent digests
+Writes every uncached relevance, categorization and micro summary request to JSONL
+files for the OpenAI Batch API, submits them, polls until they complete and streams
+the results into the agents' cache tables. A following `rss-summarizer run` finds them
+cached and only ranks, reduces and distributes. Relevance goes first (one batch per
+model), then categorization and summaries for the articles it kept. Batches still
+running after max_wait_hours are cancelled; their unfinished requests stay uncached.
+With the mock backend, batches go to mock_llm.LocalBatchServer instead of OpenAI.
+"""
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from . import config
+from .agent_registry import get_agent
+from .cache_utils import bulk_lookup
+from .checkpoint import RUN_ID_FORMAT
+from .content_prep import count_tokens, prepare_content, token_budget
+from .llm_backends import get_backend
+from .logging_utils import ensure_logging, get_logger
+from .structured_output import json_mode_kwargs
+
+logger = get_logger("batch")
+
+ENDPOINT = "/v1/chat/completions"
+
+# Sampling temperatures of the agents' synchronous chat models (see their create_chat_model calls)
+TEMPERATURES = {"relevance": 0.2, "categorization": 0.2, "micro_summary": 0.3}
+
+# LangChain message types -> Chat Completions roles
+ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchClient:
+    def __init__(self, api_key: str = None, base_url: str = None):
+        """
+        Thin wrapper over the openai client's Files and Batches endpoints
+
+        Args:
+            api_key: OpenAI API key (default: OPENAI_API_KEY)
+            base_url: API base URL, e.g. a LocalBatchServer's (default: OpenAI)
+        """
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=api_key or config.OPENAI_API_KEY, base_url=base_url)
+
+    def submit(self, path: str, metadata: Dict[str, str] = None) -> str:
+        """Upload a JSONL request file and start a batch over it. Returns the batch ID"""
+        with open(path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=ENDPOINT,
+            completion_window=config.BATCH.get("completion_window", "24h"),
+            metadata=metadata,
+        )
+        return batch.id
+
+    def retrieve(self, batch_id: str):
+        return self.client.batches.retrieve(batch_id)
+
+    def cancel(self, batch_id: str):
+        return self.client.batches.cancel(batch_id)
+
+    def download(self, file_id: str) -> str:
+        return self.client.files.content(file_id).text
+
+
+class BatchRunner:
+    def __init__(self, client: BatchClient, settings: Dict[str, Any] = None, poll_interval: float = None):
+        """
+        Initialize a batch run
+
+        Args:
+            client: Batch client to submit to
+            settings: Batch settings (default: config.BATCH)
+            poll_interval: Seconds between status checks (default: settings["poll_interval"])
+        """
+        self.client = client
+        self.settings = settings or config.BATCH
+        self.poll_interval = poll_interval or self.settings.get("poll_interval", 60)
+        self.stages = self.settings.get("stages", ["relevance", "categorization", "micro_summary"])
+        self.run_id = datetime.now().strftime(RUN_ID_FORMAT)
+        self.run_dir = os.path.join(self.settings.get("dir", "output/batches"), self.run_id)
+
+        self.relevance = get_agent("relevance")
+        self.categorization = get_agent("categorization")
+        self.micro_summary = get_agent("micro_summary")
+        for agent in (self.relevance, self.categorization, self.micro_summary):
+            agent._check_cache("")  # Creates the agent's cache table
+
+        # custom_id -> (agent, cache key, article) for the requests in flight
+        self._pending = {}
+        self.stats = {}
+
+    def _request(self, agent: str, model: str, prompt, cache_key: str, article: Dict[str, Any],
+                 json_mode: bool = False, **values) -> Dict[str, Any]:
+        """One JSONL request line for a filled-in agent prompt"""
+        body = {
+            "model": model,
+            "messages": [{"role": ROLES.get(message.type, message.type), "content": message.content}
+                         for message in prompt.format_messages(**values)],
+            "temperature": TEMPERATURES[agent],
+        }
+        if json_mode:
+            body.update(json_mode_kwargs(model))
+        custom_id = f"{agent}:{cache_key}"
+        self._pending[custom_id] = (agent, cache_key, article)
+        return {"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": body}
+
+    def _count(self, agent: str, key: str, amount: int = 1):
+        counts = self.stats.setdefault(agent, {'cached': 0, 'requested': 0, 'completed': 0, 'failed': 0,
+                                               'skipped': 0, 'prompt_tokens': 0, 'cached_tokens': 0,
+                                               'completion_tokens': 0})
+        counts[key] += amount
+
+    def relevance_requests(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Requests for articles without a cached relevance decision"""
+        agent = self.relevance
+        inputs = {}
+        for article in articles:
+            title = article.get('title', '')
+            summary = article.get('summary', article.get('content', ''))[:500]
+            values = {'title': title, 'source': article.get('source', 'Unknown'), 'summary': summary}
+            inputs.setdefault(agent._get_cache_key(title, summary), (article, values))
+
+        cached = set(bulk_lookup(agent.cache_db, "article_relevance", list(inputs), ["is_relevant"]))
+        if agent.cascade_enabled:
+            # A confident cached screening also settles the article in the synchronous run
+            rows = bulk_lookup(agent.cache_db, "article_relevance_fast", list(inputs), ["model", "confidence"])
+            cached.update(key for key, (model, confidence) in rows.items()
+                          if model == agent.fast_model and (confidence or 0) >= agent.confidence_threshold)
+
+        requests = []
+        for cache_key, (article, values) in inputs.items():
+            if cache_key in cached:
+                self._count("relevance", 'cached')
+                continue
+            requests.append(self._request("relevance", agent.model, agent.relevance_prompt, cache_key, article,
+                                          json_mode=True, **values))
+        return requests
+
+    def relevant_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Articles whose cached relevance decision is relevant"""
+        agent = self.relevance
+        keys = [agent._get_cache_key(article.get('title', ''),
+                                     article.get('summary', article.get('content', ''))[:500])
+                for article in articles]
+        decisions = bulk_lookup(agent.cache_db, "article_relevance", keys, ["is_relevant"])
+        return [article for article, key in zip(articles, keys) if key in decisions and decisions[key][0]]
+
+    def categorization_requests(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Requests for articles without a cached category"""
+        agent = self.categorization
+        inputs = {}
+        for article in articles:
+            title = article.get('title', '')
+            summary = article.get('summary', article.get('content', ''))[:500]
+            inputs.setdefault(agent._get_cache_key(title, summary), (article, {'title': title, 'summary': summary}))
+
+        cached = bulk_lookup(agent.cache_db, "article_categories", list(inputs), ["category"])
+        requests = []
+        for cache_key, (article, values) in inputs.items():
+            if cache_key in cached:
+                self._count("categorization", 'cached')
+                continue
+            requests.append(self._request("categorization", agent.model, agent.categorization_prompt, cache_key,
+                                          article, json_mode=True, **values))
+        return requests
+
+    def summary_requests(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Requests for articles without a cached micro summary (long documents stay synchronous)"""
+        agent = self.micro_summary
+        inputs = {}
+        for article in articles:
+            title = article.get('title', '')
+            content = article.get('content', article.get('summary', ''))
+            inputs.setdefault(agent._get_cache_key(f"{title}:{content}"), article)
+
+        cached = bulk_lookup(agent.cache_db, "micro_summaries", list(inputs), ["summary"])
+        requests = []
+        for cache_key, article in inputs.items():
+            if cache_key in cached:
+                self._count("micro_summary", 'cached')
+                continue
+            prepared_content, _, _ = prepare_content(article, agent.model)
+            if agent.long_document_enabled and \
+                    count_tokens(article['clean_content'], agent.model) > token_budget(agent.model):
+                # Map-reduce summaries need the chunk results first, so they are left to the run
+                self._count("micro_summary", 'skipped')
+                continue
+            requests.append(self._request("micro_summary", agent.model, agent.micro_summary_prompt, cache_key,
+                                          article, title=article.get('title', ''),
+                                          source=article.get('source', 'Unknown'), content=prepared_content))
+        return requests
+
+    def _write_files(self, phase: str, requests: List[Dict[str, Any]]) -> List[str]:
+        """Write requests to JSONL files, one model per file (a Batch API requirement)"""
+        by_model = {}
+        for request in requests:
+            by_model.setdefault(request['body']['model'], []).append(request)
+
+        os.makedirs(self.run_dir, exist_ok=True)
+        max_requests = self.settings.get("max_requests_per_file", 50000)
+        paths = []
+        for model, model_requests in by_model.items():
+            for part, start in enumerate(range(0, len(model_requests), max_requests), 1):
+                path = os.path.join(self.run_dir, f"{phase}-{model}-{part}.jsonl")
+                with open(path, "w", encoding="utf-8") as f:
+                    for request in model_requests[start:start + max_requests]:
+                        f.write(json.dumps(request, ensure_ascii=False) + "\n")
+                paths.append(path)
+        return paths
+
+    def _wait(self, batch_ids: List[str], timeout: float) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Poll until every batch is finished or timeout seconds pass
+
+        Returns:
+            ({batch_id: batch} for the finished batches, IDs of the unfinished ones)
+        """
+        deadline = time.monotonic() + timeout
+        batches = {}
+        waiting = list(batch_ids)
+        while waiting:
+            for batch_id in list(waiting):
+                batch = self.client.retrieve(batch_id)
+                if batch.status in TERMINAL_STATUSES:
+                    batches[batch_id] = batch
+                    waiting.remove(batch_id)
+                    logger.info("📦 Batch %s %s (%s)", batch_id, batch.status, batch.request_counts)
+            if not waiting or time.monotonic() > deadline:
+                break
+            time.sleep(self.poll_interval)
+        return batches, waiting
+
+    def _apply(self, result: Dict[str, Any]):
+        """Write one result line into its agent's cache table"""
+        custom_id = result.get('custom_id')
+        if custom_id not in self._pending:
+            return
+        agent, cache_key, article = self._pending.pop(custom_id)
+        response = result.get('response') or {}
+        if result.get('error') or response.get('status_code') != 200:
+            self._count(agent, 'failed')
+            return
+
+        body = response['body']
+        content = body['choices'][0]['message']['content'] or ""
+        if agent == "relevance":
+            self.relevance._save_response(cache_key, content)
+        elif agent == "categorization":
+            self.categorization._save_response(cache_key, content, article)
+        else:
+            self.micro_summary._save_cache(cache_key, content.strip())
+
+        usage = body.get('usage') or {}
+        self._count(agent, 'completed')
+        self._count(agent, 'prompt_tokens', usage.get('prompt_tokens', 0))
+        self._count(agent, 'cached_tokens', (usage.get('prompt_tokens_details') or {}).get('cached_tokens') or 0)
+        self._count(agent, 'completion_tokens', usage.get('completion_tokens', 0))
+
+    def execute(self, phase: str, requests: List[Dict[str, Any]]):
+        """Submit requests as batches, wait for them and store their results"""
+        if not requests:
+            logger.info("📦 %s: nothing to submit - everything is cached", phase)
+            return
+        for request in requests:
+            self._count(self._pending[request['custom_id']][0], 'requested')
+
+        batch_ids = []
+        for path in self._write_files(phase, requests):
+            batch_ids.append(self.client.submit(path, metadata={'run_id': self.run_id, 'phase': phase}))
+            logger.info("📤 Submitted %s as batch %s", os.path.basename(path), batch_ids[-1])
+
+        max_wait_hours = self.settings.get("max_wait_hours", 24)
+        batches, unfinished = self._wait(batch_ids, max_wait_hours * 3600)
+        if unfinished:
+            # Left running, they would still be billed with nothing to apply their results
+            logger.warning("⚠️ Cancelling %d batches unfinished after %sh: %s (their requests are made by the next run)",
+                           len(unfinished), max_wait_hours, ", ".join(unfinished))
+            for batch_id in unfinished:
+                self.client.cancel(batch_id)
+            # A cancelled batch still returns the results of the requests it finished
+            cancelled, unfinished = self._wait(unfinished, self.settings.get("cancel_wait_minutes", 10) * 60)
+            batches.update(cancelled)
+            if unfinished:
+                logger.warning("⚠️ Cancellation not confirmed yet for batches: %s", ", ".join(unfinished))
+
+        for batch_id, batch in batches.items():
+            for file_id, suffix in ((batch.output_file_id, "output"), (batch.error_file_id, "errors")):
+                if not file_id:
+                    continue
+                text = self.client.download(file_id)
+                with open(os.path.join(self.run_dir, f"{batch_id}-{suffix}.jsonl"), "w", encoding="utf-8") as f:
+                    f.write(text)
+                for line in text.splitlines():
+                    if line.strip():
+                        self._apply(json.loads(line))
+
+        # Requests in failed, expired or cancelled batches stay uncached for the synchronous run
+        for agent, _, _ in self._pending.values():
+            self._count(agent, 'failed')
+        self._pending.clear()
+
+    def run(self, articles: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        """
+        Batch the LLM work for keyword-filtered articles
+
+        Returns:
+            Per-agent counts: cached, requested, completed, failed, skipped and tokens
+            (prompt, prefix-cached prompt and completion)
+        """
+        if "relevance" in self.stages:
+            self.execute("relevance", self.relevance_requests(articles))
+            articles = self.relevant_articles(articles)
+            logger.info("🔍 %d relevant articles to categorize and summarize", len(articles))
+
+        requests = []
+        if "categorization" in self.stages:
+            requests += self.categorization_requests(articles)
+        if "micro_summary" in self.stages:
+            requests += self.summary_requests(articles)
+        self.execute("categorize_summarize", requests)
+        return self.stats
+
+
+def print_batch_stats(stats: Dict[str, Dict[str, int]], run_dir: str):
+    """Print per-agent request counts and tokens for a batch run"""
+    print("\n📦 Batch Results:")
+    print(f"   {'agent':<16} {'cached':>7} {'sent':>6} {'done':>6} {'failed':>7} {'skipped':>8} "
+          f"{'prompt tok':>11} {'prefix hit':>11} {'compl. tok':>11}")
+    for agent, counts in stats.items():
+        print(f"   {agent:<16} {counts['cached']:>7} {counts['requested']:>6} {counts['completed']:>6} "
+              f"{counts['failed']:>7} {counts['skipped']:>8} {counts['prompt_tokens']:>11,} "
+              f"{counts['cached_tokens']:>11,} {counts['completion_tokens']:>11,}")
+    print(f"   • Request and result files: {run_dir}")
+    if any(counts['failed'] or counts['skipped'] for counts in stats.values()):
+        print("ℹ️  Failed and skipped requests are made synchronously by the next run")
+
+
+def run_batch(time_window_hours: Optional[int] = None, then_run: bool = False) -> Dict[str, Dict[str, int]]:
+    """
+    Fetch, keyword-filter and batch the LLM work, then optionally run the pipeline
+
+    Args:
+        time_window_hours: Fetch articles from the last N hours (default: TIME_WINDOW)
+        then_run: Run the pipeline afterwards (it finds the batched results cached)
+
+    Returns:
+        Per-agent batch counts
+    """
+    from .fetcher import RSSFetcher
+    from .keyword_filter import filter_articles
+
+    ensure_logging()
+    logger.info("📦 === BATCH MODE (%s backend) ===", get_backend())
+    articles = filter_articles(RSSFetcher(time_window_hours=time_window_hours).fetch_articles())
+
+    if get_backend() == "mock":
+        from .mock_llm import LocalBatchServer
+
+        mock = config.MOCK_LLM
+        with LocalBatchServer(seed=mock.get("seed", 42), error_rate=mock.get("error_rate", 0.0),
+                              processing_delay=config.BATCH.get("local_processing_delay", 0.5),
+                              prefix_cache_min_tokens=mock.get("prefix_cache_min_tokens", 1024)) as server:
+            runner = BatchRunner(BatchClient(api_key="mock", base_url=server.base_url), poll_interval=0.1)
+            stats = runner.run(articles)
+    else:
+        runner = BatchRunner(BatchClient())
+        stats = runner.run(articles)
+
+    print_batch_stats(stats, runner.run_dir)
+
+    if then_run:
+        from .pipeline import run_pipeline
+        run_pipeline()
+    return stats
+
+
+if __name__ == "__main__":
+    run_batch()
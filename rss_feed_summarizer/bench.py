@@ -0,0 +1,699 @@
+"""
+Benchmark suite for the non-LLM hot paths
+Times feed fetching and parsing, keyword filtering, cache lookups, digest rendering
+and package import on synthetic corpora, and compares the results with a saved
+baseline. Run with: rss-summarizer bench
+Opt-in stages: hedge (mock LLM tail latency) and email (SMTP delivery to a local server).
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import socketserver
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from xml.sax.saxutils import escape
+from . import config
+from .metrics import percentile
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Stored feeds served next to the synthetic ones (real-world RSS 2.0 and Atom shapes)
+FIXTURE_FEEDS = ["ai_blog_rss.xml", "research_atom.xml"]
+
+STAGES = ["fetch", "keyword_filter", "cache", "render", "render_cached", "import"]
+
+# Opt-in stages (not part of the default run): bench --stages hedge
+OPTIONAL_STAGES = ["hedge", "email"]
+
+# Modules that must not be loaded by importing the CLI (see the lazy imports in __init__.py)
+HEAVY_MODULES = ["langchain", "langchain_openai", "openai", "feedparser", "requests", "bs4", "tiktoken"]
+
+ITEMS_PER_FEED = 100
+FILTER_BATCH_SIZE = 100
+
+_TOPICS = [
+    "agent framework", "LLM inference", "RAG pipeline", "vector database", "fine-tuning",
+    "workflow automation", "enterprise deployment", "AI startup funding", "developer SDK",
+    "embedding model", "GPU infrastructure", "MCP server", "case study", "market trend",
+]
+_OFF_TOPICS = ["office recipes", "team offsite", "gardening tips", "holiday schedule", "sports recap"]
+_VERBS = ["Introducing", "Scaling", "Benchmarking", "Inside", "Lessons from", "A guide to", "Why we rebuilt"]
+_SOURCES = ["Example AI Blog", "Research Weekly", "Cloud Engineering", "Startup News", "Dev Tools Digest"]
+_SENTENCES = [
+    "The team measured a {n}% improvement in throughput after the change.",
+    "It integrates with existing tools through a single API call.",
+    "Early adopters report lower latency and simpler deployment.",
+    "The release includes an open-source SDK and a hosted platform.",
+    "Customers in production saw {n} fewer incidents per month.",
+    "The benchmark covers {n} tasks across retrieval, coding and reasoning.",
+    "Pricing starts at ${n} per million tokens.",
+]
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpora and feeds
+# ---------------------------------------------------------------------------
+
+def generate_articles(count: int, seed: int = 0, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Generate a deterministic corpus of fetched-article dicts
+
+    About four in five articles are on-topic (they pass the keyword filter); the
+    rest are off-topic noise, as in real feeds.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    articles = []
+
+    for i in range(count):
+        topic = rng.choice(_TOPICS) if rng.random() < 0.8 else rng.choice(_OFF_TOPICS)
+        title = f"{rng.choice(_VERBS)} {topic} #{i}"
+        paragraphs = [
+            " ".join(rng.choice(_SENTENCES).format(n=rng.randint(2, 900)) for _ in range(rng.randint(2, 5)))
+            for _ in range(rng.randint(2, 8))
+        ]
+        summary = f"{title}: {paragraphs[0][:160]}"
+        articles.append({
+            'title': title,
+            'link': f"https://news.example.com/{topic.replace(' ', '-').lower()}/{i}",
+            'published': now - timedelta(minutes=rng.randint(0, 600)),
+            'summary': f"<p>{escape(summary)}</p>",
+            'content': "".join(f"<p>{escape(paragraph)}</p>\n" for paragraph in paragraphs),
+            'source': rng.choice(_SOURCES),
+        })
+
+    return articles
+
+
+def render_feed(articles: List[Dict[str, Any]], title: str = "Synthetic Feed") -> str:
+    """Render articles as an RSS 2.0 document (with content:encoded bodies)"""
+    items = []
+    for article in articles:
+        items.append(
+            "<item>"
+            f"<title>{escape(article['title'])}</title>"
+            f"<link>{escape(article['link'])}</link>"
+            f"<guid>{escape(article['link'])}</guid>"
+            f"<pubDate>{format_datetime(article['published'].astimezone())}</pubDate>"
+            f"<description>{escape(article['summary'])}</description>"
+            f"<content:encoded>{escape(article['content'])}</content:encoded>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">'
+        f"<channel><title>{escape(title)}</title><link>https://news.example.com/</link>"
+        f"<description>{escape(title)}</description>{''.join(items)}</channel></rss>"
+    )
+
+
+def load_fixture(name: str) -> str:
+    """Read a stored feed fixture shipped with the package"""
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class FixtureServer:
+    def __init__(self, feeds: Dict[str, str] = None):
+        """
+        Local HTTP server serving feed documents at /feeds/<name>
+
+        Args:
+            feeds: Feed name -> XML document; more can be added with add_feed()
+        """
+        self.feeds = dict(feeds or {})
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                name = self.path.rsplit("/", 1)[-1]
+                body = server.feeds.get(name)
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = None
+
+    def add_feed(self, name: str, xml: str):
+        self.feeds[name] = xml
+
+    def url(self, name: str) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/feeds/{name}"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class LocalSMTPServer:
+    def __init__(self, latency: float = 0.0, drop_every: int = 0, smtputf8: bool = False):
+        """
+        Local SMTP stand-in that accepts any login and keeps every message
+
+        Args:
+            latency: Seconds to wait before accepting each message
+            drop_every: Close the connection without replying to every Nth message
+                (0 = never), so clients have to reconnect and resend
+            smtputf8: Advertise SMTPUTF8 (non-ASCII addresses)
+        """
+        self.latency = latency
+        self.drop_every = drop_every
+        self.smtputf8 = smtputf8
+        self.messages = []  # (envelope recipients, message bytes)
+        self.connections = 0
+        self.dropped = 0
+        self._received = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str):
+                self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+            def handle(self):
+                with server._lock:
+                    server.connections += 1
+                self.reply("220 localhost ESMTP bench")
+                recipients = []
+                for raw in self.rfile:
+                    command = raw.decode("utf-8", "replace").strip()
+                    verb = command.split(" ", 1)[0].upper()
+                    if verb == "EHLO":
+                        self.reply("250-localhost")
+                        self.reply("250-AUTH PLAIN LOGIN")
+                        if server.smtputf8:
+                            self.reply("250-SMTPUTF8")
+                        self.reply("250 8BITMIME")
+                    elif verb == "HELO":
+                        self.reply("250 localhost")
+                    elif verb == "AUTH":
+                        self.reply("235 2.7.0 Authentication successful")
+                    elif verb == "MAIL":
+                        recipients = []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        recipients.append(command.split(":", 1)[1].strip(" <>"))
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        data = []
+                        for line in self.rfile:
+                            if line in (b".\r\n", b".\n"):
+                                break
+                            data.append(line)
+                        if not server.accept(recipients, b"".join(data)):
+                            return  # Dropped without a reply
+                        self.reply("250 OK queued")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:  # RSET, NOOP
+                        self.reply("250 OK")
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def accept(self, recipients: List[str], data: bytes) -> bool:
+        """Store a message, or return False to drop the connection instead"""
+        time.sleep(self.latency)
+        with self._lock:
+            self._received += 1
+            if self.drop_every and self._received % self.drop_every == 0:
+                self.dropped += 1
+                return False
+            self.messages.append((recipients, data))
+        return True
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "LocalSMTPServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LocalSMTPServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+# ---------------------------------------------------------------------------
+# Stage benchmarks - each returns (latency samples in seconds, sample unit, items processed)
+# ---------------------------------------------------------------------------
+
+def _timed(func: Callable, *args) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(*args)
+    return time.perf_counter() - start
+
+
+def bench_fetch(articles: List[Dict[str, Any]], repeat: int):
+    """Fetch and parse every synthetic feed (ITEMS_PER_FEED items each) plus the stored fixtures over local HTTP"""
+    from .fetcher import RSSFetcher
+
+    with FixtureServer() as server:
+        names = []
+        for name in FIXTURE_FEEDS:
+            server.add_feed(name, load_fixture(name))
+            names.append(name)
+        for start in range(0, len(articles), ITEMS_PER_FEED):
+            name = f"synthetic-{start // ITEMS_PER_FEED}.xml"
+            server.add_feed(name, render_feed(articles[start:start + ITEMS_PER_FEED]))
+            names.append(name)
+
+        # A wide window so the fixtures' fixed dates are not filtered out
+        fetchers = [RSSFetcher(feeds=[server.url(name)], time_window_hours=24 * 365 * 50, request_delay=0)
+                    for name in names]
+        samples = []
+        for _ in range(repeat):
+            samples.extend(_timed(fetcher.fetch_articles) for fetcher in fetchers)
+
+    return samples, "feed", len(articles) * repeat
+
+
+def bench_keyword_filter(articles: List[Dict[str, Any]], repeat: int):
+    """Run the keyword pre-filter over the corpus in batches of FILTER_BATCH_SIZE"""
+    from .keyword_filter import filter_articles
+
+    samples = []
+    for _ in range(repeat):
+        for start in range(0, len(articles), FILTER_BATCH_SIZE):
+            batch = [dict(article) for article in articles[start:start + FILTER_BATCH_SIZE]]
+            samples.append(_timed(filter_articles, batch))
+
+    return samples, f"{FILTER_BATCH_SIZE} articles", len(articles) * repeat
+
+
+def bench_cache_lookups(articles: List[Dict[str, Any]], repeat: int):
+    """Look up every article in a relevance cache where half of the articles are cached"""
+    from langchain.globals import get_llm_cache, set_llm_cache
+    from . import cache_utils, llm_backends
+    from .relevance import RelevanceAgent
+
+    previous_backend = config.LLM_BACKEND
+    previous_cache_dir = config.MOCK_LLM.get("cache_dir")
+    # The agent installs the process-wide LangChain cache on the temporary directory
+    previous_llm_cache = get_llm_cache()
+    previous_llm_cache_path = cache_utils._llm_cache_path
+    with tempfile.TemporaryDirectory() as cache_dir:
+        try:
+            llm_backends.set_backend("mock")
+            config.MOCK_LLM["cache_dir"] = cache_dir
+            with contextlib.redirect_stdout(io.StringIO()):
+                agent = RelevanceAgent()
+
+            keys = [agent._get_cache_key(article['title'], article['summary']) for article in articles]
+            agent._check_cache(keys[0])  # Creates the table
+            conn = sqlite3.connect(agent.cache_db)
+            conn.executemany(
+                "INSERT OR REPLACE INTO article_relevance (cache_key, is_relevant, reason, timestamp) VALUES (?, ?, ?, ?)",
+                [(key, True, "benchmark", datetime.now().isoformat()) for key in keys[::2]]
+            )
+            conn.commit()
+            conn.close()
+
+            samples = []
+            for _ in range(repeat):
+                for key in keys:
+                    start = time.perf_counter()
+                    agent._check_cache(key)
+                    samples.append(time.perf_counter() - start)
+        finally:
+            config.LLM_BACKEND = previous_backend
+            config.MOCK_LLM["cache_dir"] = previous_cache_dir
+            with cache_utils._llm_cache_lock:
+                set_llm_cache(previous_llm_cache)
+                cache_utils._llm_cache_path = previous_llm_cache_path
+
+    return samples, "lookup", len(articles) * repeat
+
+
+def bench_render(articles: List[Dict[str, Any]], repeat: int, cached: bool = False):
+    """
+    Render the full markdown digest for the corpus
+
+    Args:
+        cached: Keep the cleaned article fragments from a first, untimed render (an archive
+            digest re-rendering known articles); by default every pass starts cold
+    """
+    from . import distributor as distributor_module
+    from .distributor import MarkdownDistributor
+    from .keyword_filter import assign_category
+
+    digest_articles = []
+    for article in articles:
+        article = dict(article)
+        article['ai_summary'] = article['summary']
+        digest_articles.append(article)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        distributor = MarkdownDistributor(output_dir=output_dir)
+        samples = []
+        for i in range(repeat + cached):
+            categorized = {category: [] for category in config.CATEGORIES}
+            for article in digest_articles:
+                categorized[assign_category(article)].append(article)
+            if not cached:
+                distributor_module._clean_html.cache_clear()
+                distributor_module._article_block.cache_clear()
+            elapsed = _timed(distributor.format_articles, digest_articles, categorized,
+                             "Synthetic overview for benchmarking.")
+            if not cached or i > 0:
+                samples.append(elapsed)
+
+    return samples, "digest", len(articles) * repeat
+
+
+def bench_import(repeat: int):
+    """Import the CLI in fresh interpreters; records the time and any heavy modules it loaded"""
+    code = (
+        "import json, sys, time; start = time.perf_counter(); import rss_feed_summarizer.cli; "
+        "elapsed = time.perf_counter() - start; "
+        f"print(json.dumps([elapsed, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))"
+    )
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")])))
+
+    samples = []
+    heavy = set()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                env=env, check=True).stdout
+        elapsed, loaded = json.loads(output.strip().splitlines()[-1])
+        samples.append(elapsed)
+        heavy.update(loaded)
+
+    return samples, "import", repeat, sorted(heavy)
+
+
+def bench_hedging(calls: int, concurrency: int, mock: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+    """
+    Send the same mock LLM calls (with injected slow responses) unhedged and then hedged
+
+    Returns:
+        {"hedge:off": ..., "hedge:on": ...} latency summaries; the hedged one also
+        records the duplicate calls spent
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from . import hedging
+    from .mock_llm import MockChatModel
+
+    previous = dict(config.HEDGING)
+    # Hedge from the observed p95 alone - the production floor is far above mock latencies
+    config.HEDGING.update(min_threshold=0.0, min_samples=20)
+    hedging.reset_hedging()
+    try:
+        inner = MockChatModel(model_name="bench", seed=7, cache=False, **mock)
+        models = {
+            'hedge:off': inner,
+            'hedge:on': hedging.HedgedChatModel(inner=inner, agent="bench", cache=False),
+        }
+
+        results = {}
+        for name, model in models.items():
+            def call(i, model=model, name=name):
+                start = time.perf_counter()
+                model.invoke(f"{name} benchmark call {i}: summarize this article")
+                return time.perf_counter() - start
+
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                samples = list(pool.map(call, range(calls)))
+            results[name] = _summarize(samples, "call", calls)
+            results[name]['p99_ms'] = percentile(samples, 99) * 1000
+
+        stats = hedging.get_tracker("bench").get_stats()
+        results['hedge:on']['extra_calls'] = stats['hedges']
+        results['hedge:on']['hedges_won'] = stats['hedges_won']
+        return results
+    finally:
+        config.HEDGING.clear()
+        config.HEDGING.update(previous)
+        hedging.reset_hedging()
+
+
+def bench_email(recipients: int, pool_sizes: List[int], latency: float, drop_every: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Deliver a rendered digest to synthetic recipients through a local SMTP server,
+    once per pool size, with a per-message server latency and periodically dropped connections
+
+    Returns:
+        {"email:pool=<n>": ...} with the delivery time, messages per second,
+        reconnects and whether every recipient got exactly one message
+    """
+    from .distributor import DigestEmail, MarkdownDistributor
+
+    addresses = [f"reader{i}@example.com" for i in range(recipients)]
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        distributor = MarkdownDistributor(output_dir=output_dir)
+        articles = [dict(article, ai_summary=article['summary']) for article in generate_articles(50)]
+        markdown = distributor.format_articles(articles, {"INDUSTRY_AND_MARKET": articles})
+        digest = DigestEmail("digest@example.com", "Benchmark Digest", markdown, f"<pre>{escape(markdown)}</pre>")
+
+        for pool_size in pool_sizes:
+            with LocalSMTPServer(latency=latency, drop_every=drop_every) as server:
+                settings = {'smtp_server': "127.0.0.1", 'smtp_port': server.port, 'smtp_security': "none",
+                            'smtp_password': "bench", 'pool_size': pool_size, 'max_retries': 3,
+                            'retry_backoff': 0.0}
+                stats = distributor.deliver_email(digest, addresses, settings)
+                delivered = sorted(rcpt for rcpts, _ in server.messages for rcpt in rcpts)
+
+            duration = stats['duration']
+            results[f"email:pool={pool_size}"] = {
+                'unit': f"{recipients} emails",
+                'samples': 1,
+                'p50_ms': duration * 1000,
+                'p95_ms': duration * 1000,
+                'mean_ms': duration * 1000,
+                'throughput': stats['sent'] / duration if duration > 0 else 0.0,
+                'sent': stats['sent'],
+                'failed': stats['failed'],
+                'reconnects': stats['reconnects'],
+                'exactly_once': delivered == sorted(addresses),
+            }
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def _summarize(samples: List[float], unit: str, items: int) -> Dict[str, Any]:
+    total = sum(samples)
+    return {
+        'unit': unit,
+        'samples': len(samples),
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'mean_ms': statistics.mean(samples) * 1000 if samples else 0.0,
+        'throughput': items / total if total > 0 else 0.0,
+    }
+
+
+def _render_scaling(results: Dict[str, Dict[str, Any]]) -> Dict[str, tuple]:
+    """Microseconds per article at the smallest and largest corpus size, per render stage"""
+    scaling = {}
+    for stage in ("render", "render_cached"):
+        sizes = sorted(int(name.split("@")[1]) for name in results if name.startswith(f"{stage}@"))
+        if len(sizes) > 1:
+            per_article = [1e6 / results[f"{stage}@{size}"]['throughput'] for size in (sizes[0], sizes[-1])]
+            scaling[stage] = tuple(per_article)
+    return scaling
+
+
+def run_benchmarks(sizes: List[int] = None, stages: List[str] = None, repeat: int = None,
+                   seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the selected stage benchmarks on synthetic corpora of each size
+
+    Returns:
+        Dict of "<stage>@<size>" (or "import") -> p50/p95/throughput results
+    """
+    sizes = sizes or config.BENCHMARK.get("sizes", [100, 10000])
+    stages = stages or STAGES
+    repeat = repeat or config.BENCHMARK.get("repeat", 3)
+    benchmarks = {
+        'fetch': bench_fetch,
+        'keyword_filter': bench_keyword_filter,
+        'cache': bench_cache_lookups,
+        'render': bench_render,
+        'render_cached': lambda articles, repeat: bench_render(articles, repeat, cached=True),
+    }
+
+    results = {}
+    for size in sizes:
+        articles = generate_articles(size, seed=seed)
+        for stage in stages:
+            if stage not in benchmarks:
+                continue
+            print(f"⏱️ {stage} @ {size:,} articles...")
+            samples, unit, items = benchmarks[stage](articles, repeat)
+            results[f"{stage}@{size}"] = _summarize(samples, unit, items)
+
+    if "import" in stages:
+        print("⏱️ import...")
+        samples, unit, items, heavy = bench_import(max(repeat, 5))
+        results["import"] = _summarize(samples, unit, items)
+        results["import"]['heavy_modules'] = heavy
+
+    if "email" in stages:
+        email = config.BENCHMARK.get("email", {})
+        print("⏱️ email delivery (local SMTP)...")
+        results.update(bench_email(email.get("recipients", 2000), email.get("pool_sizes", [1, 4, 8]),
+                                   email.get("latency", 0.005), email.get("drop_every", 250)))
+
+    if "hedge" in stages:
+        print("⏱️ hedged LLM calls (mock)...")
+        results.update(bench_hedging(config.BENCHMARK.get("hedge_calls", 400),
+                                     config.BENCHMARK.get("hedge_concurrency", 8),
+                                     config.BENCHMARK.get("hedge_mock", {})))
+
+    return results
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    """Load saved benchmark results (empty if there is no baseline yet)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(results: Dict[str, Dict[str, Any]], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({'created': datetime.now().isoformat(), 'python': sys.version.split()[0],
+                   'results': results}, f, indent=2)
+
+
+def find_problems(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+                  tolerance: float = None) -> List[str]:
+    """Regressions beyond the tolerance, plus import-time guard violations"""
+    tolerance = config.BENCHMARK.get("tolerance", 0.25) if tolerance is None else tolerance
+    problems = []
+
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous and previous['p50_ms'] > 0 and result['p50_ms'] > previous['p50_ms'] * (1 + tolerance):
+            problems.append(f"{name}: p50 {result['p50_ms']:.3f}ms vs baseline {previous['p50_ms']:.3f}ms")
+
+    if "import" in results:
+        budget = config.BENCHMARK.get("import_budget_ms", 100)
+        if results["import"]['p50_ms'] > budget:
+            problems.append(f"import: p50 {results['import']['p50_ms']:.1f}ms exceeds the {budget}ms budget")
+        if results["import"].get('heavy_modules'):
+            problems.append(f"import: CLI import loaded {', '.join(results['import']['heavy_modules'])}")
+
+    limit = config.BENCHMARK.get("render_scaling_limit", 3.0)
+    for stage, (small, large) in _render_scaling(results).items():
+        if large > small * limit:
+            problems.append(f"{stage}: {large:.1f}us per article at the largest size vs {small:.1f}us at the "
+                            f"smallest (more than {limit:g}x - rendering is not scaling linearly)")
+
+    for name, result in results.items():
+        if name.startswith("email:") and not result['exactly_once']:
+            problems.append(f"{name}: recipients did not each get exactly one message")
+
+    return problems
+
+
+def print_report(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]] = None):
+    """Print throughput and p50/p95 per stage, with the change against the baseline"""
+    baseline = baseline or {}
+    print("\n📊 Benchmark Results:")
+    print(f"   {'stage':<24} {'per':<14} {'p50 ms':>10} {'p95 ms':>10} {'items/s':>12}  vs baseline")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        change = ""
+        if previous and previous['p50_ms'] > 0:
+            change = f"{(result['p50_ms'] / previous['p50_ms'] - 1) * 100:+.1f}% p50"
+        print(f"   {name:<24} {result['unit']:<14} {result['p50_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+              f"{result['throughput']:>12,.0f}  {change}")
+
+    for stage, (small, large) in _render_scaling(results).items():
+        print(f"📄 {stage} scaling: {small:.1f}us per article at the smallest size, {large:.1f}us at the largest")
+
+    for name, result in results.items():
+        if name.startswith("email:"):
+            print(f"📧 {name}: {result['sent']} sent, {result['failed']} failed, {result['reconnects']} reconnects, "
+                  f"{'each recipient exactly once' if result['exactly_once'] else 'DELIVERY MISMATCH'}")
+
+    if "hedge:off" in results and "hedge:on" in results:
+        off, on = results["hedge:off"], results["hedge:on"]
+        calls = off['samples']
+        print(f"\n🪃 Hedging: p99 {off['p99_ms']:.1f}ms -> {on['p99_ms']:.1f}ms "
+              f"({(on['p99_ms'] / off['p99_ms'] - 1) * 100:+.1f}%) for {on['extra_calls']} extra calls "
+              f"({on['extra_calls'] / calls * 100:.1f}% of {calls}, {on['hedges_won']} won)")
+
+
+def run_bench(sizes: List[int] = None, stages: List[str] = None, repeat: int = None,
+              baseline_path: str = None, save: bool = False) -> bool:
+    """
+    Run the benchmarks, print the report and compare with (or save) the baseline
+
+    Returns:
+        True if no stage regressed beyond the tolerance and the import guard passed
+    """
+    baseline_path = baseline_path or config.BENCHMARK.get("baseline_file", "bench_baseline.json")
+    results = run_benchmarks(sizes, stages, repeat)
+    baseline = load_baseline(baseline_path)
+    print_report(results, baseline)
+
+    problems = find_problems(results, baseline)
+    for problem in problems:
+        print(f"⚠️ {problem}")
+
+    if save:
+        save_baseline(results, baseline_path)
+        print(f"💾 Baseline saved to {baseline_path}")
+    elif not baseline:
+        print(f"ℹ️  No baseline at {baseline_path} - save one with: rss-summarizer bench --save-baseline")
+
+    return not problems
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_bench(sizes=[100]) else 1)
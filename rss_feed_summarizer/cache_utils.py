@@ -1,20 +1,47 @@
 """
 Shared cache utilities for the RSS summarizer
 """
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from . import metrics
+
+_llm_cache_lock = threading.Lock()
+_llm_cache_path = None
+
+def setup_llm_cache(cache_db: str):
+    """Install LangChain's SQLite LLM cache once per process (not once per agent)"""
+    global _llm_cache_path
+    with _llm_cache_lock:
+        if _llm_cache_path == cache_db:
+            return
+        from langchain_community.cache import SQLiteCache
+        from langchain.globals import set_llm_cache
+        set_llm_cache(SQLiteCache(database_path=cache_db))
+        _llm_cache_path = cache_db
 
 class CacheTracker:
-    def __init__(self, cost_per_call=0.01):
+    def __init__(self, cost_per_call=0.01, agent=None):
+        self.agent = agent  # Metrics label; lookups are also exported per run (see metrics.py)
         self.cache_hits = 0
         self.cache_misses = 0
         self.cost_per_call = cost_per_call
         self.estimated_savings = 0
+        self._lock = threading.Lock()  # Agents are shared across category worker threads
     
     def record_hit(self):
-        self.cache_hits += 1
-        self.estimated_savings += self.cost_per_call
+        with self._lock:
+            self.cache_hits += 1
+            self.estimated_savings += self.cost_per_call
+        if self.agent:
+            metrics.inc("cache_lookups_total", agent=self.agent, result="hit")
     
     def record_miss(self):
-        self.cache_misses += 1
+        with self._lock:
+            self.cache_misses += 1
+        if self.agent:
+            metrics.inc("cache_lookups_total", agent=self.agent, result="miss")
     
     def get_stats(self):
         total = self.cache_hits + self.cache_misses
@@ -24,4 +51,54 @@ class CacheTracker:
             'misses': self.cache_misses,
             'hit_rate': f"{hit_rate:.1f}%",
             'estimated_savings': f"${self.estimated_savings:.2f}"
-        } 
\ No newline at end of file
+        }
+
+def save_parse_failure(cache_db: str, agent: str, cache_key: str, response: str):
+    """Keep the raw text of a response that could not be parsed, so the paid call is not lost"""
+    conn = sqlite3.connect(cache_db)
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS llm_parse_failures
+    (agent TEXT, cache_key TEXT, response TEXT, timestamp TEXT, PRIMARY KEY (agent, cache_key))
+    """)
+    
+    cursor.execute(
+        "INSERT OR REPLACE INTO llm_parse_failures (agent, cache_key, response, timestamp) VALUES (?, ?, ?, ?)",
+        (agent, cache_key, response, datetime.now().isoformat())
+    )
+    
+    conn.commit()
+    conn.close()
+
+def bulk_lookup(cache_db: str, table: str, keys: list, columns: list, batch_size: int = 500) -> dict:
+    """
+    Look up many cache keys in one agent table with batched IN queries
+    
+    Returns:
+        {cache_key: (column values...)} for the keys that are cached. A missing
+        database or table is treated as empty (and is not created)
+    """
+    if not keys or not os.path.exists(cache_db):
+        return {}
+    
+    found = {}
+    conn = sqlite3.connect(cache_db)
+    try:
+        cursor = conn.cursor()
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), batch_size):
+            batch = unique_keys[start:start + batch_size]
+            placeholders = ",".join("?" * len(batch))
+            cursor.execute(
+                f"SELECT cache_key, {', '.join(columns)} FROM {table} WHERE cache_key IN ({placeholders})",
+                batch
+            )
+            for row in cursor.fetchall():
+                found[row[0]] = row[1:]
+    except sqlite3.OperationalError:
+        # Table not created yet - the agent has never run against this cache
+        return {}
+    finally:
+        conn.close()
+    return found
@@ -3,19 +3,25 @@ Agent 5: Categorization Agent
 Tags articles with categories (TOOLS_AND_FRAMEWORKS, MODELS_AND_INFRASTRUCTURE, etc.)
 """
 from typing import List, Dict, Any
-from . import config
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain_community.cache import SQLiteCache
-from langchain.globals import set_llm_cache
+from . import config, deadline
 import sqlite3
 import os
 import hashlib
-import json
 from datetime import datetime
-from .cache_utils import CacheTracker
+from .agent_registry import get_agent
+from .llm_backends import create_chat_model, get_cache_dir, requires_api_key
+from .cache_utils import CacheTracker, save_parse_failure, setup_llm_cache
+from .prompts import chat_prompt
+from .logging_utils import ItemLogger, fingerprint, get_logger
+from .structured_output import (
+    ParseTracker, StructuredOutputError, json_mode_kwargs, parse_structured,
+    CATEGORIZATION_SCHEMA,
+)
+from .keyword_filter import assign_category
 from collections import Counter
 
+logger = get_logger("categorization")
+
 # Import categories from config
 CATEGORIES = config.CATEGORIES
 
@@ -23,51 +29,52 @@ class CategorizationAgent:
     def __init__(self, api_key=None, model=None):
         """Initialize the Categorization Agent"""
         self.api_key = api_key or config.OPENAI_API_KEY
-        if not self.api_key:
+        if not self.api_key and requires_api_key():
             raise ValueError("OpenAI API key is required")
         
         # Set up cache
-        self.cache_dir = "cache"
+        self.cache_dir = get_cache_dir()
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
         
         self.cache_db = f"{self.cache_dir}/langchain.db"
-        set_llm_cache(SQLiteCache(database_path=self.cache_db))
+        setup_llm_cache(self.cache_db)
         
-        # Initialize cache tracker
-        self.cache_tracker = CacheTracker()
+        # Initialize cache and parse trackers
+        self.cache_tracker = CacheTracker(agent="categorization")
+        self.parse_tracker = ParseTracker()
+        self.item_log = ItemLogger(logger)
         
         # Use GPT-3.5 Turbo for categorization (cost-effective)
         self.model = model or config.MODELS.get("categorization", config.OPENAI_MODEL)
         self.categories = list(CATEGORIES.keys())
-        print(f"🏷️ CATEGORIZATION AGENT: Using {self.model} for cost-effective categorization")
+        logger.info("🏷️ CATEGORIZATION AGENT: Using %s for cost-effective categorization", self.model)
         
         # Initialize LangChain components
-        self.llm = ChatOpenAI(
-            model_name=self.model,
-            openai_api_key=self.api_key,
+        self.llm = create_chat_model(
+            model=self.model,
+            api_key=self.api_key,
             temperature=0.2,
-            request_timeout=30
+            request_timeout=30,
+            model_kwargs=json_mode_kwargs(self.model),
+            agent="categorization"
         )
         
         # Categorization prompt
-        self.categorization_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a categorization agent. Classify articles into predefined categories."),
-            ("user", """Classify the article into one of the following categories:
-- TOOLS_AND_FRAMEWORKS
-- MODELS_AND_INFRASTRUCTURE  
-- ENTERPRISE_USE_CASES
-- INDUSTRY_AND_MARKET
+        self.categorization_prompt = chat_prompt(
+            f"""You are a categorization agent. Classify articles into predefined categories.
 
-Title: {title}
-Summary: {summary}
+Classify the article into one of the following categories:
+{chr(10).join(f"- {category}" for category in self.categories)}
 
-Respond with:
-{{
+Respond with JSON:
+{{{{
   "category": "...",
   "justification": "..."
-}}""")
-        ])
+}}}}""",
+            """Title: {title}
+Summary: {summary}"""
+        )
     
     def _get_cache_key(self, title: str, content: str) -> str:
         """Generate a cache key for an article"""
@@ -103,9 +110,24 @@ Respond with:
         conn.commit()
         conn.close()
 
+    def _save_response(self, cache_key: str, content: str, article: Dict[str, Any]) -> tuple:
+        """Parse a categorization response and cache it (also used for Batch API results)"""
+        try:
+            result = parse_structured(content, CATEGORIZATION_SCHEMA, self.parse_tracker)
+            category = result['category']
+            justification = result['justification']
+        except StructuredOutputError:
+            # Fall back to keyword categorization and cache it, so the call isn't repeated
+            save_parse_failure(self.cache_db, "categorization", cache_key, content)
+            category = assign_category(article)
+            justification = 'Keyword categorization (unparseable model response)'
+        
+        self._save_cache(cache_key, category, justification)
+        return category, justification
+
     def categorize_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Categorize articles into predefined categories"""
-        print(f"\n🏷️ CATEGORIZATION AGENT: Categorizing {len(articles)} articles...")
+        logger.info("🏷️ CATEGORIZATION AGENT: Categorizing %d articles...", len(articles))
         
         categorized_articles = []
         for article in articles:
@@ -122,49 +144,56 @@ Respond with:
             else:
                 self.cache_tracker.record_miss()
                 
+                if deadline.expired("categorization"):
+                    # Out of time: keyword category for this run only (not cached)
+                    deadline.degrade("categorization", article, "keyword category")
+                    article['category'] = assign_category(article)
+                    article['category_justification'] = 'Keyword categorization (run deadline)'
+                    categorized_articles.append(article)
+                    continue
+                
                 try:
                     response = (self.categorization_prompt | self.llm).invoke({
                         "title": title,
                         "summary": summary
                     })
                     
-                    result = json.loads(response.content.strip())
-                    category = result.get('category', 'INDUSTRY_AND_MARKET')
-                    justification = result.get('justification', 'No justification provided')
-                    
-                    # Validate category
-                    if category not in self.categories:
-                        category = 'INDUSTRY_AND_MARKET'
-                    
-                    self._save_cache(cache_key, category, justification)
+                    category, justification = self._save_response(cache_key, response.content, article)
                     
                     article['category'] = category
                     article['category_justification'] = justification
                     
                 except Exception as e:
-                    print(f"Error in categorization agent for '{title}': {str(e)}")
+                    self.item_log.warning("error", "Categorization failed for '%s': %s", title, e,
+                                          stage="categorization", article=fingerprint(article))
                     article['category'] = 'INDUSTRY_AND_MARKET'
                     article['category_justification'] = 'Error in categorization'
             
             categorized_articles.append(article)
         
-        # Print category distribution
+        self.item_log.flush()
+        
+        # Log category distribution
         categories = [a.get('category', 'UNKNOWN') for a in categorized_articles]
         category_counts = Counter(categories)
-        print("✅ Category distribution:")
+        logger.info("✅ Category distribution:")
         for cat, count in category_counts.items():
-            print(f"  {cat}: {count} articles")
+            logger.info("  %s: %d articles", cat, count)
         
-        # Print cache statistics
+        # Log cache statistics
         stats = self.cache_tracker.get_stats()
-        print(f"Cache Stats - Hits: {stats['hits']}, Misses: {stats['misses']}, Hit Rate: {stats['hit_rate']}")
+        logger.info("Cache Stats - Hits: %s, Misses: %s, Hit Rate: %s", stats['hits'], stats['misses'], stats['hit_rate'])
+        
+        parse_stats = self.parse_tracker.get_stats()
+        logger.info("Parse Stats - Clean: %s, Recovered: %s, Failures: %s",
+                    parse_stats['clean'], parse_stats['recovered'], parse_stats['failures'])
         
         return categorized_articles
 
 # Helper function for easy use
 def categorize_by_topic(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Helper function for categorizing articles"""
-    agent = CategorizationAgent()
+    agent = get_agent("categorization")
     return agent.categorize_articles(articles)
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+"""
+Run checkpoints for resumable pipelines
+Each completed stage's output is stored as gzipped JSON under cache/runs/<run-id>/
+"""
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Any, List
+from . import config
+
+# Microseconds keep runs started in the same second (cron plus a manual run) apart
+RUN_ID_FORMAT = "%Y%m%d-%H%M%S-%f"
+
+
+def _encode(value: Any) -> Any:
+    """JSON default hook - keeps datetimes (article 'published') round-trippable"""
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not checkpointable")
+
+
+def _decode(obj: dict) -> Any:
+    """JSON object hook - restores datetimes written by _encode"""
+    if len(obj) == 1 and "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+class RunCheckpoint:
+    def __init__(self, run_id: str = None, checkpoint_dir: str = None):
+        """
+        Initialize checkpoint storage for one pipeline run
+
+        Args:
+            run_id: Existing run to resume, or None to start a new run
+            checkpoint_dir: Directory holding one sub-directory per run
+
+        Raises:
+            FileExistsError: If a new run's directory already exists (a new run never
+                picks up another run's checkpoints)
+        """
+        self.checkpoint_dir = checkpoint_dir or config.CHECKPOINTS.get("dir", "cache/runs")
+        self.run_id = run_id or datetime.now().strftime(RUN_ID_FORMAT)
+        self.run_dir = os.path.join(self.checkpoint_dir, self.run_id)
+        os.makedirs(self.run_dir, exist_ok=run_id is not None)
+
+    def _path(self, stage: str) -> str:
+        return os.path.join(self.run_dir, f"{stage}.json.gz")
+
+    def has(self, stage: str) -> bool:
+        """Check whether a stage completed in this run"""
+        return os.path.exists(self._path(stage))
+
+    def load(self, stage: str) -> Any:
+        """Load a completed stage's output"""
+        with gzip.open(self._path(stage), 'rt', encoding='utf-8') as f:
+            return json.load(f, object_hook=_decode)
+
+    def save(self, stage: str, result: Any):
+        """Persist a stage's output (written to a temp file first, so a crash never leaves half a checkpoint)"""
+        path = self._path(stage)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(result, f, default=_encode, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def completed_stages(self) -> List[str]:
+        """Names of the stages completed in this run"""
+        return sorted(name[:-len(".json.gz")] for name in os.listdir(self.run_dir) if name.endswith(".json.gz"))
+
+    @staticmethod
+    def exists(run_id: str, checkpoint_dir: str = None) -> bool:
+        """Check whether checkpoints exist for a run ID"""
+        checkpoint_dir = checkpoint_dir or config.CHECKPOINTS.get("dir", "cache/runs")
+        return os.path.isdir(os.path.join(checkpoint_dir, run_id))
+
+    @staticmethod
+    def list_runs(checkpoint_dir: str = None) -> List[str]:
+        """Run IDs with checkpoints, oldest first"""
+        checkpoint_dir = checkpoint_dir or config.CHECKPOINTS.get("dir", "cache/runs")
+        if not os.path.isdir(checkpoint_dir):
+            return []
+        return sorted(name for name in os.listdir(checkpoint_dir)
+                      if os.path.isdir(os.path.join(checkpoint_dir, name)))
+
+    @staticmethod
+    def prune(keep: int, checkpoint_dir: str = None):
+        """Delete all but the newest `keep` runs"""
+        checkpoint_dir = checkpoint_dir or config.CHECKPOINTS.get("dir", "cache/runs")
+        runs = RunCheckpoint.list_runs(checkpoint_dir)
+        for run_id in runs[:max(0, len(runs) - keep)]:
+            shutil.rmtree(os.path.join(checkpoint_dir, run_id), ignore_errors=True)
@@ -30,16 +30,19 @@ def create_env_file():
     print("📝 Please edit .env file with your OpenAI API key and email settings.")
     return True
 
-def validate_config():
+def validate_config(llm_backend: Optional[str] = None):
     """Validate the configuration"""
     from dotenv import load_dotenv
     
     # Load environment variables
     load_dotenv()
     
-    # Check required variables
+    # Check required variables (the local mock backend needs no API key)
+    llm_backend = llm_backend or os.getenv('RSS_LLM_BACKEND', 'openai')
     api_key = os.getenv('OPENAIAPIKEY')
-    if not api_key:
+    if llm_backend == 'mock':
+        print("ℹ️  Using the mock LLM backend - no OpenAI API calls will be made")
+    elif not api_key:
         print("❌ OPENAIAPIKEY is required but not set")
         print("💡 Edit your .env file and add your OpenAI API key")
         return False
@@ -55,17 +58,78 @@ def validate_config():
     print("✅ Configuration validation passed!")
     return True
 
-def run_summarizer():
+def run_summarizer(resume_run_id: Optional[str] = None, llm_backend: Optional[str] = None,
+                   profile: Optional[str] = None, trace_memory: bool = False,
+                   log_level: Optional[str] = None, quiet: bool = False, log_format: Optional[str] = None,
+                   deadline: Optional[float] = None):
     """Run the RSS feed summarizer"""
     try:
+        from .logging_utils import configure_logging
         from .pipeline import run_pipeline
+        configure_logging(level=log_level, quiet=quiet,
+                          json_format=(log_format == "json") if log_format else None)
+        if llm_backend:
+            from .llm_backends import set_backend
+            set_backend(llm_backend)
         print("🚀 Starting RSS Feed Summarizer...")
-        run_pipeline()
+        run_pipeline(resume_run_id=resume_run_id, profile=profile, trace_memory=trace_memory,
+                     deadline_seconds=deadline)
         return True
     except Exception as e:
         print(f"❌ Error running summarizer: {str(e)}")
         return False
 
+def run_estimate(llm_backend: Optional[str] = None, time_window: Optional[int] = None):
+    """Print the projected LLM calls, tokens, cost and wall time of a run without making LLM calls"""
+    try:
+        from .estimator import run_estimate as estimate_run
+        if llm_backend:
+            from .llm_backends import set_backend
+            set_backend(llm_backend)
+        estimate_run(time_window_hours=time_window)
+        return True
+    except Exception as e:
+        print(f"❌ Error estimating run: {str(e)}")
+        return False
+
+def run_batch_mode(llm_backend: Optional[str] = None, time_window: Optional[int] = None, then_run: bool = False):
+    """Send the run's LLM work through the Batch API and cache the results"""
+    try:
+        from .batch import run_batch
+        if llm_backend:
+            from .llm_backends import set_backend
+            set_backend(llm_backend)
+        run_batch(time_window_hours=time_window, then_run=then_run)
+        return True
+    except Exception as e:
+        print(f"❌ Error running batch mode: {str(e)}")
+        return False
+
+def run_deliver(watch: bool = False, poll_interval: Optional[float] = None):
+    """Send the queued digest emails from the outbox"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+        from .distributor import deliver_outbox
+        from .logging_utils import configure_logging
+        configure_logging()
+        return deliver_outbox(watch=watch, poll_interval=poll_interval)
+    except Exception as e:
+        print(f"❌ Error delivering emails: {str(e)}")
+        return False
+
+def run_benchmarks(sizes: Optional[str] = None, stages: Optional[str] = None, repeat: Optional[int] = None,
+                   baseline: Optional[str] = None, save_baseline: bool = False):
+    """Run the benchmark suite"""
+    from .bench import run_bench
+    return run_bench(
+        sizes=[int(size) for size in sizes.split(',')] if sizes else None,
+        stages=stages.split(',') if stages else None,
+        repeat=repeat,
+        baseline_path=baseline,
+        save=save_baseline
+    )
+
 def show_status():
     """Show the current status and configuration"""
     from dotenv import load_dotenv
@@ -107,7 +171,16 @@ def main():
 Examples:
   rss-summarizer setup          # Create configuration file
   rss-summarizer run            # Run the summarizer
+  rss-summarizer run --resume 20250529-070000-123456  # Resume a failed run
+  rss-summarizer run --llm-backend mock  # Run offline against the mock LLM
+  rss-summarizer run --profile --trace-memory  # Write per-stage profiles to output/profiles/
+  rss-summarizer run --quiet --log-format json  # Warnings and errors only, as JSON lines
+  rss-summarizer run --deadline 600  # Finish within 10 minutes, degrading slow stages
+  rss-summarizer run --estimate --time-window 168  # Project calls, cost and time for a weekly window
+  rss-summarizer batch --time-window 168 --run  # Weekly digest through the Batch API
+  rss-summarizer deliver --watch  # Keep sending queued digest emails from the outbox
   rss-summarizer status         # Show current status
+  rss-summarizer bench          # Benchmark parsing, filtering, caching and rendering
   rss-summarizer validate       # Validate configuration
         """
     )
@@ -119,10 +192,65 @@ Examples:
     
     # Run command
     run_parser = subparsers.add_parser('run', help='Run the RSS feed summarizer')
+    run_parser.add_argument('--resume', metavar='RUN_ID',
+                            help='Resume a previous run from its first incomplete stage')
+    run_parser.add_argument('--llm-backend', choices=['openai', 'mock'],
+                            help='LLM backend to use (default: RSS_LLM_BACKEND or openai)')
+    run_parser.add_argument('--profile', nargs='?', const='cprofile', choices=['cprofile', 'sample'],
+                            help='Profile each stage with cProfile (default) or a sampling profiler; '
+                                 'stages run one at a time and results go to output/profiles/<run-id>/')
+    run_parser.add_argument('--trace-memory', action='store_true',
+                            help='Record tracemalloc peak and top allocations for each stage')
+    verbosity = run_parser.add_mutually_exclusive_group()
+    verbosity.add_argument('--quiet', '-q', action='store_true',
+                           help='Only log warnings and errors')
+    verbosity.add_argument('--verbose', '-v', action='store_true',
+                           help='Log per-article decisions (debug level)')
+    run_parser.add_argument('--deadline', type=float, metavar='SECONDS',
+                            help='Time budget for the run; stages out of their share fall back to local '
+                                 'paths (default: DEADLINE["budget_seconds"] if enabled)')
+    run_parser.add_argument('--estimate', action='store_true',
+                            help='Fetch and keyword-filter, then print projected LLM calls, tokens, cost '
+                                 'and wall time without making any LLM calls')
+    run_parser.add_argument('--time-window', type=int, metavar='HOURS',
+                            help='Fetch articles from the last HOURS hours (default: TIME_WINDOW)')
+    run_parser.add_argument('--log-format', choices=['text', 'json'],
+                            help='Log as text or one JSON object per line (default: LOGGING["format"])')
+    
+    # Batch command
+    batch_parser = subparsers.add_parser('batch', help='Send relevance, categorization and summary requests '
+                                                       'through the OpenAI Batch API and cache the results')
+    batch_parser.add_argument('--llm-backend', choices=['openai', 'mock'],
+                              help='LLM backend to use; mock submits to a local stand-in batch server')
+    batch_parser.add_argument('--time-window', type=int, metavar='HOURS',
+                              help='Fetch articles from the last HOURS hours (default: TIME_WINDOW)')
+    batch_parser.add_argument('--run', action='store_true',
+                              help='Run the pipeline once the batches finish (their results are cached)')
+    
+    # Deliver command
+    deliver_parser = subparsers.add_parser('deliver', help='Send queued digest emails from the outbox '
+                                                           '(retrying failed sends)')
+    deliver_parser.add_argument('--watch', action='store_true',
+                                help='Keep polling the outbox for new and retryable jobs until interrupted')
+    deliver_parser.add_argument('--poll-interval', type=float, metavar='SECONDS',
+                                help='Seconds between polls with --watch (default: DISTRIBUTION["email"]["poll_interval"])')
     
     # Status command
     status_parser = subparsers.add_parser('status', help='Show current status and configuration')
     
+    # Bench command
+    bench_parser = subparsers.add_parser('bench', help='Benchmark fetch parsing, keyword filtering, cache lookups and rendering')
+    bench_parser.add_argument('--sizes', metavar='N[,N...]',
+                              help='Synthetic corpus sizes (default: 100,10000; e.g. 100,10000,100000)')
+    bench_parser.add_argument('--stages', metavar='STAGE[,STAGE...]',
+                              help='Stages to run: fetch,keyword_filter,cache,render,render_cached,import (default: all), '
+                                   'plus the opt-in hedge (mock LLM tail latency, unhedged vs hedged) '
+                                   'and email (SMTP delivery to a local server)')
+    bench_parser.add_argument('--repeat', type=int, help='Passes over each corpus')
+    bench_parser.add_argument('--baseline', metavar='FILE', help='Baseline file (default: bench_baseline.json)')
+    bench_parser.add_argument('--save-baseline', action='store_true',
+                              help='Save these results as the new baseline')
+    
     # Validate command
     validate_parser = subparsers.add_parser('validate', help='Validate configuration')
     
@@ -139,15 +267,41 @@ Examples:
         return 0 if success else 1
     
     elif args.command == 'run':
-        if not validate_config():
+        if args.time_window:
+            from . import config
+            config.TIME_WINDOW = args.time_window
+        if args.estimate:
+            # Nothing is sent to the LLM, so no API key is needed
+            return 0 if run_estimate(llm_backend=args.llm_backend, time_window=args.time_window) else 1
+        if not validate_config(llm_backend=args.llm_backend):
             return 1
-        success = run_summarizer()
+        success = run_summarizer(resume_run_id=args.resume, llm_backend=args.llm_backend,
+                                 profile=args.profile, trace_memory=args.trace_memory,
+                                 log_level="DEBUG" if args.verbose else None, quiet=args.quiet,
+                                 log_format=args.log_format, deadline=args.deadline)
+        return 0 if success else 1
+    
+    elif args.command == 'batch':
+        if args.time_window:
+            from . import config
+            config.TIME_WINDOW = args.time_window
+        if not validate_config(llm_backend=args.llm_backend):
+            return 1
+        success = run_batch_mode(llm_backend=args.llm_backend, time_window=args.time_window, then_run=args.run)
+        return 0 if success else 1
+    
+    elif args.command == 'deliver':
+        success = run_deliver(watch=args.watch, poll_interval=args.poll_interval)
         return 0 if success else 1
     
     elif args.command == 'status':
         show_status()
         return 0
     
+    elif args.command == 'bench':
+        success = run_benchmarks(args.sizes, args.stages, args.repeat, args.baseline, args.save_baseline)
+        return 0 if success else 1
+    
     elif args.command == 'validate':
         success = validate_config()
         return 0 if success else 1
@@ -55,6 +55,7 @@ TOPICS_OF_INTEREST = [
 # Categories for article classification
 CATEGORIES = {
     "TOOLS_AND_FRAMEWORKS": {
+        "description": "Agent frameworks, SDKs, developer tools, APIs and platforms for building with AI",
         "emoji": "🛠️",
         "keywords": [
             "agent", "mcp", "framework", "sdk", "platform", "tool", "api",
@@ -63,6 +64,7 @@ CATEGORIES = {
         "url_patterns": ["langchain.dev", "mistral", "bedrock", "huggingface", "github"]
     },
     "MODELS_AND_INFRASTRUCTURE": {
+        "description": "Model releases, training and fine-tuning, inference, embeddings, vector stores and the infrastructure that runs them",
         "emoji": "⚡",
         "keywords": [
             "llm", "language model", "gpt", "transformer", "training",
@@ -72,6 +74,7 @@ CATEGORIES = {
         "url_patterns": ["openai", "huggingface", "anthropic", "arxiv", "microsoft", "aws"]
     },
     "ENTERPRISE_USE_CASES": {
+        "description": "AI in production at companies: case studies, integrations, automation and measured business results",
         "emoji": "📈",
         "keywords": [
             "enterprise", "production", "deployment", "integration", "solution",
@@ -80,6 +83,7 @@ CATEGORIES = {
         "url_patterns": ["aws.amazon.com", "cloud.google.com", "case-study", "blog"]
     },
     "INDUSTRY_AND_MARKET": {
+        "description": "Funding, acquisitions, partnerships, launches, regulation and market trends",
         "emoji": "📚",
         "keywords": [
             "market", "startup", "funding", "ipo", "partnership", "acquisition",
@@ -101,6 +105,20 @@ DISTRIBUTION = {
         "smtp_port": 465,  # For SSL
         "smtp_user": os.getenv("SMTP_USER"),  # Usually same as sender
         "smtp_password": os.getenv("GMAIL_APP_PASSWORD"),  # For Gmail, use an App Password: https://myaccount.google.com/apppasswords
+        "smtp_security": "ssl",  # "ssl" (port 465), "starttls" (port 587) or "none" (local test servers)
+        "smtp_timeout": 30,  # Seconds per SMTP operation
+        # Delivery - the digest is encoded once and sent over a small pool of parallel connections
+        "pool_size": 4,  # Parallel authenticated SMTP connections
+        "max_retries": 3,  # Reconnect-and-resend attempts per recipient after a dropped connection
+        "retry_backoff": 1.0,  # Seconds before the first reconnect (doubles on each retry)
+        # Outbox - one job per recipient and digest, so delivery survives crashes and reruns
+        "outbox_db": "cache/outbox.db",
+        "deliver_in_run": True,  # False: runs only queue the digest and `rss-summarizer deliver` sends it
+        "max_attempts": 5,  # Sends per job before it is marked failed
+        "attempt_backoff": 60,  # Seconds before a failed job is retried (doubles on each attempt)
+        "lease_seconds": 600,  # A job claimed by a worker that died is retried after this long
+        "claim_size": 500,  # Jobs a worker claims at a time
+        "poll_interval": 30,  # Seconds between outbox polls in `rss-summarizer deliver --watch`
     }
 }
 
@@ -116,5 +134,192 @@ MODELS = {
     "micro_summary": "gpt-3.5-turbo",
 }
 
+# Relevance cascade - a cheaper model answers first with a confidence score and
+# only low-confidence decisions escalate to MODELS["relevance"]
+RELEVANCE_CASCADE = {
+    "enabled": False,  # Set to True to screen articles with the fast model first
+    "fast_model": "gpt-3.5-turbo",
+    "confidence_threshold": 0.8,  # Fast decisions below this confidence are escalated
+}
+
+# Structured output - use the provider's JSON mode on models that support it.
+# Responses are always run through the tolerant extractor in structured_output.py
+STRUCTURED_OUTPUT = {
+    "json_mode": True,
+}
+
+# Ranking mode - "listwise" ranks a whole category in one prompt, "pointwise" scores
+# each article once (cached per article) and keeps the top N with a heap selection,
+# "tournament" ranks fixed-size chunks in parallel and then ranks the chunk winners
+RANKING = {
+    "mode": "listwise",
+    "chunk_size": 20,  # Articles per prompt in tournament mode
+    "max_workers": 4,  # Chunks ranked concurrently in tournament mode
+}
+
+# Concurrency - categories are independent, so ranking and micro summaries
+# fan out across categories on one shared agent instance, and pipeline stages
+# whose dependencies are met run concurrently
+CONCURRENCY = {
+    "categories": 4,  # Categories processed in parallel
+    "stages": 4,  # Independent pipeline stages run at the same time (see scheduler.py)
+}
+
+# Content preparation for micro summaries - article HTML is converted to clean text
+# and cut to a per-model token budget (lead paragraphs first, then key paragraphs)
+CONTENT_BUDGET = {
+    "enabled": True,  # Set to False to send the full cleaned text (for before/after comparisons)
+    "token_budgets": {
+        "gpt-3.5-turbo": 2000,
+        "gpt-4": 3000,
+    },
+    "default_budget": 2000,
+    "lead_paragraphs": 2,
+}
+
+# Long-document mode for micro summaries - articles whose cleaned text exceeds the
+# token budget are split into chunks, summarized concurrently, then reduced
+LONG_DOCUMENT = {
+    "enabled": True,
+    "chunk_tokens": 1500,  # Max content tokens per chunk prompt
+    "max_workers": 4,  # Chunks summarized in parallel per article
+}
+
+# Macro summary mode - "articles" builds the overview from raw snippets of every relevant
+# article, "micro_summaries" reduces it from per-category partial overviews of the
+# final micro summaries (cached per category, so only changed categories are recomputed)
+MACRO_SUMMARY = {
+    "mode": "articles",
+}
+
+# Run checkpoints - each stage's output is saved per run ID so a failed run can be
+# resumed from its first incomplete stage with: rss-summarizer run --resume <run-id>
+CHECKPOINTS = {
+    "enabled": True,
+    "dir": "cache/runs",
+    "keep_runs": 14,  # Older run checkpoints are deleted
+}
+
+# Run metrics - per-stage times and item counts, LLM calls/latency/tokens, cache hit
+# ratios and per-feed fetch status are written after every run as a Prometheus textfile
+# (point node_exporter's --collector.textfile.directory at "dir") and a JSON run report
+METRICS = {
+    "enabled": True,
+    "dir": "output/metrics",
+    "prometheus_file": "rss_summarizer.prom",  # Overwritten each run
+}
+
+# LLM backend - "openai" calls the OpenAI API, "mock" answers every agent prompt locally
+# with deterministic, schema-valid responses (see mock_llm.py) for offline benchmarks.
+# Override with the RSS_LLM_BACKEND environment variable or: rss-summarizer run --llm-backend mock
+LLM_BACKEND = os.getenv("RSS_LLM_BACKEND", "openai")
+
+# Mock backend behaviour - simulated latency and failures are reproducible from the seed
+MOCK_LLM = {
+    "latency": 0.0,  # Seconds added to every call
+    "latency_jitter": 0.0,  # Up to this many extra seconds per call
+    "error_rate": 0.0,  # Fraction of calls that raise a simulated provider error
+    "slow_rate": 0.0,  # Fraction of calls that hit a slow response (tail latency)
+    "slow_latency": 5.0,  # Seconds added to a slow response
+    "prefix_cache_min_tokens": 1024,  # Simulated prompt caching: smallest prompt with a cached prefix
+    "seed": 42,
+    "cache_dir": "cache/mock",  # Mock responses are cached apart from real ones
+}
+
+# Benchmarks (rss-summarizer bench) - synthetic corpus sizes, the baseline file results are
+# compared against, and the slowdown tolerated before a stage is flagged as a regression
+BENCHMARK = {
+    "sizes": [100, 10000],  # Add 100000 for the full-scale run (takes several minutes)
+    "repeat": 3,  # Passes over each corpus
+    "baseline_file": "bench_baseline.json",
+    "tolerance": 0.25,  # Flag stages whose p50 is more than 25% slower than the baseline
+    "import_budget_ms": 100,  # Max time to import the CLI (heavy dependencies must stay lazy)
+    "render_scaling_limit": 3.0,  # Max per-article render time at the largest size vs the smallest
+    # Optional "hedge" stage: mock LLM calls with injected slow responses, unhedged vs hedged
+    "hedge_calls": 400,
+    "hedge_concurrency": 8,
+    "hedge_mock": {"latency": 0.02, "latency_jitter": 0.01, "slow_rate": 0.03, "slow_latency": 0.5},
+    # Optional "email" stage: delivery to a local SMTP server that drops every Nth connection
+    "email": {"recipients": 2000, "pool_sizes": [1, 4, 8], "latency": 0.005, "drop_every": 250},
+}
+
+# Logging - pipeline progress goes through the "rss_feed_summarizer" logger. "format" is
+# "text" (human-readable, key=value fields) or "json" (one object per line for log shippers).
+# Override per run with: rss-summarizer run --quiet / --verbose / --log-format json
+LOGGING = {
+    "level": os.getenv("RSS_LOG_LEVEL", "INFO"),
+    "format": "text",
+    "item_interval": 2.0,  # Seconds between repeated per-article messages (the rest are counted)
+}
+
+# Run deadline - a total time budget per run, split across the LLM stages. A stage that
+# uses up its share (counted from the stage's start) or runs into the run deadline falls
+# back to local paths for its remaining items: keyword filter for relevance, keyword
+# categories, keyword ranking and the feed's own summary text. Override with: run --deadline
+DEADLINE = {
+    "enabled": False,
+    "budget_seconds": 900,
+    "shares": {
+        "relevance": 0.4,
+        "categorization": 0.15,
+        "rank_summarize": 0.35,
+        "macro_summary": 0.1,
+    },
+}
+
+# Dry-run estimate (rss-summarizer run --estimate) - prices, and the per-call completion
+# tokens and latency assumed for agents the last run's metrics report has no data for
+ESTIMATE = {
+    "prices": {  # USD per 1M tokens: (input, output) - check current provider pricing
+        "gpt-4": (30.00, 60.00),
+        "gpt-4-turbo": (10.00, 30.00),
+        "gpt-4o": (2.50, 10.00),
+        "gpt-4o-mini": (0.15, 0.60),
+        "gpt-3.5-turbo": (0.50, 1.50),
+    },
+    "completion_tokens": {  # Typical response length per call
+        "relevance": 60,
+        "relevance_fast": 70,
+        "categorization": 60,
+        "ranking": 40,
+        "micro_summary": 90,
+        "macro_summary": 250,
+    },
+    "latency": {  # Seconds per call by model
+        "gpt-4": 4.0,
+        "default": 1.5,
+    },
+    "relevant_fraction": 0.6,  # Share of uncached keyword-filtered articles expected to be relevant
+    "escalation_rate": 0.3,  # Share of fast relevance screenings expected to escalate (cascade only)
+}
+
+# Hedged LLM requests - when a call has not returned within the agent's observed latency
+# percentile, send a duplicate and use whichever answers first. Duplicates are capped at
+# max_extra_fraction of the agent's calls, so the extra spend stays bounded.
+HEDGING = {
+    "enabled": os.getenv("RSS_LLM_HEDGING", "").lower() in ("1", "true", "yes"),
+    "percentile": 95,  # Hedge calls slower than this percentile of recent latencies
+    "min_samples": 20,  # Latencies observed before hedging starts
+    "window": 200,  # Recent latencies kept per agent
+    "min_threshold": 0.5,  # Never hedge before this many seconds
+    "max_extra_fraction": 0.1,  # At most this many duplicates per call
+    "max_workers": 16,  # Threads for duplicate requests (no hedging while all are busy)
+}
+
+# Batch mode (rss-summarizer batch) - for weekly digests and backfills that don't need
+# interactive latency. Uncached relevance, categorization and micro summary requests go
+# through the OpenAI Batch API (lower price, no synchronous rate limits) and the results
+# are written to the agents' cache tables, so the next run finds them cached.
+BATCH = {
+    "dir": "output/batches",  # Request and result JSONL files, one folder per batch run
+    "stages": ["relevance", "categorization", "micro_summary"],  # micro_summary covers every relevant article
+    "completion_window": "24h",
+    "poll_interval": 60,  # Seconds between status checks
+    "max_wait_hours": 24,  # Cancel batches still running after this long (their requests are made by the next run)
+    "cancel_wait_minutes": 10,  # How long to wait for cancelled batches to stop (and return what they finished)
+    "max_requests_per_file": 50000,  # Batch API limit per input file
+    "local_processing_delay": 0.5,  # Mock backend: seconds the local batch server holds each batch
+}
+
 # Default model (kept for backward compatibility)
 OPENAI_MODEL = "gpt-3.5-turbo" 
\ No newline at end of file
@@ -0,0 +1,260 @@
+"""
+Content preparation for LLM prompts
+Converts feed HTML to clean text once and cuts it to a per-model token budget
+"""
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
+from . import config
+from .logging_utils import get_logger
+
+logger = get_logger("content_prep")
+
+# Tags that end a paragraph when the HTML is flattened to text
+BLOCK_TAGS = ["p", "div", "br", "li", "h1", "h2", "h3", "h4", "h5", "h6",
+              "blockquote", "pre", "tr", "section", "article", "figcaption"]
+
+# Words that make a paragraph worth keeping when the article has to be cut
+KEY_TERMS = {
+    keyword.lower()
+    for category in config.CATEGORIES.values()
+    for keyword in category["keywords"]
+} | {"announce", "release", "launch", "available", "introduce", "new", "benchmark", "open source"}
+
+_WHITESPACE = re.compile(r"[ \t\r\f\v]+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_WORD = re.compile(r"[a-z0-9][a-z0-9\-\.]+")
+_NUMBER = re.compile(r"\d")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def html_to_text(html: str) -> str:
+    """Convert article HTML to plain text with one blank line between paragraphs"""
+    if not html:
+        return ""
+    if "<" not in html and "&" not in html:
+        return "\n\n".join(split_paragraphs(html))
+
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript", "iframe", "svg"]):
+        tag.decompose()
+    for tag in soup.find_all(BLOCK_TAGS):
+        tag.append("\n\n")
+
+    return "\n\n".join(split_paragraphs(soup.get_text()))
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split text into whitespace-normalized, non-empty paragraphs"""
+    paragraphs = []
+    for block in _PARAGRAPH_BREAK.split(text):
+        paragraph = " ".join(_WHITESPACE.sub(" ", line).strip() for line in block.splitlines())
+        paragraph = paragraph.strip()
+        if paragraph:
+            paragraphs.append(paragraph)
+    return paragraphs
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """Get (and memoize) the tiktoken encoding for a model, or None if unavailable"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use, which fails on offline machines
+        logger.warning("tiktoken encoding unavailable (%s), estimating ~4 chars/token", str(e)[:80])
+        return None
+
+
+def count_tokens(text: str, model: str = None) -> int:
+    """Count tokens with the model's local tokenizer (or ~4 chars/token without tiktoken)"""
+    if not text:
+        return 0
+    encoding = _get_encoding(model or config.OPENAI_MODEL)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _token_offsets(text: str, max_tokens: int, model: str = None) -> List[int]:
+    """
+    Character offsets to cut text at into pieces of at most max_tokens tokens
+
+    Cuts are made in the text at token boundaries that start a character, instead of
+    decoding token slices (which turns a multi-byte character split across tokens
+    into U+FFFD), so no character is lost, repeated or pushes a piece over the limit.
+    Only a single character longer than max_tokens gets a piece of its own over it.
+    """
+    encoding = _get_encoding(model or config.OPENAI_MODEL)
+    if encoding is None:
+        return list(range(max_tokens * 4, len(text), max_tokens * 4))
+    tokens = encoding.encode(text, disallowed_special=())
+    _, offsets = encoding.decode_with_offsets(tokens)
+    # A token starting with a UTF-8 continuation byte starts inside a character
+    starts_char = [not 0x80 <= encoding.decode_single_token_bytes(token)[0] < 0xC0 for token in tokens]
+
+    cuts = []
+    start = 0
+    while start + max_tokens < len(tokens):
+        end = start + max_tokens
+        while end > start + 1 and not starts_char[end]:
+            end -= 1
+        while end < len(tokens) and not starts_char[end]:
+            end += 1
+        if end == len(tokens):
+            break
+        cuts.append(offsets[end])
+        start = end
+    return cuts
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = None) -> str:
+    """Hard-cut text to at most max_tokens tokens"""
+    if max_tokens <= 0:
+        return ""
+    cuts = _token_offsets(text, max_tokens, model)
+    return text[:cuts[0]] if cuts else text
+
+
+def split_tokens(text: str, max_tokens: int, model: str = None) -> List[str]:
+    """Hard-split text into pieces of at most max_tokens tokens, which together cover the text exactly"""
+    bounds = [0] + _token_offsets(text, max_tokens, model) + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def token_budget(model: str) -> int:
+    """Content token budget configured for a model"""
+    budgets = config.CONTENT_BUDGET.get("token_budgets", {})
+    return budgets.get(model, config.CONTENT_BUDGET.get("default_budget", 2000))
+
+
+def _paragraph_score(paragraph: str, title_words: set) -> float:
+    """Score how much a paragraph carries the article's key points"""
+    words = set(_WORD.findall(paragraph.lower()))
+    if not words:
+        return 0.0
+    score = 2 * len(words & title_words) + len(words & KEY_TERMS)
+    if _NUMBER.search(paragraph):
+        score += 1  # Figures, versions and dates tend to be the facts worth keeping
+    return score / (len(words) ** 0.5)
+
+
+def fit_to_budget(text: str, budget: int, model: str = None, title: str = "") -> str:
+    """
+    Cut text to a token budget using a lead-and-key-paragraphs strategy
+
+    The lead paragraphs are always kept (they usually state what's new), then the
+    remaining budget is filled with the paragraphs that best match the title and
+    the topic keywords. Kept paragraphs stay in their original order.
+    """
+    if count_tokens(text, model) <= budget:
+        return text
+
+    paragraphs = split_paragraphs(text)
+    token_counts = [count_tokens(paragraph, model) for paragraph in paragraphs]
+    lead_count = config.CONTENT_BUDGET.get("lead_paragraphs", 2)
+
+    selected = set()
+    used = 0
+    for i in range(min(lead_count, len(paragraphs))):
+        if used + token_counts[i] > budget:
+            break
+        selected.add(i)
+        used += token_counts[i]
+
+    if not selected:
+        # The first paragraph alone is over budget
+        return truncate_tokens(paragraphs[0], budget, model)
+
+    title_words = set(_WORD.findall(title.lower()))
+    candidates = sorted(
+        (i for i in range(len(paragraphs)) if i not in selected),
+        key=lambda i: _paragraph_score(paragraphs[i], title_words),
+        reverse=True
+    )
+    for i in candidates:
+        if used + token_counts[i] <= budget:
+            selected.add(i)
+            used += token_counts[i]
+
+    return "\n\n".join(paragraphs[i] for i in sorted(selected))
+
+
+def prepare_content(article: Dict[str, Any], model: str = None) -> Tuple[str, int, int]:
+    """
+    Prepare an article's content for a prompt
+
+    The cleaned text is stored on the article ('clean_content') so the HTML is only
+    parsed once per run, whichever agents use it.
+
+    Returns:
+        (prepared text, raw content tokens, prepared content tokens)
+    """
+    raw = article.get('content', article.get('summary', '')) or ''
+
+    if 'clean_content' not in article:
+        article['clean_content'] = html_to_text(raw)
+    text = article['clean_content']
+
+    raw_tokens = count_tokens(raw, model)
+    if config.CONTENT_BUDGET.get("enabled", True):
+        text = fit_to_budget(text, token_budget(model), model, article.get('title', ''))
+
+    return text, raw_tokens, count_tokens(text, model)
+
+
+def split_into_chunks(text: str, chunk_tokens: int, model: str = None) -> List[str]:
+    """
+    Split text into chunks of at most chunk_tokens tokens on paragraph boundaries
+
+    Paragraphs are packed greedily; a single paragraph over the limit is hard-split.
+    Chunk boundaries only depend on the text itself, so editing one section of an
+    article leaves the other chunks (and their cached summaries) unchanged.
+    """
+    chunks = []
+    current = []
+    used = 0
+
+    for paragraph in split_paragraphs(text):
+        tokens = count_tokens(paragraph, model)
+
+        if tokens > chunk_tokens:
+            if current:
+                chunks.append("\n\n".join(current))
+                current, used = [], 0
+            chunks.extend(split_tokens(paragraph, chunk_tokens, model))
+            continue
+
+        if used + tokens > chunk_tokens and current:
+            chunks.append("\n\n".join(current))
+            current, used = [], 0
+        current.append(paragraph)
+        used += tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+
+    return chunks
+
+
+def feed_summary_text(article: Dict[str, Any], max_sentences: int = 3, max_chars: int = 500) -> str:
+    """
+    The feed's own summary as plain text, cut to a few sentences
+
+    Used in place of a micro summary when the run is out of time.
+    """
+    text = " ".join(split_paragraphs(html_to_text(article.get('summary') or article.get('content', '') or '')))
+    sentences = _SENTENCE_END.split(text)
+    text = " ".join(sentences[:max_sentences])
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + "…"
+    return text
@@ -0,0 +1,109 @@
+"""
+Run deadline budget for the pipeline
+A run gets a total time budget, and each LLM stage gets a share of it. Once a stage
+has used its share (or the run is out of time), agents stop calling the LLM for
+that stage and use their local fallbacks for the remaining items. Every degraded
+item is recorded for the run report.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from . import metrics
+from .logging_utils import fingerprint, get_logger
+
+logger = get_logger("deadline")
+
+
+class RunBudget:
+    def __init__(self, budget_seconds: float, shares: Dict[str, float] = None):
+        """
+        Initialize a run's time budget
+
+        Args:
+            budget_seconds: Total seconds for the run, counted from now
+            shares: Fraction of the budget each stage may use, counted from the
+                stage's start (e.g. {"relevance": 0.4}); stages without a share
+                are only bound by the run deadline
+        """
+        self.budget_seconds = budget_seconds
+        self.shares = shares or {}
+        self.run_deadline = time.monotonic() + budget_seconds
+        self.stage_deadlines = {}
+        self._degraded = []
+        self._expired_stages = set()
+        self._lock = threading.Lock()
+
+    def start_stage(self, stage: str):
+        """Start a stage's clock (its deadline never extends past the run deadline)"""
+        deadline = self.run_deadline
+        if stage in self.shares:
+            deadline = min(deadline, time.monotonic() + self.shares[stage] * self.budget_seconds)
+        with self._lock:
+            self.stage_deadlines[stage] = deadline
+
+    def wrap(self, name: str, func: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+        """Wrap a stage function so its share of the budget starts when it does"""
+        def budgeted(results):
+            self.start_stage(name)
+            return func(results)
+        return budgeted
+
+    def remaining(self, stage: str) -> float:
+        """Seconds left for a stage (negative once it is over budget)"""
+        return self.stage_deadlines.get(stage, self.run_deadline) - time.monotonic()
+
+    def expired(self, stage: str) -> bool:
+        """Whether a stage has used up its share of the budget"""
+        if self.remaining(stage) > 0:
+            return False
+        with self._lock:
+            first = stage not in self._expired_stages
+            self._expired_stages.add(stage)
+        if first:
+            logger.warning("⏰ %s is out of its time budget - using local fallbacks for the remaining items",
+                           stage, extra={'stage': stage})
+        return True
+
+    def degrade(self, stage: str, item: Any, fallback: str):
+        """Record an item handled by a local fallback instead of the LLM"""
+        if isinstance(item, dict):
+            item.setdefault('degraded', []).append(stage)
+            entry = {'stage': stage, 'title': item.get('title', ''), 'article': fingerprint(item),
+                     'fallback': fallback}
+        else:
+            entry = {'stage': stage, 'title': str(item), 'fallback': fallback}
+        with self._lock:
+            self._degraded.append(entry)
+        metrics.inc("degraded_items_total", stage=stage)
+
+    def degraded(self) -> List[Dict[str, Any]]:
+        """Degraded items in the order they were recorded"""
+        with self._lock:
+            return list(self._degraded)
+
+
+_active: Optional[RunBudget] = None
+
+
+def start_budget(budget_seconds: float, shares: Dict[str, float] = None) -> RunBudget:
+    """Start the budget for this process's current run"""
+    global _active
+    _active = RunBudget(budget_seconds, shares)
+    return _active
+
+
+def end_budget():
+    """Stop enforcing the current run's budget"""
+    global _active
+    _active = None
+
+
+def expired(stage: str) -> bool:
+    """Whether a stage is out of time (always False when no budget is running)"""
+    return _active is not None and _active.expired(stage)
+
+
+def degrade(stage: str, item: Any, fallback: str):
+    """Record a degraded item on the current budget (no-op when no budget is running)"""
+    if _active is not None:
+        _active.degrade(stage, item, fallback)
@@ -1,21 +1,280 @@
 """
 Distributor for formatted article summaries
+Email goes through a SQLite outbox (one job per recipient and digest), so delivery
+survives crashes and reruns, and can be drained by a separate `rss-summarizer deliver` worker.
 """
+import hashlib
 import os
+import queue
 import smtplib
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from email import policy
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from datetime import datetime
-from typing import List, Dict, Any
-from . import config
+from functools import lru_cache
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from . import config, metrics
+from .logging_utils import ItemLogger, get_logger
 import re
 
-try:
-    import markdown
-    MARKDOWN_AVAILABLE = True
-except ImportError:
-    MARKDOWN_AVAILABLE = False
-    print("Warning: markdown module not found. Install with 'pip install markdown' to enable HTML conversion.")
+logger = get_logger("distributor")
+
+def _load_markdown():
+    """Import the markdown module on first HTML conversion (None if not installed)"""
+    try:
+        import markdown
+        return markdown
+    except ImportError:
+        logger.warning("markdown module not found. Install with 'pip install markdown' to enable HTML conversion.")
+        return None
+
+class DigestEmail:
+    def __init__(self, sender: str, subject: str, markdown_content: str, html_content: str):
+        """
+        The digest email, encoded once for every recipient
+
+        The MIME body (plain text and HTML parts) is built and serialized a single
+        time; each recipient only gets its own To header prepended.
+        """
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = sender
+        msg.attach(MIMEText(markdown_content, "plain"))
+        msg.attach(MIMEText(html_content, "html"))
+        
+        self.sender = sender
+        self.subject = subject
+        self.encoded = msg.as_bytes(policy=policy.SMTP)
+        # Same content -> same ID, so re-enqueueing a digest never duplicates its outbox jobs
+        content = "\0".join([sender, subject, markdown_content, html_content])
+        self.digest_id = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    
+    @classmethod
+    def from_encoded(cls, digest_id: str, sender: str, subject: str, encoded: bytes) -> "DigestEmail":
+        """Rebuild a digest stored in the outbox"""
+        digest = cls.__new__(cls)
+        digest.digest_id = digest_id
+        digest.sender = sender
+        digest.subject = subject
+        digest.encoded = encoded
+        return digest
+    
+    def for_recipient(self, recipient: str) -> bytes:
+        """The encoded message addressed to one recipient (UTF-8 To header for SMTPUTF8 addresses)"""
+        return f"To: {recipient}\r\n".encode("utf-8") + self.encoded
+    
+    @staticmethod
+    def mail_options(recipient: str) -> tuple:
+        """MAIL FROM options for a recipient: non-ASCII addresses need the server's SMTPUTF8 extension"""
+        return () if recipient.isascii() else ("SMTPUTF8",)
+
+class EmailOutbox:
+    def __init__(self, db_path: str = None, settings: Dict[str, Any] = None):
+        """
+        SQLite-backed outbox with one delivery job per recipient and digest
+        
+        Jobs move from pending to sending (claimed by a worker, with a lease) to sent
+        or failed. A failed send is retried with exponential backoff until max_attempts;
+        a job whose worker died is claimed again once its lease expires. Several workers
+        can drain the same outbox at once: each claim has its own owner token, and a
+        worker only sends and records jobs its claim still owns.
+        
+        Args:
+            db_path: Outbox database (default: DISTRIBUTION["email"]["outbox_db"])
+            settings: Email settings (default: DISTRIBUTION["email"])
+        """
+        settings = settings or config.DISTRIBUTION.get('email', {})
+        self.db_path = db_path or settings.get('outbox_db', "cache/outbox.db")
+        self.max_attempts = settings.get('max_attempts', 5)
+        self.attempt_backoff = settings.get('attempt_backoff', 60)
+        self.lease_seconds = settings.get('lease_seconds', 600)
+        
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")  # Workers read while others write
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox_digests
+        (digest_id TEXT PRIMARY KEY, sender TEXT, subject TEXT, message BLOB, timestamp TEXT)
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox_jobs
+        (digest_id TEXT, recipient TEXT, status TEXT, attempts INTEGER, next_attempt REAL,
+         last_error TEXT, timestamp TEXT, owner TEXT, PRIMARY KEY (digest_id, recipient))
+        """)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(outbox_jobs)")]
+        if "owner" not in columns:
+            conn.execute("ALTER TABLE outbox_jobs ADD COLUMN owner TEXT")  # Outboxes from before owner tokens
+        conn.execute("CREATE INDEX IF NOT EXISTS outbox_jobs_due ON outbox_jobs (status, next_attempt)")
+        conn.commit()
+        conn.close()
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+    
+    def enqueue(self, digest: DigestEmail, recipients: List[str]) -> int:
+        """
+        Add a job per recipient (recipients that already have a job for this digest are skipped)
+        
+        Returns:
+            Number of new jobs
+        """
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO outbox_digests VALUES (?, ?, ?, ?, ?)",
+                         (digest.digest_id, digest.sender, digest.subject, digest.encoded, now))
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO outbox_jobs (digest_id, recipient, status, attempts, next_attempt, "
+                             "timestamp) VALUES (?, ?, 'pending', 0, 0, ?)",
+                             [(digest.digest_id, recipient, now) for recipient in recipients])
+            added = conn.total_changes - before
+        conn.close()
+        return added
+    
+    def claim(self, limit: int = 500) -> Tuple[str, Dict[str, List[str]]]:
+        """
+        Lease due jobs to this worker: pending jobs past their retry time, and jobs
+        whose previous worker's lease expired
+        
+        Returns:
+            (owner token of this claim, {digest_id: [recipient, ...]})
+        """
+        owner = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            # BEGIN IMMEDIATE takes the write lock, so concurrent workers never claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT digest_id, recipient FROM outbox_jobs "
+                "WHERE status IN ('pending', 'sending') AND next_attempt <= ? "
+                "ORDER BY next_attempt LIMIT ?", (now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox_jobs SET status = 'sending', owner = ?, next_attempt = ?, timestamp = ? "
+                "WHERE digest_id = ? AND recipient = ?",
+                [(owner, now + self.lease_seconds, datetime.now().isoformat(), digest_id, recipient)
+                 for digest_id, recipient in rows]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        
+        claimed = {}
+        for digest_id, recipient in rows:
+            claimed.setdefault(digest_id, []).append(recipient)
+        return owner, claimed
+    
+    def renew(self, owner: str) -> int:
+        """
+        Extend the lease of a claim's jobs that are still being sent
+        
+        Returns:
+            Number of jobs the claim still owns
+        """
+        conn = self._connect()
+        with conn:
+            renewed = conn.execute("UPDATE outbox_jobs SET next_attempt = ? WHERE status = 'sending' AND owner = ?",
+                                   (time.time() + self.lease_seconds, owner)).rowcount
+        conn.close()
+        return renewed
+    
+    def start_send(self, digest_id: str, recipient: str, owner: str) -> bool:
+        """
+        Check that a claim still owns a job right before sending it, and extend its lease
+        
+        Returns:
+            False if the lease expired and another worker claimed the job (don't send)
+        """
+        conn = self._connect()
+        with conn:
+            owned = conn.execute("UPDATE outbox_jobs SET next_attempt = ? "
+                                 "WHERE digest_id = ? AND recipient = ? AND status = 'sending' AND owner = ?",
+                                 (time.time() + self.lease_seconds, digest_id, recipient, owner)).rowcount
+        conn.close()
+        return owned == 1
+    
+    def load_digest(self, digest_id: str) -> DigestEmail:
+        """The encoded digest for a job"""
+        conn = self._connect()
+        row = conn.execute("SELECT sender, subject, message FROM outbox_digests WHERE digest_id = ?",
+                           (digest_id,)).fetchone()
+        conn.close()
+        return DigestEmail.from_encoded(digest_id, *row)
+    
+    def mark_sent(self, digest_id: str, recipient: str, owner: str) -> bool:
+        """
+        Record a sent job (only while the claim still owns it)
+        
+        Returns:
+            False if another worker had taken the job over
+        """
+        conn = self._connect()
+        with conn:
+            updated = conn.execute("UPDATE outbox_jobs SET status = 'sent', owner = NULL, attempts = attempts + 1, "
+                                   "last_error = NULL, timestamp = ? "
+                                   "WHERE digest_id = ? AND recipient = ? AND status = 'sending' AND owner = ?",
+                                   (datetime.now().isoformat(), digest_id, recipient, owner)).rowcount
+        conn.close()
+        metrics.inc("emails_total", result="sent")
+        return updated == 1
+    
+    def mark_failed(self, digest_id: str, recipient: str, owner: str, error: Exception,
+                    retry: bool = True) -> Optional[str]:
+        """
+        Record a failed send: back to pending with backoff, or failed for good once
+        the attempts run out or the error is permanent
+        
+        Returns:
+            The job's new status, or None if another worker had taken the job over
+            (its row is left to that worker)
+        """
+        conn = self._connect()
+        with conn:
+            row = conn.execute("SELECT attempts FROM outbox_jobs "
+                               "WHERE digest_id = ? AND recipient = ? AND status = 'sending' AND owner = ?",
+                               (digest_id, recipient, owner)).fetchone()
+            status = None
+            if row is not None:
+                attempts = row[0] + 1
+                new_status = "pending" if retry and attempts < self.max_attempts else "failed"
+                next_attempt = time.time() + self.attempt_backoff * 2 ** (attempts - 1)
+                updated = conn.execute(
+                    "UPDATE outbox_jobs SET status = ?, owner = NULL, attempts = ?, next_attempt = ?, "
+                    "last_error = ?, timestamp = ? "
+                    "WHERE digest_id = ? AND recipient = ? AND status = 'sending' AND owner = ?",
+                    (new_status, attempts, next_attempt, str(error), datetime.now().isoformat(),
+                     digest_id, recipient, owner)
+                ).rowcount
+                if updated:
+                    status = new_status
+        conn.close()
+        if status is not None:
+            metrics.inc("emails_total", result="retry" if status == "pending" else "failed")
+        return status
+    
+    def counts(self, digest_id: str = None) -> Dict[str, int]:
+        """Jobs per status, for one digest or the whole outbox"""
+        conn = self._connect()
+        query = "SELECT status, COUNT(*) FROM outbox_jobs"
+        if digest_id:
+            rows = conn.execute(f"{query} WHERE digest_id = ? GROUP BY status", (digest_id,)).fetchall()
+        else:
+            rows = conn.execute(f"{query} GROUP BY status").fetchall()
+        conn.close()
+        return {status: 0 for status in ("pending", "sending", "sent", "failed")} | dict(rows)
 
 class MarkdownDistributor:
     def __init__(self, output_dir="output"):
@@ -35,6 +294,10 @@ class MarkdownDistributor:
         """
         Format articles into nice markdown optimized for email
         
+        The digest is collected as a list of fragments and joined once; each article's
+        block is rendered by _article_block, which caches it, so re-rendering the same
+        articles (e.g. an archive digest) reuses the cleaned text.
+        
         Args:
             articles: List of all summarized articles
             categorized: Dictionary of articles by category
@@ -43,112 +306,48 @@ class MarkdownDistributor:
         Returns:
             Formatted markdown string
         """
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        # Start with the header
-        markdown = f"# AI News Digest - {today}\n\n"
+        now = datetime.now()
+        parts = [f"# AI News Digest - {now.strftime('%Y-%m-%d')}\n\n"]
         
         # Add daily overview if provided (from Macro Summary Agent)
         if daily_overview:
-            markdown += f"## 📊 Daily Overview\n\n"
-            markdown += f"{daily_overview}\n\n"
+            parts.append(f"## 📊 Daily Overview\n\n{daily_overview}\n\n")
         
         # Add summary stats
-        markdown += f"## 📈 Summary\n"
-        markdown += f"*{len(articles)} articles from {len(set([a.get('source', 'Unknown') for a in articles]))} sources*\n\n"
-        
-        # Process special categories first
-        # Find Product Hunt tools (in AI_TOOLS category)
-        if "AI_TOOLS" in categorized and categorized["AI_TOOLS"]:
-            product_hunt_tools = [a for a in categorized["AI_TOOLS"] if "Product Hunt" in a.get('source', '')]
-            non_product_hunt = [a for a in categorized["AI_TOOLS"] if "Product Hunt" not in a.get('source', '')]
-            
-            # Get top 3 Product Hunt tools by score (if available)
-            top_tools = []
-            if product_hunt_tools:
-                # Sort by tool_score if available, otherwise by date
-                if 'tool_score' in product_hunt_tools[0]:
-                    sorted_tools = sorted(product_hunt_tools, key=lambda x: x.get('tool_score', 0), reverse=True)
-                    top_tools = sorted_tools[:3]
-                    
-                    # Add a special Product Hunt section for top tools
-                    emoji = "🔍"  # Special emoji for top tools
-                    markdown += f"## {emoji} Top Product Hunt Tools (3 of {len(product_hunt_tools)})\n\n"
-                    
-                    for i, article in enumerate(top_tools):
-                        title = article.get('title', 'No Title')
-                        link = article.get('link', '')
-                        summary = article.get('ai_summary', article.get('summary', 'No summary available'))
-                        source = article.get('source', 'Unknown Source')
-                        score = article.get('tool_score', 'N/A')
-                        reasoning = article.get('tool_reasoning', '')
-                        
-                        # Clean up summary text - remove HTML tags
-                        summary = self._clean_html(summary)
-                        
-                        # Bold title with link and ranking
-                        markdown += f"**#{i+1}: [{title}]({link})** (Score: {score}/10)\n\n"
-                        
-                        # Italicize source
-                        markdown += f"*Source: {source}*\n\n"
-                        
-                        # Add summary text
-                        markdown += f"{summary}\n\n"
-                        
-                        # Add reasoning if available
-                        if reasoning:
-                            markdown += f"*Why we picked it: {reasoning}*\n\n"
-                        
-                        # Add spacing between articles
-                        markdown += "\n"
+        sources = {a.get('source', 'Unknown') for a in articles}
+        parts.append(f"## 📈 Summary\n*{len(articles)} articles from {len(sources)} sources*\n\n")
+        
+        # Product Hunt tools (in AI_TOOLS) get their own top-3 section when they have scores
+        categorized = dict(categorized)
+        product_hunt_tools = [a for a in categorized.get("AI_TOOLS") or [] if "Product Hunt" in a.get('source', '')]
+        if product_hunt_tools and 'tool_score' in product_hunt_tools[0]:
+            top_tools = sorted(product_hunt_tools, key=lambda x: x.get('tool_score', 0), reverse=True)[:3]
+            parts.append(f"## 🔍 Top Product Hunt Tools (3 of {len(product_hunt_tools)})\n\n")
+            for i, article in enumerate(top_tools):
+                parts.append(f"**#{i+1}: [{article.get('title', 'No Title')}]({article.get('link', '')})** "
+                             f"(Score: {article.get('tool_score', 'N/A')}/10)\n\n")
+                parts.append(_article_body(article.get('source', 'Unknown Source'), _summary_text(article),
+                                           article.get('tool_reasoning', '')))
             
-            # Update the AI_TOOLS category to exclude the Product Hunt tools we've already covered
-            if top_tools:
-                top_tool_titles = [t.get('title') for t in top_tools]
-                categorized["AI_TOOLS"] = [a for a in categorized["AI_TOOLS"] 
-                                           if a.get('title') not in top_tool_titles]
+            # The AI_TOOLS section below skips the tools covered above
+            top_tool_titles = {t.get('title') for t in top_tools}
+            categorized["AI_TOOLS"] = [a for a in categorized["AI_TOOLS"] if a.get('title') not in top_tool_titles]
         
         # Add other categories with emoji from config
         for category, category_articles in categorized.items():
             if not category_articles:
                 continue
-                
-            # Get emoji for category
-            emoji = config.CATEGORIES.get(category, {}).get("emoji", "")
-            
-            # Sort by date if available
-            sorted_articles = sorted(
-                category_articles, 
-                key=lambda x: x.get('published', datetime.now()), 
-                reverse=True
-            )
             
-            # Make category headings larger and more prominent
-            markdown += f"## {emoji} {category.replace('_', ' ').title()} ({len(sorted_articles)})\n\n"
-            
-            # Add each article with improved formatting
-            for article in sorted_articles:
-                title = article.get('title', 'No Title')
-                link = article.get('link', '')
-                summary = article.get('ai_summary', article.get('summary', 'No summary available'))
-                source = article.get('source', 'Unknown Source')
-                
-                # Clean up summary text - remove HTML tags
-                summary = self._clean_html(summary)
-                
-                # Bold title with link
-                markdown += f"**[{title}]({link})**\n\n"
-                
-                # Italicize source
-                markdown += f"*Source: {source}*\n\n"
-                
-                # Add summary text
-                markdown += f"{summary}\n\n"
-                
-                # Add spacing between articles
-                markdown += "\n"
+            emoji = config.CATEGORIES.get(category, {}).get("emoji", "")
+            # Newest first; articles without a date count as published now
+            sorted_articles = sorted(category_articles, key=lambda x: x.get('published', now), reverse=True)
             
-        return markdown
+            parts.append(f"## {emoji} {category.replace('_', ' ').title()} ({len(sorted_articles)})\n\n")
+            parts.extend(_article_block(article.get('title', 'No Title'), article.get('link', ''),
+                                        article.get('source', 'Unknown Source'), _summary_text(article))
+                         for article in sorted_articles)
+        
+        return "".join(parts)
     
     def _clean_html(self, text: str) -> str:
         """
@@ -160,21 +359,7 @@ class MarkdownDistributor:
         Returns:
             Cleaned text
         """
-        # Replace common HTML tags with appropriate markdown
-        text = text.replace('<p>', '').replace('</p>', '\n\n')
-        text = text.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
-        text = text.replace('&nbsp;', ' ')
-        text = text.replace('&#8230;', '...')
-        text = text.replace('&#160;', ' ')
-        text = text.replace('&amp;', '&')
-        
-        # Remove any remaining HTML tags (simple approach)
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # Normalize multiple newlines
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        return text.strip()
+        return _clean_html(text)
     
     def save_markdown(self, markdown: str, filename=None) -> str:
         """
@@ -208,7 +393,8 @@ class MarkdownDistributor:
         Returns:
             HTML formatted text
         """
-        if not MARKDOWN_AVAILABLE:
+        markdown = _load_markdown()
+        if markdown is None:
             raise ImportError("markdown module not installed. Install with 'pip install markdown'")
         
         # Convert markdown to HTML with code syntax highlighting
@@ -256,7 +442,7 @@ class MarkdownDistributor:
         """
         email_config = config.DISTRIBUTION.get('email', {})
         if not email_config.get('enabled', False):
-            print("Email distribution not enabled in config.")
+            logger.info("Email distribution not enabled in config.")
             return False
         
         sender = email_config.get('sender', '')
@@ -271,72 +457,235 @@ class MarkdownDistributor:
         recipients = [email.strip() for email in recipients_str.split(',') if email.strip()]
         
         # Debug information
-        print("\n--- Email Configuration Debug ---")
-        print(f"Email enabled: {email_config.get('enabled')}")
-        print(f"Sender: {sender}")
-        print(f"Recipients: {len(recipients)} individual emails (maximum privacy)")
-        print(f"SMTP Server: {smtp_server}")
-        print(f"SMTP Port: {smtp_port}")
-        print(f"SMTP User: {smtp_user}")
-        print(f"SMTP Password: {'*' * (len(smtp_password) if smtp_password else 0)}")
+        logger.debug("--- Email Configuration Debug ---")
+        logger.debug("Email enabled: %s", email_config.get('enabled'))
+        logger.debug("Sender: %s", sender)
+        logger.debug("Recipients: %d individual emails (maximum privacy)", len(recipients))
+        logger.debug("SMTP Server: %s", smtp_server)
+        logger.debug("SMTP Port: %s", smtp_port)
+        logger.debug("SMTP User: %s", smtp_user)
+        logger.debug("SMTP Password: %s", '*' * (len(smtp_password) if smtp_password else 0))
         
         if not (sender and recipients and smtp_server and smtp_password):
-            print("Missing email configuration. Check config.py")
+            logger.error("❌ Missing email configuration. Check config.py")
             missing = []
             if not sender: missing.append("sender")
             if not recipients: missing.append("recipients")
             if not smtp_server: missing.append("smtp_server")
             if not smtp_password: missing.append("smtp_password")
-            print(f"Missing values: {', '.join(missing)}")
+            logger.error("❌ Missing values: %s", ', '.join(missing))
             return False
         
         try:
-            print(f"\nSending {len(recipients)} individual emails for maximum privacy...")
+            digest = DigestEmail(sender, subject, markdown_content, html_content)
+            outbox = EmailOutbox(settings=email_config)
+            added = outbox.enqueue(digest, recipients)
+            logger.info("📥 Queued %d of %d recipients in the outbox (%s)", added, len(recipients), outbox.db_path)
             
-            # Connect once and send individual emails
-            with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-                print(f"Connecting to {smtp_server}:{smtp_port} using SSL...")
-                print(f"Logging in as {smtp_user}...")
-                server.login(smtp_user, smtp_password)
-                
-                successful_sends = 0
-                failed_sends = 0
-                
-                # Send individual email to each recipient
-                for i, recipient in enumerate(recipients, 1):
-                    try:
-                        # Create individual message for each recipient
-                        msg = MIMEMultipart("alternative")
-                        msg["Subject"] = subject
-                        msg["From"] = sender
-                        msg["To"] = recipient
-                        
-                        # Attach plain text and HTML versions
-                        msg.attach(MIMEText(markdown_content, "plain"))
-                        msg.attach(MIMEText(html_content, "html"))
-                        
-                        # Send individual email
-                        server.sendmail(sender, [recipient], msg.as_string())
-                        print(f"  ✅ {i}/{len(recipients)}: Sent to {recipient}")
-                        successful_sends += 1
-                        
-                    except Exception as e:
-                        print(f"  ❌ {i}/{len(recipients)}: Failed to send to {recipient}: {str(e)}")
-                        failed_sends += 1
-                
-            print(f"\n📧 Email Summary:")
-            print(f"  • Successful: {successful_sends}")
-            print(f"  • Failed: {failed_sends}")
-            print(f"  • Total: {len(recipients)}")
+            if not email_config.get('deliver_in_run', True):
+                logger.info("📤 Delivery left to the outbox worker: rss-summarizer deliver")
+                return True
+            
+            logger.info("Sending %d individual emails for maximum privacy...", len(recipients))
+            stats = self.drain_outbox(outbox, email_config)
+            counts = outbox.counts(digest.digest_id)
+            
+            logger.info("📧 Email Summary:")
+            logger.info("  • Successful: %d", counts['sent'])
+            logger.info("  • Failed: %d", counts['failed'])
+            logger.info("  • Waiting for retry: %d", counts['pending'] + counts['sending'])
+            logger.info("  • Total: %d", len(recipients))
+            logger.info("  • Reconnects: %d, Time: %.1fs over %d connections", stats['reconnects'],
+                        stats['duration'], stats['connections'])
             
-            return successful_sends > 0
+            return counts['sent'] > 0
             
         except Exception as e:
-            print(f"Error with SMTP connection: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error("❌ Error with SMTP connection: %s", e, exc_info=True)
             return False
     
+    def _smtp_connect(self, email_config: Dict[str, Any]) -> smtplib.SMTP:
+        """Open and authenticate one SMTP connection"""
+        smtp_server = email_config.get('smtp_server', '')
+        smtp_port = email_config.get('smtp_port', 465)
+        security = email_config.get('smtp_security', 'ssl')
+        timeout = email_config.get('smtp_timeout', 30)
+        
+        logger.debug("Connecting to %s:%s (%s)...", smtp_server, smtp_port, security)
+        if security == "ssl":
+            server = smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=timeout)
+        else:
+            server = smtplib.SMTP(smtp_server, smtp_port, timeout=timeout)
+            if security == "starttls":
+                server.starttls()
+        
+        smtp_user = email_config.get('smtp_user') or email_config.get('sender', '')
+        smtp_password = email_config.get('smtp_password', '')
+        if smtp_password:
+            logger.debug("Logging in as %s...", smtp_user)
+            server.login(smtp_user, smtp_password)
+        return server
+    
+    def deliver_email(self, digest: DigestEmail, recipients: List[str], email_config: Dict[str, Any],
+                      on_result: Optional[Callable[[str, Optional[Exception]], None]] = None,
+                      before_send: Optional[Callable[[str], bool]] = None) -> Dict[str, Any]:
+        """
+        Send the email to each recipient over a pool of SMTP connections
+        
+        Each worker keeps one authenticated connection and takes recipients from a
+        shared queue. When a connection drops, the worker reconnects and resends to
+        the same recipient (up to max_retries times, with backoff); a recipient the
+        server rejects fails on its own without affecting the others.
+        
+        Args:
+            on_result: Called from the sending thread with (recipient, None) as soon as
+                a message is accepted, or (recipient, error) when it fails
+            before_send: Called from the sending thread right before a recipient is sent
+                to; returning False skips the recipient
+        
+        Returns:
+            Delivery stats: sent, failed, skipped, reconnects, connections, duration and
+            the failed recipients ({recipient: error})
+        """
+        pool_size = max(1, min(email_config.get('pool_size', 4), len(recipients)))
+        max_retries = email_config.get('max_retries', 3)
+        backoff = email_config.get('retry_backoff', 1.0)
+        
+        pending = queue.Queue()
+        for item in enumerate(recipients, 1):
+            pending.put(item)
+        
+        stats = {'sent': 0, 'failed': 0, 'skipped': 0, 'reconnects': 0, 'connections': 0, 'failures': {}}
+        lock = threading.Lock()
+        item_log = ItemLogger(logger)
+        
+        def count(key: str):
+            with lock:
+                stats[key] += 1
+        
+        def fail(index: int, recipient: str, error: Exception):
+            with lock:
+                stats['failed'] += 1
+                stats['failures'][recipient] = str(error)
+            if on_result is not None:
+                on_result(recipient, error)
+            item_log.warning("send_error", "  ❌ %d/%d: Failed to send: %s", index, len(recipients), error,
+                             stage="distribution", recipient=recipient)
+        
+        def worker():
+            server = None
+            try:
+                while True:
+                    try:
+                        index, recipient = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    if before_send is not None and not before_send(recipient):
+                        count('skipped')
+                        continue
+                    
+                    for attempt in range(max_retries + 1):
+                        try:
+                            if server is None:
+                                server = self._smtp_connect(email_config)
+                                count('connections')
+                            server.sendmail(digest.sender, [recipient], digest.for_recipient(recipient),
+                                            mail_options=digest.mail_options(recipient))
+                            count('sent')
+                            if on_result is not None:
+                                on_result(recipient, None)
+                            item_log.info("sent", "  ✅ %d/%d: Sent", index, len(recipients),
+                                          stage="distribution", recipient=recipient)
+                            break
+                        except smtplib.SMTPAuthenticationError:
+                            # Every connection would fail the same way - give the recipient back and stop
+                            pending.put((index, recipient))
+                            raise
+                        except (OSError, UnicodeError) as e:
+                            if not _connection_lost(e):
+                                # Recipient or message rejected - the connection is still usable
+                                fail(index, recipient, e)
+                                break
+                            # Connection lost: reconnect and resend to the same recipient
+                            server = _close_quietly(server)
+                            if attempt == max_retries:
+                                fail(index, recipient, e)
+                            else:
+                                count('reconnects')
+                                time.sleep(backoff * 2 ** attempt)
+            finally:
+                _close_quietly(server)
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="smtp") as executor:
+            futures = [executor.submit(worker) for _ in range(pool_size)]
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        
+        # Recipients left over because every worker stopped (e.g. authentication failed)
+        while not pending.empty():
+            index, recipient = pending.get_nowait()
+            fail(index, recipient, errors[0] if errors else RuntimeError("Not sent"))
+        
+        item_log.flush()
+        stats['duration'] = time.perf_counter() - start
+        if errors:
+            logger.error("❌ SMTP delivery stopped: %s", errors[0])
+        return stats
+    
+    def drain_outbox(self, outbox: EmailOutbox, email_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Deliver every due outbox job, recording each result as soon as it is known
+        
+        Jobs are claimed in batches, so other workers can drain the same outbox at the
+        same time. The claim's lease is renewed while its batch is being sent, and each
+        job is checked to still belong to the claim right before it is sent, so a job
+        another worker took over (after a stalled lease expired) is never mailed twice.
+        Failed jobs go back to pending with backoff (or fail for good once the server
+        rejects them permanently or their attempts run out).
+        
+        Returns:
+            Delivery stats: claimed, sent, retrying, failed, taken_over, reconnects,
+            connections, duration
+        """
+        totals = {'claimed': 0, 'sent': 0, 'retrying': 0, 'failed': 0, 'taken_over': 0, 'reconnects': 0,
+                  'connections': 0, 'duration': 0.0}
+        lock = threading.Lock()
+        
+        while True:
+            owner, claimed = outbox.claim(email_config.get('claim_size', 500))
+            if not claimed:
+                return totals
+            
+            done = threading.Event()
+            renewer = threading.Thread(target=_renew_lease, args=(outbox, owner, done),
+                                       name="outbox-lease", daemon=True)
+            renewer.start()
+            try:
+                for digest_id, recipients in claimed.items():
+                    digest = outbox.load_digest(digest_id)
+                    
+                    def record(recipient: str, error: Optional[Exception]):
+                        if error is None:
+                            if not outbox.mark_sent(digest_id, recipient, owner):
+                                logger.warning("Outbox job for %s was taken over while it was being sent",
+                                               recipient, extra={'stage': "distribution", 'recipient': recipient})
+                            key = 'sent'
+                        else:
+                            status = outbox.mark_failed(digest_id, recipient, owner, error, retry=_retryable(error))
+                            key = {'pending': 'retrying', 'failed': 'failed', None: 'taken_over'}[status]
+                        with lock:
+                            totals[key] += 1
+                    
+                    stats = self.deliver_email(digest, recipients, email_config, on_result=record,
+                                               before_send=lambda recipient: outbox.start_send(digest_id, recipient, owner))
+                    totals['claimed'] += len(recipients)
+                    totals['taken_over'] += stats['skipped']
+                    for key in ('reconnects', 'connections', 'duration'):
+                        totals[key] += stats[key]
+            finally:
+                done.set()
+                renewer.join()
+    
     def distribute(self, articles: List[Dict[str, Any]], 
                    categorized: Dict[str, List[Dict[str, Any]]], 
                    daily_overview: str = None) -> str:
@@ -356,33 +705,133 @@ class MarkdownDistributor:
         
         # Save to file
         filepath = self.save_markdown(markdown_content)
-        print(f"Markdown digest saved to {filepath}")
+        logger.info("Markdown digest saved to %s", filepath)
         
         # Email distribution if enabled
         email_config = config.DISTRIBUTION.get('email', {})
         if email_config.get('enabled', False):
             try:
-                print("\n--- Starting Email Distribution ---")
+                logger.info("--- Starting Email Distribution ---")
                 
                 # Convert markdown to HTML
                 html_content = self.markdown_to_html(markdown_content)
                 
                 # Send using standard SMTP
-                print("Using standard SMTP for email distribution...")
+                logger.info("Using standard SMTP for email distribution...")
                 success = self.send_email_smtp(markdown_content, html_content)
                 
                 if not success:
-                    print("Failed to send email. Check the error messages above.")
+                    logger.error("❌ Failed to send email. Check the error messages above.")
                     
             except Exception as e:
-                print(f"Error during email distribution: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.error("❌ Error during email distribution: %s", e, exc_info=True)
         else:
-            print("\nEmail distribution is disabled in config.")
+            logger.info("Email distribution is disabled in config.")
         
         return filepath
 
+# Paragraph and line breaks become newlines and every other tag is dropped (patterns start
+# with a literal so the regex engine can skip ahead to candidate matches)
+_TAG_PATTERN = re.compile(r"</p>|<br ?/?>|<[^>]+>")
+_TAG_REPLACEMENTS = {'</p>': '\n\n', '<br>': '\n', '<br/>': '\n', '<br />': '\n'}
+# Only entities that are not markup are decoded - &lt; and &gt; stay escaped, so text like
+# "vector&lt;int&gt;" is neither stripped as a tag nor passed to the HTML email as one
+_ENTITY_PATTERN = re.compile(r"&(?:nbsp|#8230|#160|amp);")
+_ENTITY_REPLACEMENTS = {'&nbsp;': ' ', '&#8230;': '...', '&#160;': ' ', '&amp;': '&'}
+_BLANK_LINES_PATTERN = re.compile(r"\n\n\n+")
+
+@lru_cache(maxsize=32768)
+def _clean_html(text: str) -> str:
+    """Decode plain-text entities, turn paragraph and line breaks into newlines and drop other tags (cached per text)"""
+    if '&' in text:
+        text = _ENTITY_PATTERN.sub(lambda match: _ENTITY_REPLACEMENTS[match.group(0)], text)
+    text = _TAG_PATTERN.sub(lambda match: _TAG_REPLACEMENTS.get(match.group(0), ''), text)
+    return _BLANK_LINES_PATTERN.sub('\n\n', text).strip()
+
+def _summary_text(article: Dict[str, Any]) -> str:
+    return article.get('ai_summary', article.get('summary', 'No summary available'))
+
+def _article_body(source: str, summary: str, reasoning: str = '') -> str:
+    """Source line, cleaned summary and optional pick reasoning of a digest entry"""
+    body = f"*Source: {source}*\n\n{_clean_html(summary)}\n\n"
+    if reasoning:
+        body += f"*Why we picked it: {reasoning}*\n\n"
+    return body + "\n"
+
+@lru_cache(maxsize=32768)
+def _article_block(title: str, link: str, source: str, summary: str) -> str:
+    """One article's digest entry (cached, so unchanged articles are not re-rendered)"""
+    return f"**[{title}]({link})**\n\n{_article_body(source, summary)}"
+
+def _renew_lease(outbox: EmailOutbox, owner: str, done: threading.Event):
+    """Keep a claim's jobs leased until its batch is done (three renewals per lease)"""
+    while not done.wait(outbox.lease_seconds / 3):
+        outbox.renew(owner)
+
+def _connection_lost(error: Exception) -> bool:
+    """Whether an SMTP error means the connection is gone (as opposed to a rejected recipient)"""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421  # Service closing transmission channel
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+def _retryable(error: Exception) -> bool:
+    """Whether a failed send is worth retrying later (temporary 4xx replies, lost connections, bad logins)"""
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return True  # Fixed by correcting the credentials, not by dropping the recipient
+    if isinstance(error, (UnicodeError, smtplib.SMTPNotSupportedError)):
+        return False  # An address the server can't take (e.g. no SMTPUTF8) won't work on a retry either
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return True
+
+def _close_quietly(server):
+    """Close an SMTP connection, ignoring errors from a connection that is already gone. Returns None"""
+    if server is not None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+    return None
+
+def deliver_outbox(watch: bool = False, poll_interval: float = None) -> bool:
+    """
+    Drain the email outbox (rss-summarizer deliver)
+    
+    Args:
+        watch: Keep polling for new and retryable jobs until interrupted
+        poll_interval: Seconds between polls in watch mode (default: DISTRIBUTION["email"]["poll_interval"])
+    
+    Returns:
+        True if no job has failed for good
+    """
+    email_config = config.DISTRIBUTION.get('email', {})
+    outbox = EmailOutbox(settings=email_config)
+    distributor = MarkdownDistributor()
+    poll_interval = poll_interval or email_config.get('poll_interval', 30)
+    logger.info("📤 Delivering from the outbox (%s)...", outbox.db_path)
+    
+    try:
+        while True:
+            stats = distributor.drain_outbox(outbox, email_config)
+            if stats['claimed']:
+                logger.info("📧 Delivered %d of %d jobs (%d waiting for retry, %d failed, %d taken over by another "
+                            "worker) in %.1fs", stats['sent'], stats['claimed'], stats['retrying'], stats['failed'],
+                            stats['taken_over'], stats['duration'])
+            if not watch:
+                break
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        logger.info("Stopping the outbox worker")
+    
+    counts = outbox.counts()
+    logger.info("📬 Outbox: %d sent, %d pending, %d in progress, %d failed",
+                counts['sent'], counts['pending'], counts['sending'], counts['failed'])
+    return counts['failed'] == 0
+
 def use_distributor(articles, categorized, daily_overview=None):
     """
     Use the distributor to format and save articles
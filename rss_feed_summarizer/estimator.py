@@ -0,0 +1,457 @@
+"""
+Dry-run cost and latency estimate for a pipeline run
+Fetches and keyword-filters for real, then works out the LLM calls each agent would
+make after bulk cache lookups, counts their prompt tokens with the local tokenizer,
+and projects tokens, dollars and wall time at the configured concurrency.
+No LLM calls are made.
+"""
+import glob
+import hashlib
+import heapq
+import json
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from . import config
+from .cache_utils import bulk_lookup
+from .content_prep import count_tokens, prepare_content, split_into_chunks, token_budget
+from .keyword_filter import assign_category, filter_articles, score_relevance
+from .llm_backends import get_backend
+from .logging_utils import ensure_logging
+
+# Agents are built with this key, so a call made by mistake fails instead of being billed
+PLACEHOLDER_API_KEY = "sk-estimate-only"
+
+# Tokens each chat message adds on top of its content (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Order of the agents in the report
+AGENT_ORDER = ("relevance_fast", "relevance", "categorization", "ranking", "micro_summary", "macro_summary")
+
+
+def prompt_tokens(prompt, model: str, **values) -> int:
+    """Tokens of a chat prompt template filled with values"""
+    return sum(count_tokens(message.content, model) + MESSAGE_OVERHEAD_TOKENS
+               for message in prompt.format_messages(**values))
+
+
+def load_observed_calls(metrics_dir: str, backend: str) -> Dict[str, Dict[str, float]]:
+    """
+    Per-agent average latency and completion tokens from the newest run report
+
+    Only reports written with the same LLM backend are used, so mock latencies
+    never stand in for real ones.
+
+    Returns:
+        {agent: {'latency': seconds per call, 'completion_tokens': tokens per call}}
+    """
+    reports = sorted(glob.glob(os.path.join(metrics_dir, "run-*.json")), key=os.path.getmtime)
+    if not reports:
+        return {}
+    try:
+        with open(reports[-1], "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if report.get('llm_backend') != backend:
+        return {}
+
+    run_metrics = report.get('metrics', {})
+    observed = {}
+    for series in run_metrics.get('llm_latency_seconds', []):
+        if series.get('count'):
+            observed.setdefault(series['agent'], {})['latency'] = series['sum'] / series['count']
+
+    calls = {series['agent']: series['value'] for series in run_metrics.get('llm_calls_total', [])
+             if series.get('outcome') == "ok"}
+    for series in run_metrics.get('llm_tokens_total', []):
+        agent = series['agent']
+        if series.get('kind') == "completion" and calls.get(agent):
+            observed.setdefault(agent, {})['completion_tokens'] = series['value'] / calls[agent]
+    return observed
+
+
+class RunEstimator:
+    def __init__(self, settings: Dict[str, Any] = None, observed: Dict[str, Dict[str, float]] = None):
+        """
+        Initialize the estimator
+
+        Args:
+            settings: Prices and per-call assumptions (default: config.ESTIMATE)
+            observed: Per-agent latency/completion tokens (default: from the newest run report)
+        """
+        from .relevance import RelevanceAgent
+        from .categorization import CategorizationAgent
+        from .ranking import RankingAgent
+        from .summaries import MicroSummaryAgent
+        from .overall_summary import MacroSummaryAgent
+
+        self.settings = settings or config.ESTIMATE
+        self.backend = get_backend()
+        if observed is None:
+            observed = load_observed_calls(config.METRICS.get("dir", "output/metrics"), self.backend)
+        self.observed = observed
+
+        # Agents supply the real prompt templates, cache keys and cache databases
+        self.relevance = RelevanceAgent(api_key=PLACEHOLDER_API_KEY)
+        self.categorization = CategorizationAgent(api_key=PLACEHOLDER_API_KEY)
+        self.ranking = RankingAgent(api_key=PLACEHOLDER_API_KEY)
+        self.micro_summary = MicroSummaryAgent(api_key=PLACEHOLDER_API_KEY)
+        self.macro_summary = MacroSummaryAgent(api_key=PLACEHOLDER_API_KEY)
+
+        self.usage = {}
+
+    def _latency(self, agent: str, model: str) -> float:
+        if 'latency' in self.observed.get(agent, {}):
+            return self.observed[agent]['latency']
+        latency = self.settings.get("latency", {})
+        return latency.get(model, latency.get("default", 1.5))
+
+    def _completion_tokens(self, agent: str) -> float:
+        if 'completion_tokens' in self.observed.get(agent, {}):
+            return self.observed[agent]['completion_tokens']
+        return self.settings.get("completion_tokens", {}).get(agent, 100)
+
+    def _record(self, agent: str, model: str, tokens: int = 0, cached: bool = False, weight: float = 1.0) -> float:
+        """Count one call (or a cache hit) for an agent. Returns the call's expected seconds"""
+        usage = self.usage.setdefault(agent, {
+            'model': model, 'calls': 0.0, 'cached': 0, 'prompt_tokens': 0.0, 'completion_tokens': 0.0,
+        })
+        if cached:
+            usage['cached'] += 1
+            return 0.0
+        usage['calls'] += weight
+        usage['prompt_tokens'] += tokens * weight
+        usage['completion_tokens'] += self._completion_tokens(agent) * weight
+        return self._latency(agent, model) * weight
+
+    def estimate_relevance(self, articles: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], float]:
+        """Expected relevant articles and the stage's seconds (articles are evaluated one by one)"""
+        agent = self.relevance
+        inputs = []
+        for article in articles:
+            title = article.get('title', '')
+            summary = article.get('summary', article.get('content', ''))[:500]
+            inputs.append((agent._get_cache_key(title, summary), title, summary, article.get('source', 'Unknown')))
+        keys = [cache_key for cache_key, _, _, _ in inputs]
+
+        decisions = {key: bool(row[0]) for key, row in
+                     bulk_lookup(agent.cache_db, "article_relevance", keys, ["is_relevant"]).items()}
+        fast_cached = {}
+        if agent.cascade_enabled:
+            rows = bulk_lookup(agent.cache_db, "article_relevance_fast", keys, ["model", "is_relevant", "confidence"])
+            for key, (model, is_relevant, confidence) in rows.items():
+                if model != agent.fast_model:
+                    continue
+                fast_cached[key] = True
+                if key not in decisions and confidence is not None and confidence >= agent.confidence_threshold:
+                    decisions[key] = bool(is_relevant)
+
+        seconds = 0.0
+        uncached = []
+        escalation_rate = self.settings.get("escalation_rate", 0.3)
+        for index, (cache_key, title, summary, source) in enumerate(inputs):
+            if cache_key in decisions:
+                self._record("relevance", agent.model, cached=True)
+                continue
+            uncached.append(index)
+            tokens = prompt_tokens(agent.relevance_prompt, agent.model, title=title, source=source, summary=summary)
+            if not agent.cascade_enabled:
+                seconds += self._record("relevance", agent.model, tokens)
+            elif cache_key in fast_cached:
+                # Cached low-confidence screening - escalates without another fast call
+                seconds += self._record("relevance", agent.model, tokens)
+            else:
+                fast_tokens = prompt_tokens(agent.fast_relevance_prompt, agent.fast_model,
+                                            title=title, source=source, summary=summary)
+                seconds += self._record("relevance_fast", agent.fast_model, fast_tokens)
+                seconds += self._record("relevance", agent.model, tokens, weight=escalation_rate)
+
+        # Uncached articles: the best keyword matches stand in for the ones the model will keep
+        expected = round(len(uncached) * self.settings.get("relevant_fraction", 0.6))
+        kept = set(sorted(uncached, key=lambda i: score_relevance(articles[i]), reverse=True)[:expected])
+        relevant = [article for index, (article, (cache_key, _, _, _)) in enumerate(zip(articles, inputs))
+                    if decisions.get(cache_key) or index in kept]
+        return relevant, seconds
+
+    def estimate_categorization(self, articles: List[Dict[str, Any]]) -> Tuple[Dict[str, List[Dict[str, Any]]], float]:
+        """Expected articles per category and the stage's seconds"""
+        agent = self.categorization
+        inputs = []
+        for article in articles:
+            title = article.get('title', '')
+            summary = article.get('summary', article.get('content', ''))[:500]
+            inputs.append((agent._get_cache_key(title, summary), title, summary))
+        cached = bulk_lookup(agent.cache_db, "article_categories", [key for key, _, _ in inputs], ["category"])
+
+        seconds = 0.0
+        by_category = {}
+        for article, (cache_key, title, summary) in zip(articles, inputs):
+            if cache_key in cached:
+                self._record("categorization", agent.model, cached=True)
+                category = cached[cache_key][0]
+            else:
+                tokens = prompt_tokens(agent.categorization_prompt, agent.model, title=title, summary=summary)
+                seconds += self._record("categorization", agent.model, tokens)
+                category = assign_category(article)  # Keyword category stands in for the model's
+            by_category.setdefault(category, []).append(article)
+        return by_category, seconds
+
+    def estimate_macro_summary(self, relevant: List[Dict[str, Any]],
+                               by_category: Dict[str, List[Dict[str, Any]]]) -> float:
+        """Seconds for the daily overview in the configured MACRO_SUMMARY mode"""
+        agent = self.macro_summary
+        if config.MACRO_SUMMARY.get("mode", "articles") != "micro_summaries":
+            combined_articles, cache_key = agent._overview_input(relevant)
+            if bulk_lookup(agent.cache_db, "macro_summaries", [cache_key], ["summary"]):
+                return self._record("macro_summary", agent.model, cached=True)
+            tokens = prompt_tokens(agent.macro_summary_prompt, agent.model, articles=combined_articles)
+            return self._record("macro_summary", agent.model, tokens)
+
+        # Partials are keyed by the (not yet written) micro summaries, so they count as misses
+        summary_tokens = self._completion_tokens("micro_summary")
+        partial_seconds = []
+        for category, articles in by_category.items():
+            titles = "\n".join(f"- {a.get('title', 'No Title')} ({a.get('source', 'Unknown')}): " for a in articles)
+            tokens = (prompt_tokens(agent.category_overview_prompt, agent.model, category=category, articles=titles)
+                      + summary_tokens * min(len(articles), 5))
+            partial_seconds.append(self._record("macro_summary", agent.model, tokens))
+        reduce_tokens = (prompt_tokens(agent.reduce_overview_prompt, agent.model, themes="")
+                         + self._completion_tokens("macro_summary") * len(by_category))
+        workers = config.CONCURRENCY.get("categories", 4)
+        return _makespan(partial_seconds, workers) + self._record("macro_summary", agent.model, reduce_tokens)
+
+    def _estimate_ranking(self, articles: List[Dict[str, Any]], max_articles: int) -> Tuple[List[Dict[str, Any]], float]:
+        """Expected top articles of one category and the seconds to rank them"""
+        agent = self.ranking
+        # Keyword order stands in for the model's ranking
+        by_keywords = sorted(articles, key=lambda a: (a.get('match_score', 0), score_relevance(a)), reverse=True)
+
+        if agent.mode == "pointwise":
+            inputs = []
+            for article in articles:
+                title = article.get('title', 'No Title')
+                summary = article.get('summary', article.get('content', ''))[:200]
+                inputs.append((agent._get_cache_key(title, summary), title, summary, article.get('source', 'Unknown')))
+            cached = bulk_lookup(agent.cache_db, "article_rank_scores", [key for key, _, _, _ in inputs], ["score"])
+            seconds = 0.0
+            for cache_key, title, summary, source in inputs:
+                if cache_key in cached:
+                    self._record("ranking", agent.model, cached=True)
+                else:
+                    tokens = prompt_tokens(agent.scoring_prompt, agent.model, title=title, source=source, summary=summary)
+                    seconds += self._record("ranking", agent.model, tokens)
+            return by_keywords[:max_articles], seconds
+
+        if agent.mode != "tournament":
+            tokens = prompt_tokens(agent.ranking_prompt, agent.model, articles=agent._ranking_input(articles))
+            return by_keywords[:max_articles], self._record("ranking", agent.model, tokens)
+
+        chunk_size = max(agent.chunk_size, 2 * max_articles)
+        candidates = by_keywords
+        seconds = 0.0
+        while len(candidates) > chunk_size:
+            chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+            round_seconds = [
+                self._record("ranking", agent.model,
+                             prompt_tokens(agent.ranking_prompt, agent.model, articles=agent._ranking_input(chunk)))
+                for chunk in chunks
+            ]
+            seconds += _makespan(round_seconds, agent.max_workers)
+            candidates = [article for chunk in chunks for article in chunk[:max_articles]]
+        tokens = prompt_tokens(agent.ranking_prompt, agent.model, articles=agent._ranking_input(candidates))
+        return candidates[:max_articles], seconds + self._record("ranking", agent.model, tokens)
+
+    def _estimate_summaries(self, articles: List[Dict[str, Any]]) -> float:
+        """Seconds to summarize one category's articles (one after another)"""
+        agent = self.micro_summary
+        keys = [agent._get_cache_key(f"{a.get('title', '')}:{a.get('content', a.get('summary', ''))}")
+                for a in articles]
+        cached = bulk_lookup(agent.cache_db, "micro_summaries", keys, ["summary"])
+
+        seconds = 0.0
+        for article, cache_key in zip(articles, keys):
+            if cache_key in cached:
+                self._record("micro_summary", agent.model, cached=True)
+                continue
+
+            # Work on a copy: preparation stores the cleaned text on the article
+            article = dict(article)
+            title = article.get('title', '')
+            source = article.get('source', 'Unknown')
+            prepared_content, _, _ = prepare_content(article, agent.model)
+            clean_content = article['clean_content']
+
+            if agent.long_document_enabled and count_tokens(clean_content, agent.model) > token_budget(agent.model):
+                chunks = split_into_chunks(clean_content, agent.chunk_tokens, agent.model)
+                chunk_keys = [hashlib.md5(f"chunk_summary:{chunk}".encode()).hexdigest() for chunk in chunks]
+                cached_chunks = bulk_lookup(agent.cache_db, "chunk_summaries", chunk_keys, ["summary"])
+                chunk_seconds = []
+                for index, (chunk, chunk_key) in enumerate(zip(chunks, chunk_keys), 1):
+                    if chunk_key in cached_chunks:
+                        self._record("micro_summary", agent.model, cached=True)
+                        continue
+                    tokens = prompt_tokens(agent.chunk_summary_prompt, agent.model, title=title, source=source,
+                                           index=index, total=len(chunks), content=chunk)
+                    chunk_seconds.append(self._record("micro_summary", agent.model, tokens))
+                reduce_tokens = (prompt_tokens(agent.reduce_summary_prompt, agent.model,
+                                               title=title, source=source, sections="")
+                                 + self._completion_tokens("micro_summary") * len(chunks))
+                seconds += (_makespan(chunk_seconds, agent.chunk_workers)
+                            + self._record("micro_summary", agent.model, reduce_tokens))
+            else:
+                tokens = prompt_tokens(agent.micro_summary_prompt, agent.model,
+                                       title=title, source=source, content=prepared_content)
+                seconds += self._record("micro_summary", agent.model, tokens)
+        return seconds
+
+    def estimate_rank_summarize(self, by_category: Dict[str, List[Dict[str, Any]]],
+                                max_articles: int = 5) -> float:
+        """Seconds to rank and summarize all categories on the configured category workers"""
+        category_seconds = []
+        for articles in by_category.values():
+            seconds = 0.0
+            if len(articles) > max_articles:
+                articles, seconds = self._estimate_ranking(articles, max_articles)
+            category_seconds.append(seconds + self._estimate_summaries(articles))
+        return _makespan(category_seconds, config.CONCURRENCY.get("categories", 4))
+
+    def estimate(self, fetched: List[Dict[str, Any]], fetch_seconds: float) -> Dict[str, Any]:
+        """
+        Estimate a run over already fetched articles
+
+        Returns:
+            {'articles': counts per stage, 'agents': per-agent calls/tokens/cost,
+             'stages': seconds per stage, 'wall_time', 'critical_path', 'total_cost', ...}
+        """
+        self.usage = {}
+        start = time.perf_counter()
+        keyword_filtered = filter_articles(fetched)
+        durations = {'fetch': fetch_seconds, 'keyword_filter': time.perf_counter() - start}
+
+        relevant, durations['relevance'] = self.estimate_relevance(keyword_filtered)
+        by_category, durations['categorization'] = self.estimate_categorization(relevant)
+        durations['rank_summarize'] = self.estimate_rank_summarize(by_category)
+        durations['macro_summary'] = self.estimate_macro_summary(relevant, by_category)
+        durations['distribute'] = 0.0
+
+        agents = {}
+        for agent in sorted(self.usage, key=lambda name: AGENT_ORDER.index(name) if name in AGENT_ORDER else 99):
+            usage = dict(self.usage[agent])
+            usage['cost'] = self._cost(usage)
+            agents[agent] = usage
+
+        wall_time, critical_path = _critical_path(durations)
+        return {
+            'backend': self.backend,
+            'articles': {
+                'fetched': len(fetched),
+                'keyword_filtered': len(keyword_filtered),
+                'relevant': len(relevant),
+                'categories': len(by_category),
+            },
+            'agents': agents,
+            'stages': durations,
+            'wall_time': wall_time,
+            'critical_path': critical_path,
+            'total_cost': sum(usage['cost'] for usage in agents.values() if not math.isnan(usage['cost'])),
+            'unpriced_models': sorted({usage['model'] for usage in agents.values() if math.isnan(usage['cost'])}),
+            'observed_agents': sorted(self.observed),
+        }
+
+    def _cost(self, usage: Dict[str, Any]) -> float:
+        if self.backend == "mock":
+            return 0.0
+        prices = self.settings.get("prices", {})
+        if usage['model'] not in prices:
+            return float('nan')
+        input_price, output_price = prices[usage['model']]
+        return (usage['prompt_tokens'] * input_price + usage['completion_tokens'] * output_price) / 1_000_000
+
+
+def _makespan(durations: List[float], workers: int) -> float:
+    """Finish time of tasks started in order on a fixed number of workers"""
+    if not durations:
+        return 0.0
+    free_at = [0.0] * max(1, min(workers, len(durations)))
+    for duration in durations:
+        heapq.heappush(free_at, heapq.heappop(free_at) + duration)
+    return max(free_at)
+
+
+def _critical_path(durations: Dict[str, float]) -> Tuple[float, List[str]]:
+    """Wall time and critical path of the pipeline DAG (see pipeline.build_stages)"""
+    from .pipeline import build_stages
+
+    stages = {stage.name: stage for stage in build_stages()}
+    finish, previous = {}, {}
+
+    def finish_time(name):
+        if name not in finish:
+            deps = stages[name].deps
+            previous[name] = max(deps, key=finish_time) if deps else None
+            finish[name] = (finish_time(previous[name]) if deps else 0.0) + durations.get(name, 0.0)
+        return finish[name]
+
+    last = max(reversed(list(stages)), key=finish_time)  # Ties go to the later stage (distribute)
+    path = []
+    while last is not None:
+        path.append(last)
+        last = previous[last]
+    return finish_time(path[0]), list(reversed(path))
+
+
+def print_estimate(estimate: Dict[str, Any]):
+    """Print projected calls, tokens, dollars and wall time"""
+    articles = estimate['articles']
+    print(f"\n🧮 Run Estimate ({estimate['backend']} backend, no LLM calls made):")
+    print(f"   • Articles: {articles['fetched']} fetched → {articles['keyword_filtered']} keyword filtered "
+          f"→ ~{articles['relevant']} relevant in {articles['categories']} categories")
+
+    print(f"\n   {'agent':<16} {'model':<16} {'calls':>7} {'cached':>7} {'prompt tok':>11} "
+          f"{'compl. tok':>11} {'cost':>10}")
+    totals = {'calls': 0.0, 'cached': 0, 'prompt_tokens': 0.0, 'completion_tokens': 0.0}
+    for agent, usage in estimate['agents'].items():
+        for key in totals:
+            totals[key] += usage[key]
+        cost = "unpriced" if math.isnan(usage['cost']) else f"${usage['cost']:.4f}"
+        print(f"   {agent:<16} {usage['model']:<16} {usage['calls']:>7.0f} {usage['cached']:>7} "
+              f"{usage['prompt_tokens']:>11,.0f} {usage['completion_tokens']:>11,.0f} {cost:>10}")
+    total_cost = estimate['total_cost']
+    print(f"   {'total':<16} {'':<16} {totals['calls']:>7.0f} {totals['cached']:>7} "
+          f"{totals['prompt_tokens']:>11,.0f} {totals['completion_tokens']:>11,.0f} "
+          f"{'$' + format(total_cost, '.4f'):>10}")
+
+    print("\n⏱️ Projected Stage Times:")
+    for name, seconds in estimate['stages'].items():
+        print(f"   • {name}: {seconds:.1f}s")
+    print(f"   • Critical path: {' → '.join(estimate['critical_path'])}")
+    print(f"   • Projected wall time: {estimate['wall_time']:.1f}s "
+          f"(categories: {config.CONCURRENCY.get('categories', 4)} workers)")
+
+    if estimate['observed_agents']:
+        print(f"ℹ️  Latency and response length from the last run for: {', '.join(estimate['observed_agents'])}")
+    else:
+        print("ℹ️  Latency and response length from config.ESTIMATE (no matching run report yet)")
+    if estimate['unpriced_models']:
+        print(f"⚠️ No price in config.ESTIMATE['prices'] for {', '.join(estimate['unpriced_models'])} "
+              f"- left out of the total")
+
+
+def run_estimate(time_window_hours: Optional[int] = None) -> Dict[str, Any]:
+    """Fetch, keyword-filter and print the estimate for a run. Returns the estimate"""
+    from .fetcher import RSSFetcher
+
+    ensure_logging()
+    start = time.perf_counter()
+    fetched = RSSFetcher(time_window_hours=time_window_hours).fetch_articles()
+    fetch_seconds = time.perf_counter() - start
+
+    estimate = RunEstimator().estimate(fetched, fetch_seconds)
+    print_estimate(estimate)
+    return estimate
+
+
+if __name__ == "__main__":
+    run_estimate()
@@ -1,19 +1,21 @@
 """
 Article fetcher for RSS feeds
 """
-import feedparser
 from datetime import datetime, timedelta
 import time
 from typing import List, Dict, Any
 from . import config
-from dateutil import parser
-import requests
+from . import metrics
+from .logging_utils import ItemLogger, get_logger
+
+logger = get_logger("fetcher")
 
 class RSSFetcher:
-    def __init__(self, feeds: List[str] = None, time_window_hours: int = None):
+    def __init__(self, feeds: List[str] = None, time_window_hours: int = None, request_delay: float = 0.5):
         # Use configured feeds and time window or provided values
         self.feeds = feeds or config.RSS_FEEDS
         self.time_window = time_window_hours or config.TIME_WINDOW
+        self.request_delay = request_delay  # Seconds between feed requests (0 for local fixtures)
         
         # Set user agent and headers for polite scraping
         self.headers = {
@@ -25,7 +27,13 @@ class RSSFetcher:
         """
         Fetch articles from all configured RSS feeds within the specified time window
         """
+        # Imported on first fetch so non-fetching commands start fast
+        import feedparser
+        import requests
+        from dateutil import parser
+        
         all_articles = []
+        item_log = ItemLogger(logger)
         # Calculate cutoff time for article freshness
         cutoff_time = datetime.now() - timedelta(hours=self.time_window)
         
@@ -33,12 +41,19 @@ class RSSFetcher:
         for feed_url in self.feeds:
             try:
                 # Rate limiting to be polite to servers
-                time.sleep(0.5)
+                if self.request_delay:
+                    time.sleep(self.request_delay)
                 
                 # Fetch feed content with proper headers
+                started = time.perf_counter()
+                feed_articles = 0
                 response = requests.get(feed_url, headers=self.headers, timeout=15)
+                metrics.set_gauge("fetch_http_status", response.status_code, feed=feed_url)
+                metrics.inc("fetch_bytes_total", len(response.content), feed=feed_url)
                 if response.status_code != 200:
-                    print(f"Error fetching {feed_url}: HTTP status {response.status_code}")
+                    item_log.warning("feed_error", "Error fetching feed: HTTP status %s",
+                                     response.status_code, stage="fetch", feed=feed_url)
+                    metrics.set_gauge("fetch_duration_seconds", time.perf_counter() - started, feed=feed_url)
                     continue
                 
                 # Parse the feed and extract source name
@@ -81,11 +96,21 @@ class RSSFetcher:
                         article['content'] = article['summary']
                     
                     all_articles.append(article)
+                    feed_articles += 1
+                
+                duration = time.perf_counter() - started
+                metrics.inc("fetch_articles_total", feed_articles, feed=feed_url)
+                metrics.set_gauge("fetch_duration_seconds", duration, feed=feed_url)
+                item_log.debug("feed_fetched", "Fetched %d articles (%d bytes)", feed_articles, len(response.content),
+                               stage="fetch", feed=feed_url, duration=f"{duration:.2f}s")
             
             except Exception as e:
-                print(f"Error fetching from {feed_url}: {str(e)}")
+                item_log.warning("feed_error", "Error fetching feed: %s", e, stage="fetch", feed=feed_url)
+                if not metrics.get_value("fetch_http_status", feed=feed_url):
+                    metrics.set_gauge("fetch_http_status", 0, feed=feed_url)
         
-        print(f"Fetched {len(all_articles)} articles")
+        item_log.flush()
+        logger.info("Fetched %d articles from %d feeds", len(all_articles), len(self.feeds), extra={'stage': "fetch"})
         return all_articles
 
 if __name__ == "__main__":
@@ -0,0 +1,272 @@
+"""
+Hedged LLM requests
+A chat model wrapper that sends a duplicate request when a call has not returned
+within the agent's observed p95 latency, and uses whichever response arrives first.
+Duplicates are capped at a fraction of all calls, so the extra spend is bounded, and
+are skipped while every thread of the (duplicates only) hedge pool is busy.
+Enabled with HEDGING["enabled"]; llm_backends.create_chat_model() applies it.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from pydantic import PrivateAttr
+from . import config, metrics
+from .metrics import percentile
+
+_executor = None
+_executor_slots = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """
+    Shared pool for duplicate requests, with one slot per thread
+
+    Returns:
+        (executor, slots); a duplicate is only submitted with a slot, so it never
+        waits in the pool's queue behind other agents' duplicates
+    """
+    global _executor, _executor_slots
+    with _executor_lock:
+        if _executor is None:
+            max_workers = config.HEDGING.get("max_workers", 16)
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+            _executor_slots = threading.BoundedSemaphore(max_workers)
+        return _executor, _executor_slots
+
+
+class HedgeTracker:
+    def __init__(self, settings: Dict[str, Any] = None):
+        """
+        Latency window and hedge budget for one agent
+
+        Args:
+            settings: Hedging settings (default: config.HEDGING)
+        """
+        settings = settings or config.HEDGING
+        self.percentile = settings.get("percentile", 95)
+        self.min_samples = settings.get("min_samples", 20)
+        self.min_threshold = settings.get("min_threshold", 0.5)
+        self.max_extra_fraction = settings.get("max_extra_fraction", 0.1)
+        self.window = deque(maxlen=settings.get("window", 200))
+        self.calls = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.hedges_skipped = 0
+        self.primary_latencies = []
+        self.delivered_latencies = []
+        self._lock = threading.Lock()
+
+    def threshold(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None until enough latencies are observed"""
+        with self._lock:
+            if len(self.window) < self.min_samples:
+                return None
+            return max(self.min_threshold, percentile(list(self.window), self.percentile))
+
+    def start_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def can_hedge(self) -> bool:
+        """Whether the extra-spend cap allows another duplicate request"""
+        with self._lock:
+            return self.hedges + 1 <= self.calls * self.max_extra_fraction
+
+    def try_hedge(self) -> bool:
+        """Reserve a duplicate request if the extra-spend cap allows it"""
+        with self._lock:
+            if self.hedges + 1 > self.calls * self.max_extra_fraction:
+                return False
+            self.hedges += 1
+            return True
+
+    def record_skipped(self):
+        """A call over the threshold that was not hedged because the hedge pool was busy"""
+        with self._lock:
+            self.hedges_skipped += 1
+
+    def record_primary(self, seconds: float):
+        """Latency of the original request (what the caller would have waited without hedging)"""
+        with self._lock:
+            self.window.append(seconds)
+            self.primary_latencies.append(seconds)
+
+    def record_delivered(self, seconds: float, hedge_won: bool = False):
+        """Latency the caller actually waited"""
+        with self._lock:
+            self.delivered_latencies.append(seconds)
+            if hedge_won:
+                self.hedges_won += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Calls, hedges and p99 latency with and without hedging"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'hedges': self.hedges,
+                'hedges_won': self.hedges_won,
+                'hedges_skipped': self.hedges_skipped,
+                'extra_call_rate': self.hedges / self.calls if self.calls else 0.0,
+                'p99_unhedged': percentile(self.primary_latencies, 99),
+                'p99_hedged': percentile(self.delivered_latencies, 99),
+            }
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(agent: str) -> HedgeTracker:
+    """The process-wide hedge tracker for an agent"""
+    with _trackers_lock:
+        if agent not in _trackers:
+            _trackers[agent] = HedgeTracker()
+        return _trackers[agent]
+
+
+def reset_hedge_stats():
+    """Clear per-run counters (the latency windows that set the thresholds are kept)"""
+    with _trackers_lock:
+        for tracker in _trackers.values():
+            with tracker._lock:
+                tracker.calls = tracker.hedges = tracker.hedges_won = tracker.hedges_skipped = 0
+                tracker.primary_latencies = []
+                tracker.delivered_latencies = []
+
+
+def reset_hedging():
+    """Drop all trackers and the hedge pool (new ones pick up the current HEDGING settings)"""
+    global _executor, _executor_slots
+    with _trackers_lock:
+        _trackers.clear()
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = _executor_slots = None
+
+
+def get_hedge_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-agent hedging stats for agents that made calls"""
+    with _trackers_lock:
+        trackers = dict(_trackers)
+    return {agent: tracker.get_stats() for agent, tracker in trackers.items() if tracker.calls}
+
+
+def _usage_tokens(result: ChatResult) -> int:
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    return usage.get("total_tokens") or usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+
+
+class HedgedChatModel(BaseChatModel):
+    """Wraps a chat model and hedges slow calls with a duplicate request"""
+
+    inner: BaseChatModel
+    agent: str
+
+    _tracker: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any):
+        self._tracker = get_tracker(self.agent)
+
+    @property
+    def _llm_type(self) -> str:
+        # Same type and parameters as the wrapped model, so LLM cache entries are shared
+        return self.inner._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def _call_inner(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> ChatResult:
+        return self.inner._generate(messages, stop=stop, **kwargs)
+
+    def _call_primary(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> ChatResult:
+        """The original request, timed from when it starts running"""
+        start = time.perf_counter()
+        try:
+            return self._call_inner(messages, stop, kwargs)
+        finally:
+            self._tracker.record_primary(time.perf_counter() - start)
+
+    def _start_primary(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> Future:
+        """Run the original request on its own thread right away, so it never queues behind other calls"""
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self._call_primary(messages, stop, kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"llm-primary-{self.agent}", daemon=True).start()
+        return future
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        tracker = self._tracker
+        tracker.start_call()
+        threshold = tracker.threshold()
+        start = time.perf_counter()
+
+        if threshold is None or not tracker.can_hedge():
+            # No duplicate possible: call on the caller's thread
+            result = self._call_primary(messages, stop, kwargs)
+            tracker.record_delivered(time.perf_counter() - start)
+            return result
+
+        primary = self._start_primary(messages, stop, kwargs)
+        done, _ = wait([primary], timeout=threshold)
+        if not done:
+            hedge = self._submit_hedge(messages, stop, kwargs)
+            if hedge is not None:
+                return self._first_result(primary, hedge, start)
+
+        result = primary.result()
+        tracker.record_delivered(time.perf_counter() - start)
+        return result
+
+    def _submit_hedge(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> Optional[Future]:
+        """Send the duplicate request, or None if the hedge pool is busy or the extra-spend cap is reached"""
+        executor, slots = _get_executor()
+        if not slots.acquire(blocking=False):
+            # A duplicate queued behind others would only arrive later than the primary
+            self._tracker.record_skipped()
+            metrics.inc("llm_hedges_skipped_total", agent=self.agent)
+            return None
+        if not self._tracker.try_hedge():
+            slots.release()
+            return None
+        hedge = executor.submit(self._call_inner, messages, stop, kwargs)
+        hedge.add_done_callback(lambda _: slots.release())
+        return hedge
+
+    def _first_result(self, primary, hedge, start: float) -> ChatResult:
+        """Return the first successful response; the other one is counted as extra spend"""
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                hedge_won = future is hedge
+                tracker = self._tracker
+                tracker.record_delivered(time.perf_counter() - start, hedge_won=hedge_won)
+                metrics.inc("llm_hedges_total", agent=self.agent, result="won" if hedge_won else "lost")
+                loser = primary if hedge_won else hedge
+                loser.add_done_callback(self._record_extra_tokens)
+                return future.result()
+        raise error
+
+    def _record_extra_tokens(self, future):
+        if future.exception() is None:
+            tokens = _usage_tokens(future.result())
+            if tokens:
+                metrics.inc("llm_hedge_tokens_total", tokens, agent=self.agent)
@@ -4,6 +4,9 @@ Article filter for RSS feeds
 from typing import List, Dict, Any
 from datetime import datetime
 from . import config
+from .logging_utils import get_logger
+
+logger = get_logger("keyword_filter")
 
 # Import categories from config
 CATEGORIES = config.CATEGORIES
@@ -51,7 +54,8 @@ def filter_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # Sort by match score - let LLM relevance filtering decide final count
     filtered_articles.sort(key=lambda x: x.get('match_score', 0), reverse=True)
     
-    print(f"\nFiltered from {len(articles)} to {len(filtered_articles)} articles based on keywords")
+    logger.info("Filtered from %d to %d articles based on keywords", len(articles), len(filtered_articles),
+                extra={'stage': "keyword_filter"})
     return filtered_articles
 
 def assign_category(article: Dict[str, Any]) -> str:
@@ -157,7 +161,7 @@ def categorize_articles(articles: List[Dict[str, Any]]) -> Dict[str, List[Dict[s
 
     for category, articles_list in categorized.items():
         if articles_list:
-            print(f"Category {category}: {len(articles_list)} articles")
+            logger.info("Category %s: %d articles", category, len(articles_list))
 
     return categorized
 
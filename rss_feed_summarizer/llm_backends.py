@@ -0,0 +1,93 @@
+"""
+LLM backend selection
+Agents build their chat models through create_chat_model(), so the OpenAI API can be
+swapped for the deterministic local stand-in in mock_llm.py with one setting
+"""
+import os
+from typing import Any, Dict
+from . import config
+
+BACKENDS = ("openai", "mock")
+
+
+def get_backend() -> str:
+    """Name of the configured LLM backend"""
+    backend = (config.LLM_BACKEND or "openai").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}'. Available: {', '.join(BACKENDS)}")
+    return backend
+
+
+def set_backend(backend: str):
+    """Switch the LLM backend for this process (agents built afterwards use it)"""
+    config.LLM_BACKEND = backend
+    get_backend()
+
+
+def requires_api_key() -> bool:
+    """Check whether the configured backend needs an OpenAI API key"""
+    return get_backend() != "mock"
+
+
+def get_cache_dir() -> str:
+    """Cache directory for the configured backend - mock responses never share the real cache"""
+    if get_backend() == "mock":
+        return config.MOCK_LLM.get("cache_dir", os.path.join("cache", "mock"))
+    return "cache"
+
+
+def create_chat_model(model: str, temperature: float, api_key: str = None,
+                      request_timeout: int = 30, model_kwargs: Dict[str, Any] = None, agent: str = None):
+    """
+    Create a LangChain chat model for the configured backend
+
+    Args:
+        model: Model name (e.g. "gpt-3.5-turbo"); the mock reports it but ignores it otherwise
+        temperature: Sampling temperature
+        api_key: OpenAI API key (not needed for the mock backend)
+        request_timeout: Request timeout in seconds
+        model_kwargs: Extra provider arguments (e.g. JSON mode)
+        agent: Agent name - calls, latency and tokens are recorded under it (see metrics.py)
+
+    Returns:
+        A chat model usable in `prompt | llm` chains (wrapped in HedgedChatModel
+        when HEDGING is enabled)
+    """
+    from .llm_metrics import LLMMetricsCallback
+
+    callbacks = [LLMMetricsCallback(agent or model)]
+    hedged = config.HEDGING.get("enabled", False)
+
+    if get_backend() == "mock":
+        from .mock_llm import MockChatModel
+
+        mock = config.MOCK_LLM
+        llm = MockChatModel(
+            model_name=model,
+            latency=mock.get("latency", 0.0),
+            latency_jitter=mock.get("latency_jitter", 0.0),
+            error_rate=mock.get("error_rate", 0.0),
+            slow_rate=mock.get("slow_rate", 0.0),
+            slow_latency=mock.get("slow_latency", 0.0),
+            prefix_cache_min_tokens=mock.get("prefix_cache_min_tokens", 1024),
+            seed=mock.get("seed", 42),
+            callbacks=None if hedged else callbacks,
+        )
+    else:
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(
+            model_name=model,
+            openai_api_key=api_key,
+            temperature=temperature,
+            request_timeout=request_timeout,
+            model_kwargs=model_kwargs or {},
+            callbacks=None if hedged else callbacks
+        )
+
+    if hedged:
+        from .hedging import HedgedChatModel
+
+        # Callbacks go on the wrapper, so a hedged call is recorded once
+        return HedgedChatModel(inner=llm, agent=agent or model, callbacks=callbacks)
+    return llm
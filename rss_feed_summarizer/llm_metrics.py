@@ -0,0 +1,75 @@
+"""
+LangChain callback that records LLM call metrics
+Attached to every chat model built by llm_backends.create_chat_model(), so call
+counts, latency and token usage are recorded per agent without touching call sites
+"""
+import threading
+import time
+from typing import Any, Dict
+from langchain_core.callbacks import BaseCallbackHandler
+from . import metrics
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    def __init__(self, agent: str):
+        """
+        Args:
+            agent: Agent name used as the metrics label (e.g. "relevance")
+        """
+        self.agent = agent
+        self._started: Dict[Any, float] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def _elapsed(self, run_id) -> float:
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        elapsed = self._elapsed(run_id)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+
+        # Responses served from LangChain's LLM cache carry no provider output
+        outcome = "ok" if response.llm_output else "llm_cache"
+        metrics.inc("llm_calls_total", agent=self.agent, outcome=outcome)
+        if outcome == "ok":
+            metrics.observe("llm_latency_seconds", elapsed, agent=self.agent)
+
+        for kind in ("prompt", "completion"):
+            tokens = usage.get(f"{kind}_tokens")
+            if tokens:
+                metrics.inc("llm_tokens_total", tokens, agent=self.agent, kind=kind)
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+        if cached:
+            metrics.inc("llm_tokens_total", cached, agent=self.agent, kind="cached")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        elapsed = self._elapsed(run_id)
+        metrics.inc("llm_calls_total", agent=self.agent, outcome="error")
+        metrics.observe("llm_latency_seconds", elapsed, agent=self.agent)
+
+
+def get_prompt_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-agent prompt tokens and how many of them the provider served from its prefix cache"""
+    tokens = {}
+    for series in metrics.get_registry().to_dict().get("llm_tokens_total", []):
+        if series['kind'] in ("prompt", "cached"):
+            tokens.setdefault(series['agent'], {'prompt': 0, 'cached': 0})[series['kind']] += series['value']
+    return {
+        agent: {
+            'prompt_tokens': int(counts['prompt']),
+            'cached_tokens': int(counts['cached']),
+            'cached_ratio': round(counts['cached'] / counts['prompt'], 3) if counts['prompt'] else 0.0,
+        }
+        for agent, counts in sorted(tokens.items())
+    }
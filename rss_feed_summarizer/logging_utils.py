@@ -0,0 +1,153 @@
+"""
+Leveled, structured logging for the pipeline
+All modules log through the "rss_feed_summarizer" logger. Structured fields (stage,
+agent, article fingerprint, feed, recipient, duration) are passed as `extra` and
+rendered as key=value pairs (or JSON). Per-item messages in hot loops go through
+ItemLogger, which rate-limits them and reports how many were suppressed.
+"""
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+from . import config
+
+LOGGER_NAME = "rss_feed_summarizer"
+
+# Structured fields rendered after the message when present on a record
+FIELDS = ("stage", "agent", "article", "feed", "recipient", "duration")
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for a module, e.g. get_logger("relevance")"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def fingerprint(article: Dict[str, Any]) -> str:
+    """Short stable ID for an article in log fields (hash of link, or title)"""
+    key = article.get('link') or article.get('title', '')
+    return hashlib.md5(key.encode()).hexdigest()[:10]
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if record.levelno >= logging.WARNING and not message.startswith(("⚠️", "❌")):
+            message = f"{record.levelname}: {message}"
+        fields = [f"{name}={getattr(record, name)}" for name in FIELDS if hasattr(record, name)]
+        if fields:
+            message = f"{message}  [{' '.join(fields)}]"
+        if record.exc_info:
+            message = f"{message}\n{self.formatException(record.exc_info)}"
+        return message
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for name in FIELDS:
+            if hasattr(record, name):
+                entry[name] = getattr(record, name)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: Optional[str] = None, quiet: bool = False, json_format: Optional[bool] = None):
+    """
+    Install the package log handler (replacing any previous one)
+
+    Args:
+        level: Log level name (default: LOGGING["level"])
+        quiet: Only show warnings and errors
+        json_format: One JSON object per line instead of text (default: LOGGING["format"] == "json")
+    """
+    settings = config.LOGGING
+    level = "WARNING" if quiet else (level or settings.get("level", "INFO"))
+    if json_format is None:
+        json_format = settings.get("format", "text") == "json"
+
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(_JsonFormatter() if json_format else _TextFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    logger.propagate = False
+
+
+def ensure_logging():
+    """Configure logging with the defaults unless the caller already did"""
+    if not logging.getLogger(LOGGER_NAME).handlers:
+        configure_logging()
+
+
+class ItemLogger:
+    def __init__(self, logger: logging.Logger, interval: float = None):
+        """
+        Rate-limited logging for per-item messages in hot loops
+
+        Each message key (e.g. "relevance_decision") is logged at most once per `interval`
+        seconds; the next line that gets through reports how many were suppressed.
+        Warnings and errors are never suppressed, so every per-item failure stays visible.
+        Nothing is formatted when the level is disabled.
+
+        Args:
+            logger: Logger to write to
+            interval: Minimum seconds between lines with the same key (default: LOGGING["item_interval"])
+        """
+        self.logger = logger
+        self.interval = config.LOGGING.get("item_interval", 2.0) if interval is None else interval
+        self.counts = {}
+        self._last = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def log(self, level: int, key: str, msg: str, *args, **fields):
+        """Log a per-item message under a rate-limit key; fields become structured fields"""
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            if not self.logger.isEnabledFor(level):
+                return
+            suppressed = 0
+            if level < logging.WARNING:
+                now = time.monotonic()
+                last = self._last.get(key)
+                if last is not None and now - last < self.interval:
+                    count, suppressed_level = self._suppressed.get(key, (0, level))
+                    self._suppressed[key] = (count + 1, max(level, suppressed_level))
+                    return
+                self._last[key] = now
+                suppressed, _ = self._suppressed.pop(key, (0, level))
+
+        if suppressed:
+            msg = f"{msg} (+%d similar suppressed)"
+            args = args + (suppressed,)
+        self.logger.log(level, msg, *args, extra=fields)
+
+    def debug(self, key: str, msg: str, *args, **fields):
+        self.log(logging.DEBUG, key, msg, *args, **fields)
+
+    def info(self, key: str, msg: str, *args, **fields):
+        self.log(logging.INFO, key, msg, *args, **fields)
+
+    def warning(self, key: str, msg: str, *args, **fields):
+        self.log(logging.WARNING, key, msg, *args, **fields)
+
+    def flush(self):
+        """Report messages still suppressed at the end of a loop"""
+        with self._lock:
+            suppressed, self._suppressed = self._suppressed, {}
+        for key, (count, level) in suppressed.items():
+            # Reported at the level of the messages it stands for
+            self.logger.log(level, "%d more '%s' messages from %s suppressed (%d total)", count, key,
+                            self.logger.name.rsplit(".", 1)[-1], self.counts.get(key, 0))
@@ -0,0 +1,226 @@
+"""
+Run metrics for the pipeline
+A small process-wide registry of counters, gauges and histograms that the fetcher,
+agents and pipeline record into. Each run is exported as a Prometheus textfile
+(for node_exporter's textfile collector) and as a JSON run report.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+PREFIX = "rss_summarizer_"
+
+# Histogram buckets (seconds)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Metric name -> (type, help text)
+DEFINITIONS = {
+    "run_success": ("gauge", "1 if the last run completed, 0 if it failed or stopped early"),
+    "run_duration_seconds": ("gauge", "Wall time of the last run"),
+    "run_timestamp_seconds": ("gauge", "Unix time the last run finished"),
+    "stage_duration_seconds": ("gauge", "Wall time of each pipeline stage"),
+    "stage_items_in": ("gauge", "Items passed into each pipeline stage"),
+    "stage_items_out": ("gauge", "Items produced by each pipeline stage"),
+    "llm_calls_total": ("counter", "LLM calls per agent and outcome"),
+    "llm_latency_seconds": ("histogram", "LLM call latency per agent"),
+    "llm_tokens_total": ("counter", "LLM tokens per agent and kind (prompt, completion, cached)"),
+    "cache_lookups_total": ("counter", "Agent cache lookups per agent and result (hit, miss)"),
+    "cache_hit_ratio": ("gauge", "Agent cache hit ratio for the run"),
+    "fetch_bytes_total": ("counter", "Bytes downloaded per feed"),
+    "fetch_articles_total": ("counter", "Articles parsed per feed"),
+    "fetch_http_status": ("gauge", "Last HTTP status per feed (0 = request failed)"),
+    "fetch_duration_seconds": ("gauge", "Download and parse time per feed"),
+    "llm_hedges_total": ("counter", "Duplicate (hedged) LLM requests per agent and result (won, lost)"),
+    "llm_hedge_tokens_total": ("counter", "Tokens spent on the losing side of hedged LLM requests"),
+    "llm_hedges_skipped_total": ("counter", "Slow LLM requests not hedged because every hedge thread was busy"),
+    "emails_total": ("counter", "Outbox email sends per result (sent, retry, failed)"),
+    "degraded_items_total": ("counter", "Items handled by a local fallback because a stage ran out of its time budget"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs ending with +Inf"""
+        total = 0
+        for bound, count in zip(list(self.buckets) + [float("inf")], self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._values = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels: Dict[str, Any]) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._values.setdefault(name, {})[self._key(labels)] = value
+
+    def observe(self, name: str, value: float, buckets=LATENCY_BUCKETS, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(buckets)
+            series[key].observe(value)
+
+    def get(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._values.get(name, {}).get(self._key(labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+            self._histograms.clear()
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name in sorted(set(self._values) | set(self._histograms)):
+                metric_type, help_text = DEFINITIONS.get(name, ("gauge", name))
+                full_name = PREFIX + name
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {metric_type}")
+                for key, value in sorted(self._values.get(name, {}).items()):
+                    lines.append(f"{full_name}{_labels(key)} {_number(value)}")
+                for key, histogram in sorted(self._histograms.get(name, {}).items()):
+                    for bound, count in histogram.cumulative():
+                        le = "+Inf" if bound == float("inf") else _number(bound)
+                        lines.append(f"{full_name}_bucket{_labels(key + (('le', le),))} {count}")
+                    lines.append(f"{full_name}_sum{_labels(key)} {_number(histogram.sum)}")
+                    lines.append(f"{full_name}_count{_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """All metrics as JSON-friendly data ({name: [{labels..., value}]})"""
+        data = {}
+        with self._lock:
+            for name, series in self._values.items():
+                data[name] = [dict(key, value=value) for key, value in sorted(series.items())]
+            for name, series in self._histograms.items():
+                data[name] = [
+                    dict(key, count=histogram.count, sum=round(histogram.sum, 6),
+                         buckets={("+Inf" if bound == float("inf") else str(bound)): count
+                                  for bound, count in histogram.cumulative()})
+                    for key, histogram in sorted(series.items())
+                ]
+        return data
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentile with linear interpolation (pct in 0-100)"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _write_atomic(path: str, text: str):
+    """Write via a temp file so collectors never read a half-written file"""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+_registry = MetricsRegistry()
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Increment a counter"""
+    _registry.inc(name, value, **labels)
+
+
+def set_gauge(name: str, value: float, **labels):
+    """Set a gauge"""
+    _registry.set(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    """Record a value in a latency histogram"""
+    _registry.observe(name, value, **labels)
+
+
+def get_value(name: str, **labels) -> float:
+    """Current value of a counter or gauge (0 if never recorded)"""
+    return _registry.get(name, **labels)
+
+
+def reset_metrics():
+    """Clear all metrics (called at the start of each run)"""
+    _registry.reset()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def export_run(run_id: str, metrics_dir: str, prometheus_file: str = "rss_summarizer.prom",
+               report: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+    """
+    Write the run's metrics as a Prometheus textfile and a JSON run report
+
+    The textfile is overwritten on every run (node_exporter scrapes the latest);
+    JSON reports are kept per run ID for comparing runs over time.
+
+    Returns:
+        (textfile path, JSON report path)
+    """
+    prometheus_path = os.path.join(metrics_dir, prometheus_file)
+    _write_atomic(prometheus_path, _registry.to_prometheus())
+
+    report_path = os.path.join(metrics_dir, f"run-{run_id}.json")
+    data = {'run_id': run_id, 'exported_at': time.time()}
+    data.update(report or {})
+    data['metrics'] = _registry.to_dict()
+    _write_atomic(report_path, json.dumps(data, indent=2, default=str))
+
+    return prometheus_path, report_path
@@ -0,0 +1,374 @@
+"""
+Deterministic local mock LLM backend
+A LangChain chat model that answers every agent prompt with a schema-valid response
+derived from the prompt text, with simulated latency and failures. Selected with
+LLM_BACKEND = "mock" (or RSS_LLM_BACKEND=mock) for offline benchmarks and test runs.
+LocalBatchServer stands in for the OpenAI Files and Batches endpoints (see batch.py).
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from .keyword_filter import assign_category, score_relevance
+
+_FIELD = re.compile(r"^(Title|Source|Summary|Full Text):\s*(.*)$", re.MULTILINE)
+_RANKED_ARTICLE = re.compile(r"^\[(\d+)\]\s*(.*)$", re.MULTILINE)
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+# Attempts per (seed, prompt), so simulated failures and latency are reproducible
+# per call regardless of thread scheduling
+_attempts = {}
+_attempts_lock = threading.Lock()
+
+# Leading system messages seen so far (simulated provider-side prefix cache)
+_prefixes = set()
+_prefixes_lock = threading.Lock()
+
+# Providers cache prompt prefixes in blocks of this many tokens
+PREFIX_CACHE_BLOCK = 128
+
+
+class MockLLMError(RuntimeError):
+    """Simulated provider failure (see MOCK_LLM["error_rate"])"""
+
+
+def _rng(seed: int, *parts: Any) -> random.Random:
+    """Random generator seeded from the mock seed and the given values"""
+    digest = hashlib.md5(":".join(str(part) for part in (seed,) + parts).encode()).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def _next_attempt(seed: int, prompt: str) -> int:
+    key = hashlib.md5(f"{seed}:{prompt}".encode()).hexdigest()
+    with _attempts_lock:
+        _attempts[key] = _attempts.get(key, 0) + 1
+        return _attempts[key]
+
+
+def _cached_prefix_tokens(prefix: str, prompt_tokens: int, min_tokens: int) -> int:
+    """
+    Prompt tokens a provider would serve from its prefix cache
+
+    Like OpenAI's prompt caching: prompts of at least min_tokens whose leading system
+    message was seen before get that prefix cached, rounded down to whole blocks.
+    """
+    if prompt_tokens < min_tokens:
+        return 0
+    key = hashlib.md5(prefix.encode()).hexdigest()
+    with _prefixes_lock:
+        seen = key in _prefixes
+        _prefixes.add(key)
+    if not seen:
+        return 0
+    return (len(prefix) // 4) // PREFIX_CACHE_BLOCK * PREFIX_CACHE_BLOCK
+
+
+def _article_fields(prompt: str) -> Dict[str, str]:
+    """Pull the single-article fields (Title/Source/Summary/Full Text) out of a prompt"""
+    fields = {}
+    for name, value in _FIELD.findall(prompt):
+        fields.setdefault(name.lower().replace(" ", "_"), value.strip())
+    return {
+        'title': fields.get('title', ''),
+        'link': fields.get('source', ''),
+        'summary': fields.get('summary', ''),
+        'content': fields.get('full_text', ''),
+    }
+
+
+def _text_summary(prompt: str, seed: int) -> str:
+    """Two or three sentences built from the prompt's own text"""
+    article = _article_fields(prompt)
+    body = article['content'] or article['summary']
+    sentences = [s.strip() for s in _SENTENCE.split(body) if len(s.strip()) > 20][:2]
+    title = article['title'] or "Today's articles"
+    lead = f"{title} is the key development here."
+    closing = _rng(seed, prompt).choice([
+        "It matters most to teams building AI products.",
+        "Practitioners evaluating new tooling should take note.",
+        "It signals where enterprise AI adoption is heading.",
+    ])
+    return " ".join([lead] + sentences + [closing])
+
+
+def mock_response(prompt: str, seed: int = 42) -> str:
+    """
+    Build the response the mock returns for a prompt
+
+    The expected format is recognized from the JSON keys the prompt asks for;
+    decisions reuse the keyword heuristics so results are plausible and stable.
+    """
+    rng = _rng(seed, prompt)
+
+    if '"ranking"' in prompt:
+        articles = _RANKED_ARTICLE.findall(prompt)
+        order = sorted(
+            articles,
+            key=lambda item: (-score_relevance({'title': item[1]}), _rng(seed, item[1]).random())
+        )
+        return json.dumps({"ranking": [int(index) for index, _ in order]})
+
+    article = _article_fields(prompt)
+
+    if '"score"' in prompt:
+        score = min(10.0, score_relevance(article) + round(rng.uniform(-1.0, 1.0), 1))
+        return json.dumps({"score": score, "reason": "Mock score from keyword heuristics"})
+
+    if '"category"' in prompt:
+        return json.dumps({"category": assign_category(article),
+                           "justification": "Mock category from keyword heuristics"})
+
+    if '"is_relevant"' in prompt:
+        score = score_relevance(article)
+        result = {"is_relevant": score >= 6, "reason": f"Mock relevance score {score}/10"}
+        if '"confidence"' in prompt:
+            result["confidence"] = round(min(1.0, 0.5 + abs(score - 5.5) / 5 + rng.uniform(0, 0.1)), 2)
+        return json.dumps(result)
+
+    return _text_summary(prompt, seed)
+
+
+class MockChatModel(BaseChatModel):
+    """Chat model returning mock_response() after a simulated delay"""
+
+    model_name: str = "mock"
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+    prefix_cache_min_tokens: int = 1024
+    seed: int = 42
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "seed": self.seed}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt = "\n\n".join(str(message.content) for message in messages)
+        attempt = _next_attempt(self.seed, prompt)
+        rng = _rng(self.seed, prompt, attempt)
+
+        delay = self.latency + rng.uniform(0, self.latency_jitter)
+        failed = rng.random() < self.error_rate
+        if rng.random() < self.slow_rate:
+            delay += self.slow_latency
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            raise MockLLMError(f"Simulated failure (attempt {attempt})")
+
+        content = mock_response(prompt, self.seed)
+        prompt_tokens = len(prompt) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        cached_tokens = 0
+        if messages and messages[0].type == "system":
+            cached_tokens = _cached_prefix_tokens(str(messages[0].content), prompt_tokens,
+                                                  self.prefix_cache_min_tokens)
+        token_usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+        message = AIMessage(
+            content=content,
+            response_metadata={"model_name": self.model_name, "token_usage": token_usage},
+        )
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"model_name": self.model_name, "token_usage": token_usage},
+        )
+
+
+class LocalBatchServer:
+    def __init__(self, seed: int = 42, error_rate: float = 0.0, processing_delay: float = 0.0,
+                 prefix_cache_min_tokens: int = 1024):
+        """
+        Local stand-in for the OpenAI Files and Batches API
+
+        Serves the endpoints the openai client uses for batch jobs (upload a file,
+        create, retrieve and cancel a batch, download a file's content). Each request
+        line is answered with mock_response() after processing_delay seconds; error_rate
+        of the lines fail and go to the batch's error file instead. A batch cancelled
+        before then ends up cancelled without results.
+
+        Args:
+            seed: Mock seed (same responses as MockChatModel with this seed)
+            error_rate: Fraction of request lines that fail
+            processing_delay: Seconds a batch stays in progress before it completes
+            prefix_cache_min_tokens: Smallest prompt whose prefix is reported as cached
+        """
+        self.seed = seed
+        self.prefix_cache_min_tokens = prefix_cache_min_tokens
+        self.error_rate = error_rate
+        self.processing_delay = processing_delay
+        self.files = {}
+        self.batches = {}
+        self._cancelled = {}  # batch_id -> Event set by cancel_batch()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                parts = self.path.split("?")[0].rstrip("/").split("/")
+                if parts[-1] == "files":
+                    self._send(server.upload(body, self.headers.get("Content-Type", "")))
+                elif parts[-1] == "batches":
+                    self._send(server.create_batch(json.loads(body)))
+                elif parts[-1] == "cancel" and parts[-3] == "batches" and parts[-2] in server.batches:
+                    self._send(server.cancel_batch(parts[-2]))
+                else:
+                    self.send_error(404)
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].rstrip("/").split("/")
+                if parts[-2] == "batches" and parts[-1] in server.batches:
+                    self._send(server.batches[parts[-1]])
+                elif parts[-1] == "content" and parts[-2] in server.files:
+                    self._send_bytes(server.files[parts[-2]]['content'], "application/jsonl")
+                else:
+                    self.send_error(404)
+
+            def _send(self, payload: Dict[str, Any]):
+                self._send_bytes(json.dumps(payload).encode("utf-8"), "application/json")
+
+            def _send_bytes(self, data: bytes, content_type: str):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL for the openai client (OpenAI(base_url=...))"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _add_file(self, content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        info = {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed"}
+        with self._lock:
+            self.files[file_id] = dict(info, content=content)
+        return info
+
+    def upload(self, body: bytes, content_type: str) -> Dict[str, Any]:
+        """Store a multipart/form-data file upload"""
+        message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        fields, content, filename = {}, b"", "upload.jsonl"
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if part.get_filename():
+                content, filename = part.get_payload(decode=True), part.get_filename()
+            else:
+                fields[name] = part.get_content().strip()
+        return self._add_file(content, filename, fields.get("purpose", "batch"))
+
+    def create_batch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a batch over an uploaded file and start processing it in the background"""
+        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+        batch = {
+            "id": batch_id, "object": "batch", "endpoint": request["endpoint"],
+            "input_file_id": request["input_file_id"], "completion_window": request["completion_window"],
+            "status": "validating", "created_at": int(time.time()), "output_file_id": None,
+            "error_file_id": None, "metadata": request.get("metadata"),
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        with self._lock:
+            self.batches[batch_id] = batch
+            self._cancelled[batch_id] = threading.Event()
+        created = dict(batch)
+        threading.Thread(target=self._process, args=(batch_id,), daemon=True).start()
+        return created
+
+    def _process(self, batch_id: str):
+        batch = self.batches[batch_id]
+        lines = self.files[batch["input_file_id"]]['content'].decode("utf-8").splitlines()
+        batch.update(status="in_progress", in_progress_at=int(time.time()))
+        if self._cancelled[batch_id].wait(self.processing_delay):
+            batch.update(status="cancelled", cancelled_at=int(time.time()),
+                         request_counts={"total": len(list(filter(None, lines))), "completed": 0, "failed": 0})
+            return
+
+        outputs, errors = [], []
+        for line in filter(None, lines):
+            request = json.loads(line)
+            prompt = "\n\n".join(str(message["content"]) for message in request["body"]["messages"])
+            entry = {"id": f"batch_req_{uuid.uuid4().hex[:24]}", "custom_id": request["custom_id"]}
+            if _rng(self.seed, prompt, "batch").random() < self.error_rate:
+                errors.append(dict(entry, response={"status_code": 500, "body": {"error": {
+                    "message": "Simulated batch request failure", "type": "server_error"}}}, error=None))
+                continue
+            content = mock_response(prompt, self.seed)
+            prompt_tokens = len(prompt) // 4 + 1
+            completion_tokens = len(content) // 4 + 1
+            messages = request["body"]["messages"]
+            cached_tokens = 0
+            if messages and messages[0]["role"] == "system":
+                cached_tokens = _cached_prefix_tokens(messages[0]["content"], prompt_tokens,
+                                                      self.prefix_cache_min_tokens)
+            outputs.append(dict(entry, error=None, response={"status_code": 200, "body": {
+                "object": "chat.completion", "model": request["body"].get("model", "mock"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens,
+                          "prompt_tokens_details": {"cached_tokens": cached_tokens}},
+            }}))
+
+        def jsonl(entries):
+            return "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+
+        batch["output_file_id"] = self._add_file(jsonl(outputs), f"{batch_id}_output.jsonl", "batch_output")["id"]
+        if errors:
+            batch["error_file_id"] = self._add_file(jsonl(errors), f"{batch_id}_errors.jsonl", "batch_output")["id"]
+        batch.update(status="completed", completed_at=int(time.time()),
+                     request_counts={"total": len(outputs) + len(errors), "completed": len(outputs),
+                                     "failed": len(errors)})
+
+    def cancel_batch(self, batch_id: str) -> Dict[str, Any]:
+        """Cancel a batch that is still being processed (a finished one is left as it is)"""
+        batch = self.batches[batch_id]
+        if batch["status"] in ("validating", "in_progress"):
+            batch.update(status="cancelling", cancelling_at=int(time.time()))
+            self._cancelled[batch_id].set()
+        return dict(batch)
+
+    def start(self) -> "LocalBatchServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "LocalBatchServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
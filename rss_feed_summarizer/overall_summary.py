@@ -3,60 +3,87 @@ Agent 3: Macro Summary Agent (Daily Digest Insight Generator)
 Creates high-level daily digest overviews
 """
 from typing import List, Dict, Any
-from . import config
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain_community.cache import SQLiteCache
-from langchain.globals import set_llm_cache
+from . import config, deadline
 import sqlite3
 import os
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from .cache_utils import CacheTracker
+from .agent_registry import get_agent
+from .llm_backends import create_chat_model, get_cache_dir, requires_api_key
+from .cache_utils import CacheTracker, setup_llm_cache
+from .prompts import chat_prompt
+from .logging_utils import get_logger
+
+logger = get_logger("overall_summary")
 
 class MacroSummaryAgent:
     def __init__(self, api_key=None, model=None):
         """Initialize the Macro Summary Agent"""
         self.api_key = api_key or config.OPENAI_API_KEY
-        if not self.api_key:
+        if not self.api_key and requires_api_key():
             raise ValueError("OpenAI API key is required")
         
         # Set up cache
-        self.cache_dir = "cache"
+        self.cache_dir = get_cache_dir()
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
         
         self.cache_db = f"{self.cache_dir}/langchain.db"
-        set_llm_cache(SQLiteCache(database_path=self.cache_db))
+        setup_llm_cache(self.cache_db)
         
         # Initialize cache tracker
-        self.cache_tracker = CacheTracker(cost_per_call=0.03)
+        self.cache_tracker = CacheTracker(cost_per_call=0.03, agent="macro_summary")
         
         # Use GPT-3.5 Turbo for macro summary (cost-effective)
         self.model = model or config.MODELS.get("macro_summary", config.OPENAI_MODEL)
-        print(f"📄 MACRO SUMMARY AGENT: Using {self.model} for cost-effective daily overview")
+        logger.info("📄 MACRO SUMMARY AGENT: Using %s for cost-effective daily overview", self.model)
         
         # Initialize LangChain components
-        self.llm = ChatOpenAI(
-            model_name=self.model,
-            openai_api_key=self.api_key,
+        self.llm = create_chat_model(
+            model=self.model,
+            api_key=self.api_key,
             temperature=0.3,
-            request_timeout=30
+            request_timeout=30,
+            agent="macro_summary"
         )
         
         # Macro summary prompt
-        self.macro_summary_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a macro summary agent that creates high-level newsletter introductions summarizing daily AI trends."),
-            ("user", """Analyze the following list of article titles and summaries. Generate a 3–5 sentence newsletter introduction summarizing the biggest trends or common themes for the day.
+        self.macro_summary_prompt = chat_prompt(
+            """You are the macro summary agent. Analyze the list of article titles and summaries and generate a 3–5 sentence newsletter introduction summarizing the biggest trends or common themes for the day.
+
+Example Output:
+"Today's AI news was dominated by multi-agent collaboration (MCP), with Amazon Bedrock leading the charge. We also saw major investments into chat-based AI, such as xAI's $300M deal with Telegram. Additionally, new AI-powered productivity tools and browsers are emerging fast."
+
+Reply with the introduction only.""",
+            """Articles:
+{articles}""",
+            preamble=True
+        )
+        
+        # Incremental mode: one partial overview per category, then a reduce over the partials
+        self.category_overview_prompt = chat_prompt(
+            "You are a macro summary agent that identifies the main themes in one category of daily AI news.",
+            """Below are today's {category} articles with their short summaries. Describe the main themes or most important developments in 1–2 sentences.
 
 Articles:
 {articles}
 
+Category Themes:"""
+        )
+        
+        self.reduce_overview_prompt = chat_prompt(
+            """You are a macro summary agent that creates high-level newsletter introductions summarizing daily AI trends.
+
+Below are the main themes of today's AI news, by category. Generate a 3–5 sentence newsletter introduction summarizing the biggest trends or common themes for the day.
+
 Example Output:
-"Today's AI news was dominated by multi-agent collaboration (MCP), with Amazon Bedrock leading the charge. We also saw major investments into chat-based AI, such as xAI's $300M deal with Telegram. Additionally, new AI-powered productivity tools and browsers are emerging fast."
+"Today's AI news was dominated by multi-agent collaboration (MCP), with Amazon Bedrock leading the charge. We also saw major investments into chat-based AI, such as xAI's $300M deal with Telegram. Additionally, new AI-powered productivity tools and browsers are emerging fast.\"""",
+            """Themes by Category:
+{themes}
 
-Newsletter Introduction:""")
-        ])
+Newsletter Introduction:"""
+        )
     
     def _get_cache_key(self, content: str) -> str:
         """Generate a cache key for content"""
@@ -92,14 +119,8 @@ Newsletter Introduction:""")
         conn.commit()
         conn.close()
 
-    def generate_overview(self, articles: List[Dict[str, Any]]) -> str:
-        """Generate a high-level daily digest introduction"""
-        if not articles:
-            return "No articles to analyze today."
-        
-        print(f"\n📄 MACRO SUMMARY AGENT: Generating daily digest overview from {len(articles)} articles...")
-        
-        # Prepare article list for analysis
+    def _overview_input(self, articles: List[Dict[str, Any]]) -> tuple:
+        """Article list for the overview prompt and its cache key. Returns (articles text, cache key)"""
         article_texts = []
         for i, article in enumerate(articles, 1):
             title = article.get('title', 'No Title')
@@ -107,20 +128,39 @@ Newsletter Introduction:""")
             source = article.get('source', 'Unknown')
             article_texts.append(f"{i}. Title: {title}\n   Source: {source}\n   Summary: {summary}")
         
-        combined_articles = "\n\n".join(article_texts)
-        
-        # Create cache key based on all article titles and sources
+        # Cache key based on all article titles and sources
         cache_input = "".join(sorted([f"{a.get('title','')}{a.get('source','')}" for a in articles]))
-        cache_key = self._get_cache_key(cache_input)
+        return "\n\n".join(article_texts), self._get_cache_key(cache_input)
+
+    def _fallback_overview(self, articles: List[Dict[str, Any]], max_titles: int = 3) -> str:
+        """Local introduction from the headlines (used when the run is out of time)"""
+        titles = [article.get('title', '') for article in articles if article.get('title')][:max_titles]
+        overview = f"Today's digest covers {len(articles)} articles"
+        if titles:
+            overview += ", including: " + "; ".join(titles)
+        return overview + "."
+
+    def generate_overview(self, articles: List[Dict[str, Any]]) -> str:
+        """Generate a high-level daily digest introduction"""
+        if not articles:
+            return "No articles to analyze today."
+        
+        logger.info("📄 MACRO SUMMARY AGENT: Generating daily digest overview from %d articles...", len(articles))
+        
+        combined_articles, cache_key = self._overview_input(articles)
         
         cached_summary = self._check_cache(cache_key)
         if cached_summary:
             self.cache_tracker.record_hit()
-            print("✅ Macro summary retrieved from cache")
+            logger.info("✅ Macro summary retrieved from cache")
             return cached_summary
         
         self.cache_tracker.record_miss()
         
+        if deadline.expired("macro_summary"):
+            deadline.degrade("macro_summary", "Daily overview", "headline list")
+            return self._fallback_overview(articles)
+        
         try:
             response = (self.macro_summary_prompt | self.llm).invoke({
                 "articles": combined_articles
@@ -128,24 +168,103 @@ Newsletter Introduction:""")
             
             summary = response.content.strip()
             self._save_cache(cache_key, summary)
-            print("✅ Macro summary generated")
+            logger.info("✅ Macro summary generated")
             
-            # Print cache statistics
+            # Log cache statistics
             stats = self.cache_tracker.get_stats()
-            print(f"Cache Stats - Hits: {stats['hits']}, Misses: {stats['misses']}, Hit Rate: {stats['hit_rate']}")
+            logger.info("Cache Stats - Hits: %s, Misses: %s, Hit Rate: %s", stats['hits'], stats['misses'], stats['hit_rate'])
             
             return summary
             
         except Exception as e:
-            print(f"Error in macro summary agent: {str(e)}")
+            logger.warning("Error in macro summary agent: %s", e, extra={'stage': "macro_summary"})
+            return "Error generating daily digest overview."
+
+    def _category_overview(self, category: str, articles: List[Dict[str, Any]]) -> str:
+        """Partial overview for one category, cached under that category's titles and summaries"""
+        article_texts = sorted(
+            f"- {a.get('title', 'No Title')} ({a.get('source', 'Unknown')}): {a.get('summary', '')}"
+            for a in articles
+        )
+        cache_key = self._get_cache_key(f"partial:{category}:" + "\n".join(article_texts))
+        
+        cached_overview = self._check_cache(cache_key)
+        if cached_overview:
+            self.cache_tracker.record_hit()
+            return cached_overview
+        
+        self.cache_tracker.record_miss()
+        response = (self.category_overview_prompt | self.llm).invoke({
+            "category": category.replace('_', ' ').title(),
+            "articles": "\n".join(article_texts)
+        })
+        
+        overview = response.content.strip()
+        self._save_cache(cache_key, overview)
+        return overview
+    
+    def generate_overview_from_summaries(self, summarized_by_category: Dict[str, List[Dict[str, Any]]]) -> str:
+        """
+        Generate the daily introduction from the final micro summaries
+        
+        Each category gets a cached partial overview, so a new article only recomputes
+        its own category's partial plus the (small) final reduce.
+        """
+        # Sorted by name, so the reduce prompt (and its cache key) doesn't depend on dict order
+        categories = sorted(((category, articles) for category, articles in summarized_by_category.items() if articles),
+                            key=lambda item: item[0])
+        if not categories:
+            return "No articles to analyze today."
+        
+        logger.info("📄 MACRO SUMMARY AGENT: Reducing daily overview from %d category overviews...", len(categories))
+        
+        if deadline.expired("macro_summary"):
+            deadline.degrade("macro_summary", "Daily overview", "headline list")
+            return self._fallback_overview([article for _, articles in categories for article in articles])
+        
+        try:
+            with ThreadPoolExecutor(max_workers=config.CONCURRENCY.get("categories", 4)) as executor:
+                partials = list(executor.map(lambda item: self._category_overview(*item), categories))
+            
+            themes = "\n\n".join(
+                f"{category.replace('_', ' ').title()}: {partial}"
+                for (category, _), partial in zip(categories, partials)
+            )
+            cache_key = self._get_cache_key(f"reduce:{themes}")
+            
+            cached_summary = self._check_cache(cache_key)
+            if cached_summary:
+                self.cache_tracker.record_hit()
+                logger.info("✅ Macro summary retrieved from cache")
+                return cached_summary
+            
+            self.cache_tracker.record_miss()
+            response = (self.reduce_overview_prompt | self.llm).invoke({"themes": themes})
+            
+            summary = response.content.strip()
+            self._save_cache(cache_key, summary)
+            logger.info("✅ Macro summary generated")
+            
+            stats = self.cache_tracker.get_stats()
+            logger.info("Cache Stats - Hits: %s, Misses: %s, Hit Rate: %s", stats['hits'], stats['misses'], stats['hit_rate'])
+            
+            return summary
+            
+        except Exception as e:
+            logger.warning("Error in macro summary agent: %s", e, extra={'stage': "macro_summary"})
             return "Error generating daily digest overview."
 
 # Helper function for easy use
 def generate_daily_overview(articles: List[Dict[str, Any]]) -> str:
     """Helper function for macro summary generation"""
-    agent = MacroSummaryAgent()
+    agent = get_agent("macro_summary")
     return agent.generate_overview(articles)
 
+def generate_daily_overview_from_summaries(summarized_by_category: Dict[str, List[Dict[str, Any]]]) -> str:
+    """Helper function for incremental macro summary generation from micro summaries"""
+    agent = get_agent("macro_summary")
+    return agent.generate_overview_from_summaries(summarized_by_category)
+
 if __name__ == "__main__":
     # Test the macro summary agent
     from fetcher import RSSFetcher
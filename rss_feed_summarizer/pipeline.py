@@ -4,7 +4,8 @@ Main pipeline orchestrating 6 AI agents for RSS feed processing
 Agent Flow:
 1. Ingestion Agent (fetcher.py) - Pulls articles from RSS feeds
 2. Relevance Agent (relevance.py) - Filters for relevant articles
-3. Macro Summary Agent (overall_summary.py) - Creates daily digest overview  
+3. Macro Summary Agent (overall_summary.py) - Creates daily digest overview
+   (runs after Agent 6 on the micro summaries when MACRO_SUMMARY mode is "micro_summaries")
 4. Categorization Agent (categorization.py) - Tags articles with categories
 5. Ranking Agent (ranking.py) - Orders articles by priority PER CATEGORY (only if >5 articles)
 6. Micro Summary Agent (summaries.py) - Creates 2-3 sentence summaries
@@ -12,110 +13,352 @@ Agent Flow:
 from .fetcher import RSSFetcher  # Agent 1: Ingestion
 from .keyword_filter import filter_articles  # Keyword pre-filter
 from .relevance import filter_relevant_articles  # Agent 2: Relevance
-from .overall_summary import generate_daily_overview  # Agent 3: Macro Summary
+from .overall_summary import generate_daily_overview, generate_daily_overview_from_summaries  # Agent 3: Macro Summary
 from .categorization import categorize_by_topic  # Agent 4: Categorization
-from .ranking import rank_articles_by_importance  # Agent 5: Ranking
-from .summaries import generate_article_summaries  # Agent 6: Micro Summary
+from .agent_registry import get_agent, get_registry_stats  # Agents 5 & 6: Ranking, Micro Summary (shared per category)
 from .distributor import use_distributor
+from .scheduler import Stage, StageScheduler, StopPipeline
+from .checkpoint import RUN_ID_FORMAT, RunCheckpoint
+from .logging_utils import ensure_logging, get_logger
+from .llm_backends import get_backend
+from .llm_metrics import get_prompt_cache_stats
 from . import config
+from . import deadline
+from . import hedging
+from . import metrics
+import os
+import time
 from collections import defaultdict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-def run_pipeline():
-    """Run the complete 6-agent RSS feed processing pipeline"""
-    print("\n🤖 ===  6-AGENT AI PIPELINE STARTING ===")
+logger = get_logger("pipeline")
+
+def _rank_category(agent, category, cat_articles):
+    """Rank one category (only if >5 articles). Returns (category, articles, ranking_skipped)"""
+    if len(cat_articles) > 5:
+        logger.info("📊 Ranking %s articles in %s (>5 articles)...", len(cat_articles), category)
+        # Rank to get top 5 in this category
+        ranked_articles = agent.rank_articles(cat_articles, max_articles=5)
+        logger.info("✅ %s: Selected top %s from %s articles", category, len(ranked_articles), len(cat_articles))
+        return category, ranked_articles, False
     
+    # Keep all articles if 5 or fewer
+    logger.info("✅ %s: Kept all %s articles (≤5, no ranking needed)", category, len(cat_articles))
+    return category, cat_articles, True
+
+def _summarize_category(agent, category, cat_articles):
+    """Generate micro summaries for one category. Returns (category, articles)"""
+    logger.info("Summarizing %s articles in %s...", len(cat_articles), category)
+    return category, agent.summarize_articles(cat_articles)
+
+def _rank_and_summarize_category(ranking_agent, summary_agent, category, cat_articles):
+    """Rank then summarize one category, so its summaries don't wait for other categories' ranking"""
+    category, ranked_articles, ranking_skipped = _rank_category(ranking_agent, category, cat_articles)
+    if not ranked_articles:
+        return category, [], ranking_skipped
+    category, summarized = _summarize_category(summary_agent, category, ranked_articles)
+    return category, summarized, ranking_skipped
+
+# Stage functions - each receives the results of the stages that ran before it
+
+def _stage_fetch(results):
     # AGENT 1: Ingestion Agent
-    print("\n📡 AGENT 1 - INGESTION: Fetching articles from RSS feeds...")
+    logger.info("📡 AGENT 1 - INGESTION: Fetching articles from RSS feeds...")
     fetcher = RSSFetcher()
     articles = fetcher.fetch_articles()
-    print(f"✅ Ingested {len(articles)} articles")
+    logger.info("✅ Ingested %s articles", len(articles))
     
     if not articles:
-        print("❌ No articles fetched. Exiting pipeline.")
-        return
-    
+        raise StopPipeline("❌ No articles fetched. Exiting pipeline.")
+    return articles
+
+def _stage_keyword_filter(results):
     # Pre-filter with keywords (not an LLM agent, just efficiency)
-    print("\n🔍 PRE-FILTER: Applying keyword filters...")
-    keyword_filtered_articles = filter_articles(articles)
-    print(f"✅ {len(keyword_filtered_articles)} articles passed keyword filter")
+    logger.info("🔍 PRE-FILTER: Applying keyword filters...")
+    keyword_filtered_articles = filter_articles(results['fetch'])
+    logger.info("✅ %s articles passed keyword filter", len(keyword_filtered_articles))
     
     if not keyword_filtered_articles:
-        print("❌ No articles passed keyword filtering. Exiting pipeline.")
-        return
-    
+        raise StopPipeline("❌ No articles passed keyword filtering. Exiting pipeline.")
+    return keyword_filtered_articles
+
+def _stage_relevance(results):
     # AGENT 2: Relevance Agent
-    print("\n🎯 AGENT 2 - RELEVANCE: Filtering for AI-relevant articles...")
-    relevant_articles = filter_relevant_articles(keyword_filtered_articles)
+    logger.info("🎯 AGENT 2 - RELEVANCE: Filtering for AI-relevant articles...")
+    relevant_articles = filter_relevant_articles(results['keyword_filter'])
     
     if not relevant_articles:
-        print("❌ No relevant articles found. Exiting pipeline.")
-        return
-    
-    # AGENT 3: Macro Summary Agent (Daily Digest Insight Generator)  
-    print("\n📊 AGENT 3 - MACRO SUMMARY: Generating daily digest overview...")
-    daily_overview = generate_daily_overview(relevant_articles)
-    print(f"✅ Daily Overview: {daily_overview}")
-    
+        raise StopPipeline("❌ No relevant articles found. Exiting pipeline.")
+    return relevant_articles
+
+def _stage_macro_summary(results):
+    # AGENT 3: Macro Summary Agent (Daily Digest Insight Generator)
+    if 'rank_summarize' in results:
+        logger.info("📊 AGENT 3 - MACRO SUMMARY: Reducing daily digest overview from micro summaries...")
+        daily_overview = generate_daily_overview_from_summaries(results['rank_summarize']['by_category'])
+    else:
+        logger.info("📊 AGENT 3 - MACRO SUMMARY: Generating daily digest overview...")
+        # Work on copies: categorization and micro summaries update the shared article dicts concurrently
+        daily_overview = generate_daily_overview([dict(a) for a in results['relevance']])
+    logger.info("✅ Daily Overview: %s", daily_overview)
+    return daily_overview
+
+def _stage_categorization(results):
     # AGENT 4: Categorization Agent - Categorize ALL relevant articles first
-    print("\n🏷️ AGENT 4 - CATEGORIZATION: Categorizing all relevant articles...")
-    categorized_articles = categorize_by_topic(relevant_articles)
+    logger.info("🏷️ AGENT 4 - CATEGORIZATION: Categorizing all relevant articles...")
+    categorized_articles = categorize_by_topic(results['relevance'])
     
     # Group categorized articles by category
     articles_by_category = defaultdict(list)
     for article in categorized_articles:
         category = article.get('category', 'UNCATEGORIZED')
         articles_by_category[category].append(article)
+    return dict(articles_by_category)
+
+def _stage_rank_summarize(results):
+    # AGENT 5 + 6: Rank PER CATEGORY (only if >5 articles), then summarize each category as
+    # soon as its own ranking is done. Categories fan out on one shared agent per stage
+    logger.info("🏆 AGENT 5 - RANKING / ✏️ AGENT 6 - MICRO SUMMARY: Ranking and summarizing per category...")
+    articles_by_category = results['categorization']
     
-    # AGENT 5: Ranking Agent - Rank PER CATEGORY only if more than 5 articles
-    print("\n🏆 AGENT 5 - RANKING: Ranking categories with >5 articles...")
-    final_articles_by_category = {}
-    total_final_articles = 0
-    ranking_calls_saved = 0
-    
-    for category, cat_articles in articles_by_category.items():
-        if len(cat_articles) > 5:
-            print(f"📊 Ranking {len(cat_articles)} articles in {category} (>5 articles)...")
-            # Rank to get top 5 in this category
-            ranked_articles = rank_articles_by_importance(cat_articles, max_articles=5)
-            final_articles_by_category[category] = ranked_articles
-            total_final_articles += len(ranked_articles)
-            print(f"✅ {category}: Selected top {len(ranked_articles)} from {len(cat_articles)} articles")
-        else:
-            # Keep all articles if 5 or fewer
-            final_articles_by_category[category] = cat_articles
-            total_final_articles += len(cat_articles)
-            ranking_calls_saved += 1
-            print(f"✅ {category}: Kept all {len(cat_articles)} articles (≤5, no ranking needed)")
+    if any(len(cat_articles) > 5 for cat_articles in articles_by_category.values()):
+        ranking_agent = get_agent("ranking")
+    else:
+        ranking_agent = None
+    summary_agent = get_agent("micro_summary")
     
-    print(f"✅ Ranking complete - saved {ranking_calls_saved} LLM calls by skipping categories with ≤5 articles")
-    print(f"✅ Total articles for summarization: {total_final_articles}")
+    with ThreadPoolExecutor(max_workers=config.CONCURRENCY.get("categories", 4)) as executor:
+        category_results = list(executor.map(
+            lambda item: _rank_and_summarize_category(ranking_agent, summary_agent, *item),
+            articles_by_category.items()
+        ))
     
-    # AGENT 6: Micro Summary Agent - Generate 2-3 sentence summaries
-    print("\n✏️ AGENT 6 - MICRO SUMMARY: Generating article summaries...")
     summarized_by_category = {}
+    ranking_calls_saved = 0
+    for category, summarized, ranking_skipped in category_results:
+        if summarized:
+            summarized_by_category[category] = summarized
+        if ranking_skipped:
+            ranking_calls_saved += 1
     
-    for category, cat_articles in final_articles_by_category.items():
-        if cat_articles:
-            print(f"Summarizing {len(cat_articles)} articles in {category}...")
-            summarized_by_category[category] = generate_article_summaries(cat_articles)
+    total_final_articles = sum(len(cat_articles) for cat_articles in summarized_by_category.values())
+    logger.info("✅ Ranking complete - saved %s LLM calls by skipping categories with ≤5 articles", ranking_calls_saved)
+    logger.info("✅ Total articles summarized: %s", total_final_articles)
     
+    return {'by_category': summarized_by_category, 'ranking_calls_saved': ranking_calls_saved}
+
+def _stage_distribute(results):
     # Distribution
-    print("\n📧 DISTRIBUTION: Generating digest...")
+    logger.info("📧 DISTRIBUTION: Generating digest...")
+    summarized_by_category = results['rank_summarize']['by_category']
+    
     # Flatten all articles for count purposes
     all_final_articles = []
     for category_articles in summarized_by_category.values():
         all_final_articles.extend(category_articles)
     
-    use_distributor(all_final_articles, summarized_by_category, daily_overview)
+    return use_distributor(all_final_articles, summarized_by_category, results['macro_summary'])
+
+def build_stages():
+    """Declare the pipeline as a DAG of stages with explicit dependencies"""
+    # In "micro_summaries" mode the macro summary is reduced from the final summaries,
+    # otherwise it only needs the relevant articles and overlaps with categorization
+    if config.MACRO_SUMMARY.get("mode", "articles") == "micro_summaries":
+        macro_deps = ['rank_summarize']
+    else:
+        macro_deps = ['relevance']
+    
+    return [
+        Stage('fetch', _stage_fetch),
+        Stage('keyword_filter', _stage_keyword_filter, deps=['fetch']),
+        Stage('relevance', _stage_relevance, deps=['keyword_filter']),
+        Stage('macro_summary', _stage_macro_summary, deps=macro_deps),
+        Stage('categorization', _stage_categorization, deps=['relevance']),
+        Stage('rank_summarize', _stage_rank_summarize, deps=['categorization']),
+        Stage('distribute', _stage_distribute, deps=['rank_summarize', 'macro_summary']),
+    ]
+
+def _count(result):
+    """Number of articles in a stage result"""
+    if isinstance(result, dict) and 'by_category' in result:
+        result = result['by_category']
+    if isinstance(result, dict):
+        return sum(len(articles) for articles in result.values())
+    if isinstance(result, list):
+        return len(result)
+    return 1 if result else 0
+
+def _export_metrics(run_id, scheduler, results, success, started, degraded=None):
+    """Record per-stage metrics and write the Prometheus textfile and JSON run report"""
+    for stage in scheduler.stages.values():
+        if stage.name not in scheduler.timings:
+            continue
+        metrics.set_gauge("stage_duration_seconds", scheduler.timings[stage.name]['duration'], stage=stage.name)
+        if stage.name in results:
+            metrics.set_gauge("stage_items_out", _count(results[stage.name]), stage=stage.name)
+        if stage.deps and all(dep in results for dep in stage.deps):
+            # Items in = output of the first dependency (e.g. distribute consumes rank_summarize)
+            metrics.set_gauge("stage_items_in", _count(results[stage.deps[0]]), stage=stage.name)
+    
+    for agent in ("relevance", "categorization", "ranking", "micro_summary", "macro_summary"):
+        hits = metrics.get_value("cache_lookups_total", agent=agent, result="hit")
+        misses = metrics.get_value("cache_lookups_total", agent=agent, result="miss")
+        if hits + misses:
+            metrics.set_gauge("cache_hit_ratio", hits / (hits + misses), agent=agent)
+    
+    duration = time.time() - started
+    metrics.set_gauge("run_success", 1 if success else 0)
+    metrics.set_gauge("run_duration_seconds", duration)
+    metrics.set_gauge("run_timestamp_seconds", time.time())
+    
+    report = {
+        'success': success,
+        'stopped': scheduler.stopped,
+        'started_at': datetime.fromtimestamp(started).isoformat(),
+        'duration_seconds': round(duration, 3),
+        'critical_path': scheduler.critical_path(),
+        'resumed_stages': scheduler.resumed,
+        'llm_backend': get_backend(),
+        'degraded': degraded or [],
+        'prompt_cache': get_prompt_cache_stats(),
+    }
+    if config.HEDGING.get("enabled", False):
+        report['hedging'] = hedging.get_hedge_stats()
+    prometheus_path, report_path = metrics.export_run(
+        run_id,
+        config.METRICS.get("dir", "output/metrics"),
+        config.METRICS.get("prometheus_file", "rss_summarizer.prom"),
+        report
+    )
+    logger.info("📈 Metrics written to %s and %s", prometheus_path, report_path)
+
+def _log_degraded(degraded):
+    """Summarize the items that fell back to local paths because a stage ran out of time"""
+    if not degraded:
+        return
+    by_stage = defaultdict(int)
+    for item in degraded:
+        by_stage[item['stage']] += 1
+    logger.warning("⏰ %d items used local fallbacks to meet the run deadline (%s)", len(degraded),
+                   ", ".join(f"{stage}: {count}" for stage, count in by_stage.items()))
+    for item in degraded:
+        logger.info("   • %s - %s (%s)", item['stage'], item['title'], item['fallback'])
+
+def _log_prompt_cache():
+    """Per-agent share of prompt tokens served from the provider's prefix cache"""
+    stats = get_prompt_cache_stats()
+    if not stats:
+        return
+    logger.info("   • Prompt tokens from provider cache: %s", ", ".join(
+        f"{agent} {usage['cached_ratio']:.0%} ({usage['cached_tokens']:,} of {usage['prompt_tokens']:,})"
+        for agent, usage in stats.items()))
+
+def _log_hedging():
+    """Per-agent hedged calls and the p99 latency they saved"""
+    for agent, stats in hedging.get_hedge_stats().items():
+        if not stats['hedges'] and not stats['hedges_skipped']:
+            continue
+        logger.info("   • Hedged %s: %s of %s calls (%.1f%% extra, %s won, %s skipped with the pool busy), p99 %.2fs -> %.2fs",
+                    agent, stats['hedges'], stats['calls'], stats['extra_call_rate'] * 100, stats['hedges_won'],
+                    stats['hedges_skipped'], stats['p99_unhedged'], stats['p99_hedged'])
+
+def run_pipeline(resume_run_id=None, profile=None, trace_memory=False, deadline_seconds=None):
+    """
+    Run the complete 6-agent RSS feed processing pipeline
+    
+    Args:
+        resume_run_id: Run ID of a previous run to resume from its first incomplete stage
+        profile: Profile each stage - "cprofile" or "sample" (see profiling.py)
+        trace_memory: Record tracemalloc peak and top allocations per stage
+        deadline_seconds: Time budget for the run (default: DEADLINE["budget_seconds"] if enabled)
+    
+    Returns:
+        Per-stage timings ({stage: {'start', 'end', 'duration'}}, plus 'total')
+    """
+    ensure_logging()
+    logger.info("🤖 ===  6-AGENT AI PIPELINE STARTING ===")
+    started = time.time()
+    metrics.reset_metrics()
+    hedging.reset_hedge_stats()
+    
+    checkpoint = None
+    if resume_run_id:
+        if not RunCheckpoint.exists(resume_run_id):
+            raise ValueError(f"No checkpoints found for run '{resume_run_id}'")
+        checkpoint = RunCheckpoint(resume_run_id)
+        logger.info("🔁 Resuming run %s (completed: %s)", checkpoint.run_id, ', '.join(checkpoint.completed_stages()) or 'none')
+    elif config.CHECKPOINTS.get("enabled", True):
+        checkpoint = RunCheckpoint()
+        RunCheckpoint.prune(config.CHECKPOINTS.get("keep_runs", 14))
+        logger.info("🆔 Run ID: %s (resume with: rss-summarizer run --resume %s)", checkpoint.run_id, checkpoint.run_id)
+    
+    run_id = checkpoint.run_id if checkpoint else datetime.fromtimestamp(started).strftime(RUN_ID_FORMAT)
+    stages = build_stages()
+    max_workers = config.CONCURRENCY.get("stages", 4)
+    
+    if deadline_seconds is None and config.DEADLINE.get("enabled", False):
+        deadline_seconds = config.DEADLINE.get("budget_seconds", 900)
+    budget = None
+    if deadline_seconds:
+        budget = deadline.start_budget(deadline_seconds, config.DEADLINE.get("shares", {}))
+        stages = [Stage(stage.name, budget.wrap(stage.name, stage.func), stage.deps) for stage in stages]
+        logger.info("⏰ Run deadline: %ss - stages out of their share fall back to local paths", deadline_seconds)
+    
+    profiler = None
+    if profile or trace_memory:
+        from .profiling import StageProfiler
+        profiler = StageProfiler(os.path.join("output", "profiles", run_id), mode=profile,
+                                 trace_memory=trace_memory)
+        stages = [Stage(stage.name, profiler.wrap(stage.name, stage.func), stage.deps) for stage in stages]
+        max_workers = 1  # Profilers and tracemalloc are process-wide, so stages run one at a time
+        logger.info("🔬 Profiling stages serially (%s%s)", profile or 'memory only',
+                    ', tracing memory' if trace_memory and profile else '')
+    
+    scheduler = StageScheduler(stages, max_workers=max_workers, checkpoint=checkpoint)
+    try:
+        results = scheduler.run()
+    except Exception:
+        if config.METRICS.get("enabled", True):
+            _export_metrics(run_id, scheduler, scheduler.results, False, started,
+                            budget.degraded() if budget else None)
+        raise
+    finally:
+        deadline.end_budget()
+    
+    degraded = budget.degraded() if budget else []
+    _log_degraded(degraded)
+    
+    if profiler is not None:
+        logger.info("🔬 Profiles written to %s", os.path.dirname(profiler.write_summary()))
+    
+    if config.METRICS.get("enabled", True):
+        _export_metrics(run_id, scheduler, results, not scheduler.stopped, started, degraded)
+    
+    if scheduler.stopped:
+        logger.warning(scheduler.stopped)
+        scheduler.print_timings()
+        return scheduler.timings
+    
+    logger.info("🎉 === 6-AGENT PIPELINE COMPLETE ===")
+    logger.info("📊 Final Stats:")
+    logger.info("   • Started with: %s articles", len(results['fetch']))
+    logger.info("   • Keyword filtered: %s articles", len(results['keyword_filter']))
+    logger.info("   • Relevant articles: %s", len(results['relevance']))
+    logger.info("   • Categories found: %s", len(results['categorization']))
+    logger.info("   • Ranking calls saved: %s", results['rank_summarize']['ranking_calls_saved'])
+    logger.info("   • Final summarized: %s", sum(len(a) for a in results['rank_summarize']['by_category'].values()))
+    if budget:
+        logger.info("   • Degraded to local fallbacks: %s", len(degraded))
+    _log_prompt_cache()
+    if config.HEDGING.get("enabled", False):
+        _log_hedging()
+    registry_stats = get_registry_stats()
+    logger.info("   • Agents built: %s in %s (reused %s times, ~%s saved)", registry_stats['built'],
+                registry_stats['construction_time'], registry_stats['reuses'], registry_stats['estimated_time_saved'])
+    scheduler.print_timings()
     
-    print("\n🎉 === 6-AGENT PIPELINE COMPLETE ===")
-    print(f"📊 Final Stats:")
-    print(f"   • Started with: {len(articles)} articles")
-    print(f"   • Keyword filtered: {len(keyword_filtered_articles)} articles")
-    print(f"   • Relevant articles: {len(relevant_articles)}")
-    print(f"   • Categories found: {len(articles_by_category)}")
-    print(f"   • Ranking calls saved: {ranking_calls_saved}")
-    print(f"   • Final summarized: {len(all_final_articles)}")
+    return scheduler.timings
 
 if __name__ == "__main__":
-    run_pipeline() 
\ No newline at end of file
+    run_pipeline()
@@ -0,0 +1,260 @@
+"""
+Per-stage profiling for pipeline runs
+Wraps each stage with cProfile (or a sampling profiler) and optionally tracemalloc,
+and writes the results as artifacts under output/profiles/<run-id>/
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+PROFILE_MODES = ("cprofile", "sample")
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 20
+
+# Package modules that only orchestrate stages - left out of the per-stage attribution
+ORCHESTRATION_MODULES = ("scheduler.py", "profiling.py", "cli.py")
+
+
+def _frame_label(code) -> str:
+    """'module.py:line(function)' for a code object, like pstats prints it"""
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+class _ThreadedCProfile:
+    """cProfile for one stage, including the worker threads the stage starts"""
+
+    def __init__(self):
+        self.profiles = []
+        self.unprofiled_threads = 0
+        self._lock = threading.Lock()
+
+    def _start_thread(self, *args):
+        # Called once in every new thread (threading.setprofile); hand over to cProfile
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows a single active cProfile; the thread's time stays in its caller
+            with self._lock:
+                self.unprofiled_threads += 1
+            return
+        with self._lock:
+            self.profiles.append(profile)
+
+    def start(self):
+        main = cProfile.Profile()
+        main.enable()
+        self.profiles.append(main)
+        threading.setprofile(self._start_thread)
+
+    def stop(self) -> pstats.Stats:
+        threading.setprofile(None)
+        self.profiles[0].disable()
+        stats = pstats.Stats(self.profiles[0], stream=io.StringIO())
+        for profile in self.profiles[1:]:
+            profile.create_stats()
+            stats.add(profile)
+        return stats
+
+
+class _SamplingProfile:
+    """Samples the stacks of all threads at a fixed interval"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.package_labels = set()
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    label = _frame_label(frame.f_code)
+                    if frame.f_code.co_filename.startswith(PACKAGE_DIR):
+                        self.package_labels.add(label)
+                    stack.append(label)
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stage-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._start
+
+    def seconds_per_sample(self) -> float:
+        """Measured time between samples (walking deep stacks makes it longer than the interval)"""
+        return self.elapsed / self.samples if self.samples else self.interval
+
+    def top_functions(self, limit: int) -> List[tuple]:
+        """(function, inclusive samples, self samples), most inclusive first"""
+        inclusive, own = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            for label in set(frames):
+                inclusive[label] += count
+            own[frames[-1]] += count
+        return [(label, count, own[label]) for label, count in inclusive.most_common(limit)]
+
+
+class StageProfiler:
+    def __init__(self, output_dir: str, mode: Optional[str] = "cprofile", trace_memory: bool = False,
+                 sample_interval: float = 0.005):
+        """
+        Initialize per-stage profiling
+
+        Args:
+            output_dir: Directory the artifacts are written to
+            mode: "cprofile", "sample" (all threads, low overhead) or None for memory only
+            trace_memory: Record tracemalloc peak and top allocations per stage
+            sample_interval: Seconds between stack samples in "sample" mode
+
+        Profilers and tracemalloc are process-wide, so stages must run one at a
+        time while profiling (the pipeline runs the scheduler with one worker).
+        """
+        if mode is not None and mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Available: {', '.join(PROFILE_MODES)}")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.trace_memory = trace_memory
+        self.sample_interval = sample_interval
+        self.summaries = {}
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+    def wrap(self, name: str, func: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+        """Wrap a stage function so each call is profiled under the stage's name"""
+        def profiled(results):
+            return self.run_stage(name, func, results)
+        return profiled
+
+    def run_stage(self, name: str, func: Callable[[Dict[str, Any]], Any], results: Dict[str, Any]) -> Any:
+        """Run one stage under the configured profilers and write its artifacts"""
+        profile = None
+        if self.mode == "cprofile":
+            profile = _ThreadedCProfile()
+        elif self.mode == "sample":
+            profile = _SamplingProfile(self.sample_interval)
+
+        if self.trace_memory:
+            tracemalloc.start(10)
+        if profile is not None:
+            profile.start()
+        start = time.perf_counter()
+        try:
+            return func(results)
+        finally:
+            elapsed = time.perf_counter() - start
+            summary = {'wall_time': elapsed}
+            if profile is not None:
+                if self.mode == "cprofile":
+                    summary.update(self._write_cprofile(name, profile.stop(), profile.unprofiled_threads))
+                else:
+                    profile.stop()
+                    summary.update(self._write_samples(name, profile))
+            if self.trace_memory:
+                summary.update(self._write_memory(name))
+                tracemalloc.stop()
+            self.summaries[name] = summary
+
+    def _write_cprofile(self, name: str, stats: pstats.Stats, unprofiled_threads: int) -> Dict[str, Any]:
+        stats.dump_stats(os.path.join(self.output_dir, f"{name}.prof"))
+
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        with open(os.path.join(self.output_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+            if unprofiled_threads:
+                f.write(f"Note: {unprofiled_threads} worker threads could not be profiled "
+                        f"(use --profile sample to include them)\n\n")
+            f.write(report.getvalue())
+
+        # Package functions by cumulative time attribute the stage to fetcher/agents/distributor
+        package = []
+        for (filename, line, function), (_, _, _, cumulative, _) in stats.stats.items():
+            label = f"{os.path.basename(filename)}:{line}({function})"
+            if os.path.abspath(filename).startswith(PACKAGE_DIR) and _attributable(label):
+                package.append((cumulative, label))
+        package.sort(reverse=True)
+        return {'top_package_functions': [(label, seconds) for seconds, label in package[:8]]}
+
+    def _write_samples(self, name: str, profile: _SamplingProfile) -> Dict[str, Any]:
+        # Collapsed stacks: load into speedscope or flamegraph.pl
+        with open(os.path.join(self.output_dir, f"{name}.folded"), "w", encoding="utf-8") as f:
+            for stack, count in profile.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        top = profile.top_functions(TOP_FUNCTIONS)
+        with open(os.path.join(self.output_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"{profile.samples} samples, one every {profile.seconds_per_sample() * 1000:.1f}ms "
+                    f"(all threads)\n\n")
+            f.write(f"{'inclusive':>10} {'self':>8}  function\n")
+            for label, inclusive, own in top:
+                f.write(f"{inclusive:>10} {own:>8}  {label}\n")
+
+        package = [(label, inclusive * profile.seconds_per_sample()) for label, inclusive, _ in
+                   profile.top_functions(len(profile.stacks) * 64)
+                   if label in profile.package_labels and _attributable(label)]
+        return {'top_package_functions': package[:8]}
+
+    def _write_memory(self, name: str) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ])
+        with open(os.path.join(self.output_dir, f"{name}.memory.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Peak: {peak / 1024 / 1024:.2f} MiB, still allocated at stage end: "
+                    f"{current / 1024 / 1024:.2f} MiB\n\n")
+            f.write(f"Top {TOP_ALLOCATIONS} allocation sites still alive at stage end:\n")
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+        return {'memory_peak': peak, 'memory_retained': current}
+
+    def write_summary(self) -> str:
+        """Write summary.txt (per-stage wall time, hottest package functions, memory) and return its path"""
+        path = os.path.join(self.output_dir, "summary.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            if self.mode == "cprofile":
+                f.write("Per stage: wall time, then package functions by cumulative time\n\n")
+            elif self.mode == "sample":
+                f.write("Per stage: wall time, then package functions by sampled thread-seconds\n\n")
+            for name, summary in self.summaries.items():
+                f.write(f"== {name}: {summary['wall_time']:.2f}s")
+                if 'memory_peak' in summary:
+                    f.write(f", peak {summary['memory_peak'] / 1024 / 1024:.2f} MiB")
+                f.write("\n")
+                for label, seconds in summary.get('top_package_functions', []):
+                    f.write(f"   {seconds:8.3f}s  {label}\n")
+        return path
+
+
+def _attributable(label: str) -> bool:
+    """Whether a package function should appear in the per-stage attribution"""
+    return (not label.startswith(ORCHESTRATION_MODULES)
+            and not label.endswith(("(<module>)", "(run_pipeline)")))
@@ -0,0 +1,63 @@
+"""
+Shared prompt layout for the LLM agents
+Every agent prompt puts its static instructions and response format in the system message
+and only the per-call fields (article text, article lists) in the user message, last, so
+the leading tokens are identical across calls - which is what provider-side prefix caching
+matches on. Prompts that are long anyway (article lists, full article text) also open with
+a newsletter preamble shared across agents; short per-article prompts don't, because they
+stay under the provider's caching threshold and the preamble would only add input tokens.
+Cached prompt tokens are reported per agent (llm_tokens_total kind="cached").
+"""
+from functools import lru_cache
+from . import config
+
+# Editorial guidelines every agent works to (static - changing them invalidates prefix caches)
+GUIDELINES = [
+    "Prefer concrete facts - names, versions, numbers, dates and results - over adjectives.",
+    "Emphasize what is new, why it matters and who should care.",
+    "Treat vendor announcements and press releases with measured skepticism.",
+    "Ignore navigation text, cookie notices, ads and other boilerplate in article text.",
+    "Never add details that are not in the article text.",
+    "Write in clear, neutral, professional English.",
+]
+
+
+@lru_cache(maxsize=1)
+def newsletter_preamble() -> str:
+    """The static preamble shared by every agent prompt (audience, topics, sections, guidelines)"""
+    sections = "\n".join(f"- {name}: {category.get('description', ', '.join(category['keywords']))}"
+                         for name, category in config.CATEGORIES.items())
+    guidelines = "\n".join(f"- {guideline}" for guideline in GUIDELINES)
+    return (
+        "You are one agent in an editorial pipeline that produces an AI news digest for a "
+        "tech-savvy professional audience: engineers, product leaders and decision makers "
+        "building with AI.\n\n"
+        f"Topics of interest: {', '.join(config.TOPICS_OF_INTEREST)}.\n\n"
+        f"The digest is organized in these sections:\n{sections}\n\n"
+        f"Editorial guidelines:\n{guidelines}"
+    )
+
+
+def chat_prompt(instructions: str, user_template: str, preamble: bool = False):
+    """
+    Build an agent prompt: static instructions first, per-call fields last
+
+    Args:
+        instructions: The agent's task and response format (static; may use {{ }} for literal braces)
+        user_template: The per-call fields, with {placeholders}
+        preamble: Open the system message with the shared newsletter preamble (only for
+            prompts above the provider's prefix caching threshold, e.g. article lists)
+
+    Returns:
+        A ChatPromptTemplate with a system and a user message
+    """
+    # LangChain is imported on first use so the package imports fast
+    from langchain.prompts import ChatPromptTemplate
+
+    system = instructions
+    if preamble:
+        system = f"{newsletter_preamble().replace('{', '{{').replace('}', '}}')}\n\n{instructions}"
+    return ChatPromptTemplate.from_messages([
+        ("system", system),
+        ("user", user_template),
+    ])
@@ -3,100 +3,305 @@ Agent 4: Ranking Agent
 Orders articles by priority based on innovation, utility, and strategic impact
 """
 from typing import List, Dict, Any
-from . import config
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain_community.cache import SQLiteCache
-from langchain.globals import set_llm_cache
+from . import config, deadline
+import sqlite3
 import os
-import json
-from .cache_utils import CacheTracker
+import hashlib
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from .agent_registry import get_agent
+from .llm_backends import create_chat_model, get_cache_dir, requires_api_key
+from .cache_utils import CacheTracker, save_parse_failure, setup_llm_cache
+from .prompts import chat_prompt
+from .logging_utils import ItemLogger, fingerprint, get_logger
+from .keyword_filter import score_relevance
+from .structured_output import (
+    ParseTracker, StructuredOutputError, json_mode_kwargs, parse_ranking, parse_structured,
+    RANKING_SCORE_SCHEMA,
+)
+
+logger = get_logger("ranking")
 
 class RankingAgent:
-    def __init__(self, api_key=None, model=None):
+    def __init__(self, api_key=None, model=None, mode=None):
         """Initialize the Ranking Agent"""
         self.api_key = api_key or config.OPENAI_API_KEY
-        if not self.api_key:
+        if not self.api_key and requires_api_key():
             raise ValueError("OpenAI API key is required")
         
         # Set up cache
-        self.cache_dir = "cache"
+        self.cache_dir = get_cache_dir()
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
         
-        set_llm_cache(SQLiteCache(database_path=f"{self.cache_dir}/langchain.db"))
+        self.cache_db = f"{self.cache_dir}/langchain.db"
+        setup_llm_cache(self.cache_db)
         
-        # Initialize cache tracker
-        self.cache_tracker = CacheTracker()
+        # Initialize cache and parse trackers
+        self.cache_tracker = CacheTracker(agent="ranking")
+        self.parse_tracker = ParseTracker()
+        self.item_log = ItemLogger(logger)
         
         # Use GPT-3.5 Turbo for ranking (cost-effective)
         self.model = model or config.MODELS.get("ranking", config.OPENAI_MODEL)
-        print(f"📊 RANKING AGENT: Using {self.model} for cost-effective ranking")
+        self.mode = mode or config.RANKING.get("mode", "listwise")
+        self.chunk_size = config.RANKING.get("chunk_size", 20)
+        self.max_workers = config.RANKING.get("max_workers", 4)
+        logger.info("📊 RANKING AGENT: Using %s for cost-effective %s ranking", self.model, self.mode)
         
         # Initialize LangChain components
-        self.llm = ChatOpenAI(
-            model_name=self.model,
-            openai_api_key=self.api_key,
+        self.llm = create_chat_model(
+            model=self.model,
+            api_key=self.api_key,
             temperature=0.2,
-            request_timeout=30
+            request_timeout=30,
+            model_kwargs=json_mode_kwargs(self.model),
+            agent="ranking"
         )
         
         # Ranking prompt
-        self.ranking_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a ranking agent. Order articles by priority based on innovation, utility, and strategic impact for a tech-savvy AI audience."),
-            ("user", """Rank the following articles from most to least relevant for a tech-savvy AI audience based on innovation, utility, or strategic impact.
+        self.ranking_prompt = chat_prompt(
+            """You are the ranking agent. Rank the articles from most to least relevant for the audience based on innovation, utility, or strategic impact.
 
-Articles:
-{articles}
+Return a JSON object with the article indices (0-based) in order of importance:
+{{"ranking": [2, 0, 1, 3, 4]}}""",
+            """Articles:
+{articles}""",
+            preamble=True
+        )
+        
+        # Pointwise scoring prompt (one article at a time, so scores can be cached per article)
+        self.scoring_prompt = chat_prompt(
+            """You are a ranking agent. Score articles by priority based on innovation, utility, and strategic impact for a tech-savvy AI audience.
 
-Return a JSON array of article indices (0-based) in order of importance: [2, 0, 1, 3, 4]""")
-        ])
+Score the importance of this article for a tech-savvy AI audience based on innovation, utility, or strategic impact, from 0 (not important) to 10 (must read).
 
-    def rank_articles(self, articles: List[Dict[str, Any]], max_articles: int = 5) -> List[Dict[str, Any]]:
-        """Rank articles by importance and return top N"""
-        if len(articles) <= max_articles:
-            return articles
+Respond with JSON:
+{{
+  "score": 0-10,
+  "reason": "..."
+}}""",
+            """Title: {title}
+Source: {source}
+Summary: {summary}"""
+        )
+    
+    def _get_cache_key(self, title: str, content: str) -> str:
+        """Generate a cache key (article fingerprint) for an importance score"""
+        text = f"rank_score:{title}:{content}"
+        return hashlib.md5(text.encode()).hexdigest()
+    
+    def _check_cache(self, cache_key: str) -> tuple:
+        """Check if an article's importance score is cached"""
+        conn = sqlite3.connect(self.cache_db)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS article_rank_scores
+        (cache_key TEXT PRIMARY KEY, score REAL, reason TEXT, timestamp TEXT)
+        """)
+        
+        cursor.execute("SELECT score, reason FROM article_rank_scores WHERE cache_key = ?", (cache_key,))
+        result = cursor.fetchone()
         
-        print(f"\n📊 RANKING AGENT: Ranking {len(articles)} articles, selecting top {max_articles}...")
+        conn.close()
+        return result if result else (None, None)
+    
+    def _save_cache(self, cache_key: str, score: float, reason: str):
+        """Save an importance score to cache"""
+        conn = sqlite3.connect(self.cache_db)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "INSERT OR REPLACE INTO article_rank_scores (cache_key, score, reason, timestamp) VALUES (?, ?, ?, ?)",
+            (cache_key, score, reason, datetime.now().isoformat())
+        )
         
-        # Prepare article summaries for ranking
+        conn.commit()
+        conn.close()
+    
+    def score_article(self, article: Dict[str, Any]) -> float:
+        """Get an article's 0-10 importance score, calling the LLM only on a cache miss"""
+        title = article.get('title', 'No Title')
+        summary = article.get('summary', article.get('content', ''))[:200]
+        source = article.get('source', 'Unknown')
+        
+        cache_key = self._get_cache_key(title, summary)
+        cached_score, cached_reason = self._check_cache(cache_key)
+        
+        if cached_score is not None:
+            self.cache_tracker.record_hit()
+            article['importance_score'] = cached_score
+            article['importance_reason'] = cached_reason
+            return cached_score
+        
+        self.cache_tracker.record_miss()
+        
+        if deadline.expired("rank_summarize"):
+            # Out of time: keyword score for this run only (not cached)
+            deadline.degrade("ranking", article, "keyword score")
+            article['importance_score'] = float(score_relevance(article))
+            article['importance_reason'] = 'Keyword score (run deadline)'
+            return article['importance_score']
+        
+        try:
+            response = (self.scoring_prompt | self.llm).invoke({
+                "title": title,
+                "source": source,
+                "summary": summary
+            })
+            
+            try:
+                result = parse_structured(response.content, RANKING_SCORE_SCHEMA, self.parse_tracker)
+                score = result['score']
+                reason = result['reason']
+            except StructuredOutputError:
+                save_parse_failure(self.cache_db, "ranking_score", cache_key, response.content)
+                score = float(score_relevance(article))
+                reason = 'Keyword score (unparseable model response)'
+            
+            self._save_cache(cache_key, score, reason)
+            
+        except Exception as e:
+            # Network/API errors are not cached, the article is scored by keywords for this run
+            self.item_log.warning("score_error", "Error scoring '%s': %s", title, e,
+                                  stage="ranking", article=fingerprint(article))
+            score = float(score_relevance(article))
+            reason = 'Keyword score (ranking call failed)'
+        
+        article['importance_score'] = score
+        article['importance_reason'] = reason
+        return score
+    
+    def _rank_pointwise(self, articles: List[Dict[str, Any]], max_articles: int) -> List[Dict[str, Any]]:
+        """Score each article independently and select the top N with a heap"""
+        scores = [self.score_article(article) for article in articles]
+        
+        # nlargest is stable, so ties keep their incoming (keyword match) order
+        top_indices = heapq.nlargest(max_articles, range(len(articles)), key=lambda i: scores[i])
+        ranked_articles = [articles[i] for i in top_indices]
+        self.item_log.flush()
+        logger.info("✅ Selected top %d articles", len(ranked_articles))
+        
+        stats = self.cache_tracker.get_stats()
+        logger.info("Cache Stats - Hits: %s, Misses: %s, Hit Rate: %s", stats['hits'], stats['misses'], stats['hit_rate'])
+        
+        return ranked_articles
+
+    def _ranking_input(self, articles: List[Dict[str, Any]]) -> str:
+        """Numbered article list for the listwise ranking prompt"""
         article_texts = []
         for i, article in enumerate(articles):
             title = article.get('title', 'No Title')
             summary = article.get('summary', article.get('content', ''))[:200]
             source = article.get('source', 'Unknown')
             article_texts.append(f"[{i}] {title} (from {source})\n{summary}")
-        
+        return "\n\n".join(article_texts)
+
+    def _rank_listwise(self, articles: List[Dict[str, Any]], max_articles: int) -> List[Dict[str, Any]]:
+        """Rank a list of articles in a single prompt, returning the top N or None on failure"""
         try:
             response = (self.ranking_prompt | self.llm).invoke({
-                "articles": "\n\n".join(article_texts)
+                "articles": self._ranking_input(articles)
             })
             
-            # Parse indices from response
-            response_text = response.content.strip()
-            if response_text.startswith('[') and response_text.endswith(']'):
-                indices = json.loads(response_text)
-                indices = indices[:max_articles]
-                ranked_articles = [articles[i] for i in indices if i < len(articles)]
-                print(f"✅ Selected top {len(ranked_articles)} articles")
-                
-                # Print cache statistics
-                stats = self.cache_tracker.get_stats()
-                print(f"Cache Stats - Hits: {stats['hits']}, Misses: {stats['misses']}, Hit Rate: {stats['hit_rate']}")
-                
-                return ranked_articles
+            # Parse indices from response (bare array, {"ranking": [...]}, fenced or in prose)
+            indices = parse_ranking(response.content, len(articles), self.parse_tracker)
+            if indices:
+                return [articles[i] for i in indices[:max_articles]]
             
+        except StructuredOutputError as e:
+            parse_stats = self.parse_tracker.get_stats()
+            self.item_log.warning("parse_error", "Error parsing ranking response: %s (parse failures so far: %s)",
+                                  e, parse_stats['failures'], stage="ranking")
         except Exception as e:
-            print(f"Error in ranking agent: {str(e)}")
+            self.item_log.warning("error", "Error in ranking agent: %s", e, stage="ranking")
+        
+        return None
+    
+    def _rank_by_keywords(self, articles: List[Dict[str, Any]], max_articles: int,
+                          degraded: bool = False) -> List[Dict[str, Any]]:
+        """Top N by keyword match score (the local fallback when the LLM can't rank)"""
+        ranked_articles = sorted(
+            articles,
+            key=lambda a: (a.get('match_score', 0), score_relevance(a)),
+            reverse=True
+        )[:max_articles]
+        if degraded:
+            for article in ranked_articles:
+                deadline.degrade("ranking", article, "keyword ranking")
+        return ranked_articles
+    
+    def _chunk_winners(self, chunk: List[Dict[str, Any]], max_articles: int) -> List[Dict[str, Any]]:
+        """Rank one tournament chunk; a failed chunk falls back to keyword scores"""
+        if deadline.expired("rank_summarize"):
+            return self._rank_by_keywords(chunk, max_articles, degraded=True)
+        
+        winners = self._rank_listwise(chunk, max_articles)
+        if winners:
+            return winners
+        
+        self.item_log.warning("chunk_fallback", "⚠️ Chunk ranking failed, using keyword scores for %d articles",
+                              len(chunk), stage="ranking")
+        return self._rank_by_keywords(chunk, max_articles)
+    
+    def _rank_tournament(self, articles: List[Dict[str, Any]], max_articles: int) -> List[Dict[str, Any]]:
+        """Rank fixed-size chunks concurrently, then rank the chunk winners until one prompt remains"""
+        # Each chunk must be at least twice the winners it yields, so every round shrinks
+        chunk_size = max(self.chunk_size, 2 * max_articles)
+        candidates = articles
+        round_number = 1
+        
+        while len(candidates) > chunk_size:
+            chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+            logger.info("🏁 Round %d: ranking %d articles in %d chunks of ≤%d...",
+                        round_number, len(candidates), len(chunks), chunk_size)
+            
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                chunk_winners = list(executor.map(lambda chunk: self._chunk_winners(chunk, max_articles), chunks))
+            
+            candidates = [article for winners in chunk_winners for article in winners]
+            round_number += 1
+        
+        logger.info("🏁 Final round: ranking %d chunk winners...", len(candidates))
+        return self._chunk_winners(candidates, max_articles)
+
+    def rank_articles(self, articles: List[Dict[str, Any]], max_articles: int = 5) -> List[Dict[str, Any]]:
+        """Rank articles by importance and return top N"""
+        if len(articles) <= max_articles:
+            return articles
+        
+        logger.info("📊 RANKING AGENT: Ranking %d articles, selecting top %d...", len(articles), max_articles)
+        
+        if self.mode == "pointwise":
+            return self._rank_pointwise(articles, max_articles)
+        
+        if self.mode == "tournament":
+            ranked_articles = self._rank_tournament(articles, max_articles)
+        elif deadline.expired("rank_summarize"):
+            ranked_articles = self._rank_by_keywords(articles, max_articles, degraded=True)
+        else:
+            ranked_articles = self._rank_listwise(articles, max_articles)
+        
+        self.item_log.flush()
+        if ranked_articles:
+            logger.info("✅ Selected top %d articles", len(ranked_articles))
+            
+            # Log cache statistics
+            stats = self.cache_tracker.get_stats()
+            logger.info("Cache Stats - Hits: %s, Misses: %s, Hit Rate: %s", stats['hits'], stats['misses'], stats['hit_rate'])
+            
+            return ranked_articles
         
         # Fallback: return first N articles
-        print(f"⚠️ Ranking failed, returning first {max_articles} articles")
+        logger.warning("⚠️ Ranking failed, returning first %d articles", max_articles)
         return articles[:max_articles]
 
 # Helper function for easy use
 def rank_articles_by_importance(articles: List[Dict[str, Any]], max_articles: int = 5) -> List[Dict[str, Any]]:
     """Helper function for ranking articles"""
-    agent = RankingAgent()
+    agent = get_agent("ranking")
     return agent.rank_articles(articles, max_articles)
 
 if __name__ == "__main__":
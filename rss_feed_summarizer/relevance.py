@@ -3,63 +3,111 @@ Agent 2: Relevance Agent
 Filters articles for relevance to AI topics
 """
 from typing import List, Dict, Any
-from . import config
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain_community.cache import SQLiteCache
-from langchain.globals import set_llm_cache
+from . import config, deadline
 import sqlite3
 import os
 import hashlib
-import json
+import logging
+import time
 from datetime import datetime
-from .cache_utils import CacheTracker
+from .agent_registry import get_agent
+from .llm_backends import create_chat_model, get_cache_dir, requires_api_key
+from .cache_utils import CacheTracker, save_parse_failure, setup_llm_cache
+from .prompts import chat_prompt
+from .logging_utils import ItemLogger, fingerprint, get_logger
+from .structured_output import (
+    ParseTracker, StructuredOutputError, json_mode_kwargs, parse_structured,
+    RELEVANCE_SCHEMA, RELEVANCE_CASCADE_SCHEMA,
+)
+
+logger = get_logger("relevance")
+
+# Per-article fields (the only part of the prompt that changes between calls)
+RELEVANCE_FIELDS = """Title: {title}
+Source: {source}
+Summary: {summary}"""
 
 class RelevanceAgent:
-    def __init__(self, api_key=None, model=None):
+    def __init__(self, api_key=None, model=None, cascade=None):
         """Initialize the Relevance Agent"""
         self.api_key = api_key or config.OPENAI_API_KEY
-        if not self.api_key:
+        if not self.api_key and requires_api_key():
             raise ValueError("OpenAI API key is required")
         
         # Set up cache
-        self.cache_dir = "cache"
+        self.cache_dir = get_cache_dir()
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
         
         self.cache_db = f"{self.cache_dir}/langchain.db"
-        set_llm_cache(SQLiteCache(database_path=self.cache_db))
+        setup_llm_cache(self.cache_db)
         
-        # Initialize cache tracker
-        self.cache_tracker = CacheTracker()
+        # Initialize cache and parse trackers
+        self.cache_tracker = CacheTracker(agent="relevance")
+        self.parse_tracker = ParseTracker()
+        self.item_log = ItemLogger(logger)
         
         # Use GPT-4 for relevance filtering (high quality critical task)
         self.model = model or config.MODELS.get("relevance", config.OPENAI_MODEL)
-        print(f"🔍 RELEVANCE AGENT: Using {self.model} for high-quality filtering")
+        logger.info("🔍 RELEVANCE AGENT: Using %s for high-quality filtering", self.model)
         
         # Initialize LangChain components
-        self.llm = ChatOpenAI(
-            model_name=self.model,
-            openai_api_key=self.api_key,
+        self.llm = create_chat_model(
+            model=self.model,
+            api_key=self.api_key,
             temperature=0.2,
-            request_timeout=30
+            request_timeout=30,
+            model_kwargs=json_mode_kwargs(self.model),
+            agent="relevance"
         )
         
+        # Optional cascade: a cheaper model screens first, low-confidence items escalate
+        cascade = cascade if cascade is not None else config.RELEVANCE_CASCADE
+        self.cascade_enabled = cascade.get("enabled", False)
+        self.confidence_threshold = cascade.get("confidence_threshold", 0.8)
+        self.fast_model = cascade.get("fast_model", config.OPENAI_MODEL)
+        self.cascade_stats = {"fast_accepted": 0, "escalated": 0}
+        
+        if self.cascade_enabled:
+            logger.info("🔍 RELEVANCE AGENT: Cascade enabled - %s screens first, escalating below %.2f confidence",
+                        self.fast_model, self.confidence_threshold)
+            self.fast_llm = create_chat_model(
+                model=self.fast_model,
+                api_key=self.api_key,
+                temperature=0.0,
+                request_timeout=30,
+                model_kwargs=json_mode_kwargs(self.fast_model),
+                agent="relevance_fast"
+            )
+        
         # Relevance filtering prompt
-        self.relevance_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a relevance filtering agent for an AI newsletter. Filter articles for AI tools, models, infrastructure, enterprise use cases, or industry trends."),
-            ("user", """Is this article relevant to AI tools, models, infrastructure, enterprise use cases, or industry trends?
+        self.relevance_prompt = chat_prompt(
+            """You are a relevance filtering agent for an AI newsletter. Filter articles for AI tools, models, infrastructure, enterprise use cases, or industry trends.
 
-Title: {title}
-Source: {source}
-Summary: {summary}
+Is this article relevant to AI tools, models, infrastructure, enterprise use cases, or industry trends?
+
+Respond with JSON:
+{{
+  "is_relevant": true/false,
+  "reason": "..."
+}}""",
+            RELEVANCE_FIELDS
+        )
+        
+        # Fast screening prompt (same question, plus a self-reported confidence)
+        self.fast_relevance_prompt = chat_prompt(
+            """You are a relevance filtering agent for an AI newsletter. Filter articles for AI tools, models, infrastructure, enterprise use cases, or industry trends. Be honest about your confidence: use a low confidence for borderline articles.
+
+Is this article relevant to AI tools, models, infrastructure, enterprise use cases, or industry trends?
 
 Respond with JSON:
 {{
   "is_relevant": true/false,
+  "confidence": 0.0-1.0,
   "reason": "..."
-}}""")
-        ])
+}}""",
+            RELEVANCE_FIELDS
+        )
     
     def _get_cache_key(self, title: str, content: str) -> str:
         """Generate a cache key for an article"""
@@ -94,10 +142,115 @@ Respond with JSON:
         
         conn.commit()
         conn.close()
+    
+    def _check_fast_cache(self, cache_key: str) -> tuple:
+        """Check if a fast-model screening decision is cached"""
+        conn = sqlite3.connect(self.cache_db)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS article_relevance_fast
+        (cache_key TEXT PRIMARY KEY, model TEXT, is_relevant BOOLEAN, confidence REAL, reason TEXT, timestamp TEXT)
+        """)
+        
+        cursor.execute(
+            "SELECT is_relevant, confidence, reason FROM article_relevance_fast WHERE cache_key = ? AND model = ?",
+            (cache_key, self.fast_model)
+        )
+        result = cursor.fetchone()
+        
+        conn.close()
+        return result if result else (None, None, None)
+    
+    def _save_fast_cache(self, cache_key: str, is_relevant: bool, confidence: float, reason: str):
+        """Save fast-model screening decision to cache"""
+        conn = sqlite3.connect(self.cache_db)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "INSERT OR REPLACE INTO article_relevance_fast (cache_key, model, is_relevant, confidence, reason, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            (cache_key, self.fast_model, is_relevant, confidence, reason, datetime.now().isoformat())
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def _check_confident_fast_cache(self, cache_key: str) -> tuple:
+        """Return a cached fast decision only if it clears the confidence threshold"""
+        cached_relevant, cached_confidence, cached_reason = self._check_fast_cache(cache_key)
+        if cached_relevant is not None and cached_confidence >= self.confidence_threshold:
+            return bool(cached_relevant), cached_reason
+        return None, None
+    
+    def _screen_fast(self, cache_key: str, title: str, source: str, summary: str) -> tuple:
+        """Get the fast model's decision, from cache or by calling the fast model"""
+        cached_relevant, cached_confidence, cached_reason = self._check_fast_cache(cache_key)
+        if cached_relevant is not None:
+            return bool(cached_relevant), cached_confidence, cached_reason
+        
+        response = (self.fast_relevance_prompt | self.fast_llm).invoke({
+            "title": title,
+            "source": source,
+            "summary": summary
+        })
+        
+        try:
+            result = parse_structured(response.content, RELEVANCE_CASCADE_SCHEMA, self.parse_tracker)
+        except StructuredOutputError:
+            # Keep the raw text and cache a zero-confidence decision so it escalates without a re-call
+            save_parse_failure(self.cache_db, "relevance_fast", cache_key, response.content)
+            result = {'is_relevant': False, 'confidence': 0.0, 'reason': 'Unparseable fast screening response'}
+        
+        is_relevant = result['is_relevant']
+        confidence = result['confidence']
+        reason = result['reason']
+        
+        self._save_fast_cache(cache_key, is_relevant, confidence, reason)
+        return is_relevant, confidence, reason
+    
+    def _evaluate(self, cache_key: str, title: str, source: str, summary: str) -> tuple:
+        """Evaluate an article with the configured model, via the cascade if enabled"""
+        if self.cascade_enabled:
+            try:
+                is_relevant, confidence, reason = self._screen_fast(cache_key, title, source, summary)
+                if confidence >= self.confidence_threshold:
+                    self.cascade_stats["fast_accepted"] += 1
+                    return is_relevant, reason
+            except Exception as e:
+                self.item_log.warning("fast_error", "Fast relevance screening failed for '%s': %s", title, e,
+                                      stage="relevance", agent="relevance_fast")
+            
+            # Low confidence (or failed screening) - escalate to the expensive model
+            self.cascade_stats["escalated"] += 1
+        
+        response = (self.relevance_prompt | self.llm).invoke({
+            "title": title,
+            "source": source,
+            "summary": summary
+        })
+        
+        return self._save_response(cache_key, response.content)
+    
+    def _save_response(self, cache_key: str, content: str) -> tuple:
+        """Parse a relevance response and cache the decision (also used for Batch API results)"""
+        try:
+            result = parse_structured(content, RELEVANCE_SCHEMA, self.parse_tracker)
+            is_relevant = result['is_relevant']
+            reason = result['reason']
+        except StructuredOutputError:
+            # Don't drop the article or pay for the call again: it already passed the
+            # keyword filter, so keep it and cache the decision with the raw response
+            save_parse_failure(self.cache_db, "relevance", cache_key, content)
+            is_relevant = True
+            reason = 'Kept by keyword filter (unparseable relevance response)'
+        
+        self._save_cache(cache_key, is_relevant, reason)
+        return is_relevant, reason
 
     def filter_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter articles for relevance to AI topics"""
-        print(f"\n🔍 RELEVANCE AGENT: Filtering {len(articles)} articles...")
+        logger.info("🔍 RELEVANCE AGENT: Filtering %d articles...", len(articles))
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         relevant_articles = []
         for article in articles:
@@ -107,47 +260,78 @@ Respond with JSON:
             
             cache_key = self._get_cache_key(title, summary)
             cached_relevant, cached_reason = self._check_cache(cache_key)
+            if cached_relevant is None and self.cascade_enabled:
+                cached_relevant, cached_reason = self._check_confident_fast_cache(cache_key)
             
             if cached_relevant is not None:
                 self.cache_tracker.record_hit()
+                if debug:
+                    self.item_log.debug("decision", "Cached decision: %s", "relevant" if cached_relevant else "not relevant",
+                                        stage="relevance", article=fingerprint(article))
                 if cached_relevant:
                     article['relevance_reason'] = cached_reason
                     relevant_articles.append(article)
             else:
                 self.cache_tracker.record_miss()
                 
+                if deadline.expired("relevance"):
+                    # Out of time: keep it on the keyword filter's say-so, without caching the decision
+                    deadline.degrade("relevance", article, "keyword filter")
+                    article['relevance_reason'] = 'Kept by keyword filter (run deadline)'
+                    relevant_articles.append(article)
+                    continue
+                
                 try:
-                    response = (self.relevance_prompt | self.llm).invoke({
-                        "title": title,
-                        "source": source,
-                        "summary": summary
-                    })
-                    
-                    result = json.loads(response.content.strip())
-                    is_relevant = result.get('is_relevant', False)
-                    reason = result.get('reason', 'No reason provided')
-                    
-                    self._save_cache(cache_key, is_relevant, reason)
+                    started = time.perf_counter()
+                    is_relevant, reason = self._evaluate(cache_key, title, source, summary)
+                    if debug:
+                        self.item_log.debug("decision", "Evaluated: %s", "relevant" if is_relevant else "not relevant",
+                                            stage="relevance", article=fingerprint(article),
+                                            duration=f"{time.perf_counter() - started:.2f}s")
                     
                     if is_relevant:
                         article['relevance_reason'] = reason
                         relevant_articles.append(article)
                         
                 except Exception as e:
-                    print(f"Error in relevance agent for '{title}': {str(e)}")
+                    self.item_log.warning("error", "Relevance evaluation failed for '%s': %s", title, e,
+                                          stage="relevance", article=fingerprint(article))
         
-        print(f"✅ Found {len(relevant_articles)} relevant articles ({len(relevant_articles)/len(articles)*100:.1f}%)")
+        self.item_log.flush()
+        logger.info("✅ Found %d relevant articles (%.1f%%)", len(relevant_articles),
+                    len(relevant_articles) / len(articles) * 100 if articles else 0)
         
-        # Print cache statistics
+        # Log cache statistics
         stats = self.cache_tracker.get_stats()
-        print(f"Cache Stats - Hits: {stats['hits']}, Misses: {stats['misses']}, Hit Rate: {stats['hit_rate']}")
+        logger.info("Cache Stats - Hits: %s, Misses: %s, Hit Rate: %s", stats['hits'], stats['misses'], stats['hit_rate'])
+        
+        parse_stats = self.parse_tracker.get_stats()
+        logger.info("Parse Stats - Clean: %s, Recovered: %s, Failures: %s",
+                    parse_stats['clean'], parse_stats['recovered'], parse_stats['failures'])
+        
+        if self.cascade_enabled:
+            cascade_stats = self.get_cascade_stats()
+            logger.info("Cascade Stats - Fast: %s, Escalated: %s, Escalation Rate: %s",
+                        cascade_stats['fast_accepted'], cascade_stats['escalated'], cascade_stats['escalation_rate'])
         
         return relevant_articles
+    
+    def get_cascade_stats(self) -> Dict[str, Any]:
+        """Get fast-accept vs escalation counts for this agent's cascade decisions"""
+        fast_accepted = self.cascade_stats["fast_accepted"]
+        escalated = self.cascade_stats["escalated"]
+        total = fast_accepted + escalated
+        escalation_rate = (escalated / total * 100) if total > 0 else 0
+        return {
+            'fast_accepted': fast_accepted,
+            'escalated': escalated,
+            'escalation_rate': f"{escalation_rate:.1f}%"
+        }
 
 # Helper function for easy use
 def filter_relevant_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Helper function for relevance filtering"""
-    agent = RelevanceAgent()
+    agent = get_agent("relevance")
     return agent.filter_articles(articles)
 
 if __name__ == "__main__":
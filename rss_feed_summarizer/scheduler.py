@@ -0,0 +1,162 @@
+"""
+Stage DAG scheduler for the pipeline
+Runs each stage as soon as all of its dependencies have finished, so independent
+stages (e.g. macro summary and categorization) overlap on a thread pool
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Sequence
+from .logging_utils import get_logger
+
+logger = get_logger("scheduler")
+
+
+class StopPipeline(Exception):
+    """Raised by a stage to end the run cleanly (e.g. nothing left to process)"""
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Sequence[str] = ()):
+        """
+        A named unit of pipeline work
+
+        Args:
+            name: Unique stage name (used as the key of its result)
+            func: Called with a dict of all results so far; returns the stage result
+            deps: Names of the stages that must finish first
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+
+
+class StageScheduler:
+    def __init__(self, stages: List[Stage], max_workers: int = 4, checkpoint=None):
+        """
+        Initialize the scheduler
+
+        Args:
+            stages: Stages to run; dependencies must refer to stages in this list
+            max_workers: Maximum number of stages running at the same time
+            checkpoint: Optional RunCheckpoint - completed stages are loaded from it
+                instead of re-running, and every newly completed stage is saved to it
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers
+        self.checkpoint = checkpoint
+        self.resumed = []
+        self.results = {}
+        self.timings = {}
+        self.stopped = None
+
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        """Reject dependency cycles up front instead of deadlocking at run time"""
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _run_stage(self, stage: Stage, run_start: float) -> Any:
+        """Run one stage and record its timing relative to the start of the run"""
+        start = time.perf_counter()
+        try:
+            if self.checkpoint is not None and self.checkpoint.has(stage.name):
+                logger.info("⏩ Resuming '%s' from checkpoint", stage.name, extra={'stage': stage.name})
+                self.resumed.append(stage.name)
+                return self.checkpoint.load(stage.name)
+
+            result = stage.func(self.results)
+            if self.checkpoint is not None:
+                self.checkpoint.save(stage.name, result)
+            return result
+        finally:
+            end = time.perf_counter()
+            self.timings[stage.name] = {
+                'start': start - run_start,
+                'end': end - run_start,
+                'duration': end - start,
+            }
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run all stages in dependency order, overlapping independent ones
+
+        Returns:
+            Dict of stage name -> result. If a stage raised StopPipeline, stages that
+            depend on it are skipped and `stopped` holds the stop message.
+        """
+        run_start = time.perf_counter()
+        pending = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                if self.stopped is None:
+                    ready = [stage for stage in pending.values()
+                             if all(dep in self.results for dep in stage.deps)]
+                    for stage in ready:
+                        del pending[stage.name]
+                        running[executor.submit(self._run_stage, stage, run_start)] = stage
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        self.results[stage.name] = future.result()
+                    except StopPipeline as e:
+                        self.stopped = str(e) or stage.name
+
+        self.timings['total'] = {'start': 0.0, 'end': time.perf_counter() - run_start,
+                                 'duration': time.perf_counter() - run_start}
+        return self.results
+
+    def critical_path(self) -> List[str]:
+        """Longest chain of dependent stages by duration (what bounds the run's wall time)"""
+        best = {}
+
+        def chain(name):
+            if name not in best:
+                duration = self.timings.get(name, {}).get('duration', 0.0)
+                previous = max((chain(dep) for dep in self.stages[name].deps),
+                               key=lambda item: item[0], default=(0.0, []))
+                best[name] = (previous[0] + duration, previous[1] + [name])
+            return best[name]
+
+        finished = [name for name in self.stages if name in self.timings]
+        if not finished:
+            return []
+        return max((chain(name) for name in finished), key=lambda item: item[0])[1]
+
+    def print_timings(self):
+        """Log per-stage timings and the critical path"""
+        logger.info("⏱️ Stage Timings:")
+        for name in self.stages:
+            if name in self.timings:
+                timing = self.timings[name]
+                logger.info("   • %s: %.2fs (started at +%.2fs)", name, timing['duration'], timing['start'])
+        path = self.critical_path()
+        if path:
+            path_time = sum(self.timings[name]['duration'] for name in path)
+            logger.info("   • Critical path: %s (%.2fs)", ' → '.join(path), path_time)
+        if 'total' in self.timings:
+            logger.info("   • Wall time: %.2fs", self.timings['total']['duration'])
@@ -0,0 +1,290 @@
+"""
+Shared structured-output layer for the LLM agents
+
+Every agent that expects JSON back from the model goes through this module:
+- json_mode_kwargs() switches on the provider's JSON mode where the model supports it
+- extract_json() tolerantly pulls JSON out of prose, code fences or trailing text
+- parse_structured() validates and coerces the result against a small schema
+"""
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional
+from . import config
+
+# Models that accept response_format={"type": "json_object"}. GPT-3.5 is listed by
+# snapshot: the older ones (-0301, -0613, -16k-0613) reject it with a 400.
+JSON_MODE_MODELS = (
+    "gpt-3.5-turbo",
+    "gpt-3.5-turbo-1106",
+    "gpt-3.5-turbo-0125",
+)
+
+# Model families where every snapshot accepts JSON mode (matched by prefix)
+JSON_MODE_FAMILIES = (
+    "gpt-4-turbo",
+    "gpt-4-1106",
+    "gpt-4-0125",
+    "gpt-4o",
+)
+
+# Schemas: field name -> {"type": python type, "required": bool, "default": value}
+RELEVANCE_SCHEMA = {
+    "is_relevant": {"type": bool, "required": True},
+    "reason": {"type": str, "default": "No reason provided"},
+}
+
+RELEVANCE_CASCADE_SCHEMA = {
+    "is_relevant": {"type": bool, "required": True},
+    "confidence": {"type": float, "default": 0.0, "min": 0.0, "max": 1.0},
+    "reason": {"type": str, "default": "No reason provided"},
+}
+
+CATEGORIZATION_SCHEMA = {
+    "category": {"type": str, "required": True, "choices": list(config.CATEGORIES.keys())},
+    "justification": {"type": str, "default": "No justification provided"},
+}
+
+RANKING_SCORE_SCHEMA = {
+    "score": {"type": float, "required": True, "min": 0.0, "max": 10.0},
+    "reason": {"type": str, "default": "No reason provided"},
+}
+
+# Ranking responses are a list of article indices, either bare or under "ranking"
+RANKING_SCHEMA = {
+    "ranking": {"type": list, "required": True, "items": int},
+}
+
+_CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRUE_WORDS = {"true", "yes", "y", "1", "relevant"}
+_FALSE_WORDS = {"false", "no", "n", "0", "not relevant", "irrelevant"}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a model response cannot be turned into the expected structure"""
+
+
+class ParseTracker:
+    def __init__(self):
+        self.clean = 0
+        self.recovered = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record_clean(self):
+        with self._lock:
+            self.clean += 1
+
+    def record_recovered(self):
+        with self._lock:
+            self.recovered += 1
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def get_stats(self):
+        total = self.clean + self.recovered + self.failures
+        failure_rate = (self.failures / total * 100) if total > 0 else 0
+        return {
+            'clean': self.clean,
+            'recovered': self.recovered,
+            'failures': self.failures,
+            'failure_rate': f"{failure_rate:.1f}%"
+        }
+
+
+def supports_json_mode(model: str) -> bool:
+    """Check whether a model accepts the JSON response format"""
+    return model in JSON_MODE_MODELS or model.startswith(JSON_MODE_FAMILIES)
+
+
+def json_mode_kwargs(model: str) -> Dict[str, Any]:
+    """Extra ChatOpenAI model_kwargs enabling JSON mode when configured and supported"""
+    if config.STRUCTURED_OUTPUT.get("json_mode", True) and supports_json_mode(model):
+        return {"response_format": {"type": "json_object"}}
+    return {}
+
+
+def extract_json(text: str) -> Any:
+    """
+    Extract the first JSON value from a model response
+
+    Handles bare JSON, JSON wrapped in ```json fences, and JSON embedded in prose
+    (e.g. 'Sure! Here is the result: {...} Let me know...').
+    """
+    text = (text or "").strip()
+
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    candidates = [match.strip() for match in _CODE_FENCE.findall(text)]
+    candidates.append(text)
+
+    decoder = json.JSONDecoder()
+    for candidate in candidates:
+        for i, char in enumerate(candidate):
+            if char not in "{[":
+                continue
+            try:
+                value, _ = decoder.raw_decode(candidate, i)
+                return value
+            except ValueError:
+                continue
+
+    raise StructuredOutputError(f"No JSON found in response: {text[:100]!r}")
+
+
+def _coerce(value: Any, spec: Dict[str, Any]) -> Any:
+    """Coerce a single field value to its schema type"""
+    expected = spec["type"]
+
+    if expected is bool:
+        if isinstance(value, bool):
+            return value
+        word = str(value).strip().lower()
+        if word in _TRUE_WORDS:
+            return True
+        if word in _FALSE_WORDS:
+            return False
+        raise StructuredOutputError(f"Expected a boolean, got {value!r}")
+
+    if expected is float:
+        try:
+            number = float(str(value).strip().rstrip('%'))
+        except ValueError:
+            raise StructuredOutputError(f"Expected a number, got {value!r}")
+        if isinstance(value, str) and value.strip().endswith('%'):
+            number /= 100
+        if "min" in spec:
+            number = max(spec["min"], number)
+        if "max" in spec:
+            number = min(spec["max"], number)
+        return number
+
+    if expected is int:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise StructuredOutputError(f"Expected an integer, got {value!r}")
+
+    if expected is list:
+        if not isinstance(value, list):
+            raise StructuredOutputError(f"Expected a list, got {value!r}")
+        item_spec = {"type": spec.get("items", str)}
+        items = []
+        for item in value:
+            try:
+                items.append(_coerce(item, item_spec))
+            except StructuredOutputError:
+                continue
+        return items
+
+    value = str(value).strip()
+    if "choices" in spec:
+        normalized = value.upper().replace(" ", "_")
+        if normalized not in spec["choices"]:
+            raise StructuredOutputError(f"Expected one of {spec['choices']}, got {value!r}")
+        return normalized
+    return value
+
+
+def validate(data: Any, schema: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Validate and coerce parsed JSON against a schema"""
+    # A bare list is accepted for single-list schemas like RANKING_SCHEMA
+    if isinstance(data, list) and len(schema) == 1:
+        data = {next(iter(schema)): data}
+
+    # A single-element list wrapping the object is a common model quirk
+    if isinstance(data, list) and len(data) == 1 and isinstance(data[0], dict):
+        data = data[0]
+
+    if not isinstance(data, dict):
+        raise StructuredOutputError(f"Expected a JSON object, got {type(data).__name__}")
+
+    lowered = {str(key).lower(): value for key, value in data.items()}
+    result = {}
+    for field, spec in schema.items():
+        if field.lower() in lowered and lowered[field.lower()] is not None:
+            result[field] = _coerce(lowered[field.lower()], spec)
+        elif spec.get("required"):
+            raise StructuredOutputError(f"Missing required field '{field}'")
+        else:
+            result[field] = spec.get("default")
+
+    return result
+
+
+def _salvage_fields(text: str, schema: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Last resort: pull 'field: value' pairs out of non-JSON text"""
+    salvaged = {}
+    for field, spec in schema.items():
+        if spec["type"] is list:
+            match = re.search(r"\[[\d,\s]+\]", text)
+            if match:
+                salvaged[field] = json.loads(match.group(0))
+            continue
+        pattern = rf'["\']?{re.escape(field)}["\']?\s*[:=]\s*["\']?([^"\',\n}}]+)'
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            salvaged[field] = match.group(1).strip()
+    return salvaged
+
+
+def parse_structured(text: str, schema: Dict[str, Dict[str, Any]],
+                     tracker: Optional[ParseTracker] = None) -> Dict[str, Any]:
+    """
+    Parse a model response into a validated dict
+
+    Args:
+        text: Raw model response content
+        schema: Field specification (see RELEVANCE_SCHEMA etc.)
+        tracker: Optional ParseTracker to record clean/recovered/failed parses
+
+    Returns:
+        Dict with every schema field present
+
+    Raises:
+        StructuredOutputError: if nothing usable could be recovered
+    """
+    stripped = (text or "").strip()
+
+    try:
+        result = validate(json.loads(stripped), schema)
+        if tracker:
+            tracker.record_clean()
+        return result
+    except (ValueError, StructuredOutputError):
+        pass
+
+    try:
+        result = validate(extract_json(stripped), schema)
+        if tracker:
+            tracker.record_recovered()
+        return result
+    except StructuredOutputError:
+        pass
+
+    try:
+        result = validate(_salvage_fields(stripped, schema), schema)
+        if tracker:
+            tracker.record_recovered()
+        return result
+    except StructuredOutputError:
+        if tracker:
+            tracker.record_failure()
+        raise
+
+
+def parse_ranking(text: str, num_articles: int, tracker: Optional[ParseTracker] = None) -> List[int]:
+    """Parse a ranking response into unique, in-range article indices"""
+    indices = parse_structured(text, RANKING_SCHEMA, tracker)["ranking"]
+    seen = set()
+    ranking = []
+    for index in indices:
+        if 0 <= index < num_articles and index not in seen:
+            seen.add(index)
+            ranking.append(index)
+    return ranking
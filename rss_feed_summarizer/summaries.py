@@ -3,58 +3,95 @@ Agent 6: Micro Summary Agent (2-Sentence Summarizer)
 Creates concise 2-3 sentence summaries for professional newsletters
 """
 from typing import List, Dict, Any
-from . import config
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain_community.cache import SQLiteCache
-from langchain.globals import set_llm_cache
+from . import config, deadline
 import sqlite3
 import os
 import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from .cache_utils import CacheTracker
+from .agent_registry import get_agent
+from .llm_backends import create_chat_model, get_cache_dir, requires_api_key
+from .cache_utils import CacheTracker, setup_llm_cache
+from .content_prep import prepare_content, count_tokens, token_budget, split_into_chunks, feed_summary_text
+from .prompts import chat_prompt
+from .logging_utils import ItemLogger, fingerprint, get_logger
+
+logger = get_logger("summaries")
 
 class MicroSummaryAgent:
     def __init__(self, api_key=None, model=None):
         """Initialize the Micro Summary Agent"""
         self.api_key = api_key or config.OPENAI_API_KEY
-        if not self.api_key:
+        if not self.api_key and requires_api_key():
             raise ValueError("OpenAI API key is required")
         
         # Set up cache
-        self.cache_dir = "cache"
+        self.cache_dir = get_cache_dir()
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
         
         self.cache_db = f"{self.cache_dir}/langchain.db"
-        set_llm_cache(SQLiteCache(database_path=self.cache_db))
+        setup_llm_cache(self.cache_db)
         
         # Initialize cache tracker
-        self.cache_tracker = CacheTracker(cost_per_call=0.03)  # Higher cost for summarization
+        self.cache_tracker = CacheTracker(cost_per_call=0.03, agent="micro_summary")  # Higher cost for summarization
+        
+        # Prompt size and latency per summarized article (shared across category threads)
+        self.content_stats = {"calls": 0, "raw_tokens": 0, "prepared_tokens": 0, "latency": 0.0}
+        self._stats_lock = threading.Lock()
+        self.item_log = ItemLogger(logger)
         
         # Use GPT-3.5 Turbo for micro summaries (cost-effective)
         self.model = model or config.MODELS.get("micro_summary", config.OPENAI_MODEL)
-        print(f"✏️ MICRO SUMMARY AGENT: Using {self.model} for cost-effective article summaries")
+        logger.info("✏️ MICRO SUMMARY AGENT: Using %s for cost-effective article summaries", self.model)
         
         # Initialize LangChain components
-        self.llm = ChatOpenAI(
-            model_name=self.model,
-            openai_api_key=self.api_key,
+        self.llm = create_chat_model(
+            model=self.model,
+            api_key=self.api_key,
             temperature=0.3,
-            request_timeout=30
+            request_timeout=30,
+            agent="micro_summary"
         )
         
         # Micro summary prompt
-        self.micro_summary_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a micro summary agent that creates concise 2-3 sentence summaries for professional newsletters."),
-            ("user", """Summarize the following article in 2–3 sentences for a professional newsletter. Emphasize what's new, why it matters, and who should care.
+        self.micro_summary_prompt = chat_prompt(
+            "You are the micro summary agent. Summarize the article in 2–3 sentences for the newsletter. Emphasize what's new, why it matters, and who should care. Reply with the summary only.",
+            """Title: {title}
+Source: {source}
+Full Text: {content}""",
+            preamble=True
+        )
+        
+        # Long-document mode: map (per-chunk summary) and reduce (final 2-3 sentences) prompts
+        long_document = config.LONG_DOCUMENT
+        self.long_document_enabled = long_document.get("enabled", True)
+        self.chunk_tokens = long_document.get("chunk_tokens", 1500)
+        self.chunk_workers = long_document.get("max_workers", 4)
+        
+        self.chunk_summary_prompt = chat_prompt(
+            "You are the micro summary agent, condensing one section of a longer article. Summarize the section in 2–3 sentences. Keep concrete facts: names, numbers, releases and results. Reply with the summary only.",
+            """Title: {title}
+Source: {source}
+Section {index} of {total}:
+{content}""",
+            preamble=True
+        )
+        
+        self.reduce_summary_prompt = chat_prompt(
+            """You are a micro summary agent that creates concise 2-3 sentence summaries for professional newsletters.
 
-Title: {title}
+Below are summaries of each section of one article, in order. Combine them into a single 2–3 sentence summary for a professional newsletter. Emphasize what's new, why it matters, and who should care.""",
+            """Title: {title}
 Source: {source}
-Full Text: {content}
+Section Summaries:
+{sections}
 
-2-3 Sentence Summary:""")
-        ])
+2-3 Sentence Summary:"""
+        )
     
     def _get_cache_key(self, content: str) -> str:
         """Generate a cache key for content"""
@@ -89,6 +126,76 @@ Full Text: {content}
         
         conn.commit()
         conn.close()
+    
+    def _check_chunk_cache(self, cache_key: str) -> str:
+        """Check if a chunk summary is cached"""
+        conn = sqlite3.connect(self.cache_db)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS chunk_summaries
+        (cache_key TEXT PRIMARY KEY, summary TEXT, timestamp TEXT)
+        """)
+        
+        cursor.execute("SELECT summary FROM chunk_summaries WHERE cache_key = ?", (cache_key,))
+        result = cursor.fetchone()
+        
+        conn.close()
+        return result[0] if result else None
+    
+    def _save_chunk_cache(self, cache_key: str, summary: str):
+        """Save chunk summary result to cache"""
+        conn = sqlite3.connect(self.cache_db)
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "INSERT OR REPLACE INTO chunk_summaries (cache_key, summary, timestamp) VALUES (?, ?, ?)",
+            (cache_key, summary, datetime.now().isoformat())
+        )
+        
+        conn.commit()
+        conn.close()
+    
+    def _summarize_chunk(self, title: str, source: str, chunk: str, index: int, total: int) -> str:
+        """Summarize one chunk, cached under the hash of the chunk text"""
+        cache_key = hashlib.md5(f"chunk_summary:{chunk}".encode()).hexdigest()
+        cached_summary = self._check_chunk_cache(cache_key)
+        if cached_summary:
+            return cached_summary
+        
+        response = (self.chunk_summary_prompt | self.llm).invoke({
+            "title": title,
+            "source": source,
+            "index": index,
+            "total": total,
+            "content": chunk
+        })
+        
+        summary = response.content.strip()
+        self._save_chunk_cache(cache_key, summary)
+        return summary
+    
+    def _summarize_long(self, title: str, source: str, text: str) -> tuple:
+        """Map-reduce summary for text over the token budget. Returns (summary, prompt content tokens)"""
+        chunks = split_into_chunks(text, self.chunk_tokens, self.model)
+        self.item_log.info("long_article", "📚 Long article '%s': summarizing %d chunks...", title[:60], len(chunks),
+                           stage="summaries")
+        
+        with ThreadPoolExecutor(max_workers=self.chunk_workers) as executor:
+            chunk_summaries = list(executor.map(
+                lambda item: self._summarize_chunk(title, source, item[1], item[0], len(chunks)),
+                enumerate(chunks, 1)
+            ))
+        
+        sections = "\n\n".join(f"{i}. {summary}" for i, summary in enumerate(chunk_summaries, 1))
+        response = (self.reduce_summary_prompt | self.llm).invoke({
+            "title": title,
+            "source": source,
+            "sections": sections
+        })
+        
+        content_tokens = count_tokens(text, self.model) + count_tokens(sections, self.model)
+        return response.content.strip(), content_tokens
 
     def summarize_article(self, article: Dict[str, Any]) -> Dict[str, Any]:
         """Generate a 2-3 sentence summary for a single article"""
@@ -106,43 +213,94 @@ Full Text: {content}
         
         self.cache_tracker.record_miss()
         
+        if deadline.expired("rank_summarize"):
+            # Out of time: use the feed's own summary for this run only (not cached)
+            deadline.degrade("micro_summary", article, "feed summary")
+            article['summary'] = feed_summary_text(article)
+            return article
+        
+        # Clean the HTML and fit the text to this model's token budget
+        prepared_content, raw_tokens, prepared_tokens = prepare_content(article, self.model)
+        
         try:
-            response = (self.micro_summary_prompt | self.llm).invoke({
-                "title": title,
-                "source": source,
-                "content": content
-            })
+            start = time.perf_counter()
+            clean_content = article['clean_content']
+            
+            if self.long_document_enabled and count_tokens(clean_content, self.model) > token_budget(self.model):
+                # Too long to send whole and truncation would lose its main points
+                summary, prepared_tokens = self._summarize_long(title, source, clean_content)
+            else:
+                response = (self.micro_summary_prompt | self.llm).invoke({
+                    "title": title,
+                    "source": source,
+                    "content": prepared_content
+                })
+                summary = response.content.strip()
+            latency = time.perf_counter() - start
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Summarized '%s'", title[:60], extra={
+                    'stage': "summaries", 'article': fingerprint(article), 'duration': round(latency, 3)})
+            
+            with self._stats_lock:
+                self.content_stats["calls"] += 1
+                self.content_stats["raw_tokens"] += raw_tokens
+                self.content_stats["prepared_tokens"] += prepared_tokens
+                self.content_stats["latency"] += latency
             
-            summary = response.content.strip()
             self._save_cache(cache_key, summary)
             
             article['summary'] = summary
             return article
             
         except Exception as e:
-            print(f"Error in micro summary agent for '{title}': {str(e)}")
+            self.item_log.warning("error", "Error in micro summary agent for '%s': %s", title, e,
+                                  stage="summaries", article=fingerprint(article))
             article['summary'] = "Error generating summary"
             return article
     
     def summarize_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Generate micro summaries for a list of articles"""
-        print(f"\n✏️ MICRO SUMMARY AGENT: Generating summaries for {len(articles)} articles...")
+        logger.info("✏️ MICRO SUMMARY AGENT: Generating summaries for %d articles...", len(articles))
         
         summarized = []
         for article in articles:
             summarized.append(self.summarize_article(article))
         
-        # Print cache statistics
+        self.item_log.flush()
+        
+        # Log cache statistics
         stats = self.cache_tracker.get_stats()
-        print("✅ Micro summaries complete")
-        print(f"Cache Stats - Hits: {stats['hits']}, Misses: {stats['misses']}, Hit Rate: {stats['hit_rate']}")
+        logger.info("✅ Micro summaries complete")
+        logger.info("Cache Stats - Hits: %s, Misses: %s, Hit Rate: %s", stats['hits'], stats['misses'], stats['hit_rate'])
+        
+        content_stats = self.get_content_stats()
+        if content_stats['calls']:
+            logger.info("Content Stats - Prompt tokens: %s raw → %s prepared (%s saved), Avg latency: %s over %s calls",
+                        content_stats['raw_tokens'], content_stats['prepared_tokens'], content_stats['tokens_saved'],
+                        content_stats['avg_latency'], content_stats['calls'])
         
         return summarized
+    
+    def get_content_stats(self) -> Dict[str, Any]:
+        """Get content token counts (before/after preparation) and per-summary latency"""
+        with self._stats_lock:
+            calls = self.content_stats["calls"]
+            raw_tokens = self.content_stats["raw_tokens"]
+            prepared_tokens = self.content_stats["prepared_tokens"]
+            latency = self.content_stats["latency"]
+        saved = ((raw_tokens - prepared_tokens) / raw_tokens * 100) if raw_tokens > 0 else 0
+        return {
+            'calls': calls,
+            'raw_tokens': raw_tokens,
+            'prepared_tokens': prepared_tokens,
+            'tokens_saved': f"{saved:.1f}%",
+            'avg_latency': f"{(latency / calls if calls else 0):.2f}s"
+        }
 
 # Helper function for easy use
 def generate_article_summaries(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Helper function for micro summary generation"""
-    agent = MicroSummaryAgent()
+    agent = get_agent("micro_summary")
     return agent.summarize_articles(articles)
 
 # Legacy helper function for backward compatibility
@@ -68,6 +68,7 @@ setup(
             "config/*.yaml",
             "examples/*.yaml",
             "templates/*.html",
+            "fixtures/*.xml",
         ],
     },
     keywords="rss, news, ai, summarization, openai, email, automation",
@@ -0,0 +1,14 @@
+"""
+Shared fixtures
+"""
+import pytest
+from rss_feed_summarizer import config
+
+
+@pytest.fixture
+def mock_backend(tmp_path, monkeypatch):
+    """Mock LLM backend (no latency, errors or hedging) with its cache in a temporary directory"""
+    monkeypatch.setattr(config, "LLM_BACKEND", "mock")
+    monkeypatch.setattr(config, "MOCK_LLM", dict(config.MOCK_LLM, cache_dir=str(tmp_path / "mock"),
+                                                 latency=0.0, error_rate=0.0, slow_rate=0.0))
+    monkeypatch.setattr(config, "HEDGING", dict(config.HEDGING, enabled=False))
@@ -0,0 +1,90 @@
+"""
+Tests for batch mode against the local stand-in batch server
+"""
+import glob
+import json
+import os
+import pytest
+from rss_feed_summarizer import config
+from rss_feed_summarizer.agent_registry import reset_agents
+from rss_feed_summarizer.batch import BatchClient, BatchRunner
+from rss_feed_summarizer.bench import generate_articles
+from rss_feed_summarizer.cache_utils import bulk_lookup
+from rss_feed_summarizer.mock_llm import LocalBatchServer
+
+CACHE_TABLES = {"relevance": ("article_relevance", "is_relevant"),
+                "categorization": ("article_categories", "category"),
+                "micro_summary": ("micro_summaries", "summary")}
+
+
+@pytest.fixture
+def agents(mock_backend):
+    """Shared agents built on the test's cache directory"""
+    reset_agents()
+    yield
+    reset_agents()
+
+
+def _runner(server: LocalBatchServer, tmp_path, **settings) -> BatchRunner:
+    return BatchRunner(BatchClient(api_key="mock", base_url=server.base_url),
+                       settings=dict(config.BATCH, dir=str(tmp_path / "batches"), **settings), poll_interval=0.01)
+
+
+def _result_ids(runner: BatchRunner, suffix: str) -> list:
+    """custom_ids ("<agent>:<cache key>") in the run's downloaded output or error files"""
+    ids = []
+    for path in glob.glob(os.path.join(runner.run_dir, f"*-{suffix}.jsonl")):
+        with open(path, encoding="utf-8") as f:
+            ids += [json.loads(line)['custom_id'] for line in f if line.strip()]
+    return ids
+
+
+def _cached(runner: BatchRunner, custom_id: str) -> bool:
+    agent, cache_key = custom_id.split(":", 1)
+    table, column = CACHE_TABLES[agent]
+    return cache_key in bulk_lookup(getattr(runner, agent).cache_db, table, [cache_key], [column])
+
+
+def _misses(agent) -> int:
+    return agent.cache_tracker.get_stats()['misses']
+
+
+@pytest.mark.parametrize("error_rate", [0.0, 0.3])
+def test_batch_results_are_cached_for_the_synchronous_agents(agents, tmp_path, error_rate):
+    articles = generate_articles(30)
+
+    with LocalBatchServer(seed=config.MOCK_LLM["seed"], error_rate=error_rate) as server:
+        runner = _runner(server, tmp_path)
+        stats = runner.run([dict(article) for article in articles])
+
+    completed, failed = _result_ids(runner, "output"), _result_ids(runner, "errors")
+    assert {agent for agent in stats if stats[agent]['completed']} == set(CACHE_TABLES)
+    assert sum(counts['completed'] for counts in stats.values()) == len(completed)
+    assert sum(counts['failed'] for counts in stats.values()) == len(failed)
+    assert bool(failed) == (error_rate > 0)
+    assert all(_cached(runner, custom_id) for custom_id in completed)
+    assert not any(_cached(runner, custom_id) for custom_id in failed)
+
+    # The synchronous agents only miss (and call the model) for the failed requests
+    relevant = runner.relevant_articles([dict(article) for article in articles])
+    for agent, run in ((runner.relevance, lambda: agent.filter_articles([dict(a) for a in articles])),
+                       (runner.categorization, lambda: agent.categorize_articles([dict(a) for a in relevant])),
+                       (runner.micro_summary, lambda: agent.summarize_articles([dict(a) for a in relevant]))):
+        misses = _misses(agent)
+        run()
+        name = agent.cache_tracker.agent
+        assert _misses(agent) - misses == stats[name]['failed'] + stats[name]['skipped']
+
+
+def test_batches_unfinished_after_max_wait_are_cancelled(agents, tmp_path):
+    articles = generate_articles(10)
+
+    with LocalBatchServer(seed=config.MOCK_LLM["seed"], processing_delay=30) as server:
+        runner = _runner(server, tmp_path, max_wait_hours=0, stages=["relevance"])
+        stats = runner.run(articles)
+        statuses = {batch['status'] for batch in server.batches.values()}
+
+    assert statuses == {"cancelled"}
+    assert stats["relevance"]['completed'] == 0
+    assert stats["relevance"]['failed'] == stats["relevance"]['requested'] > 0
+    assert not runner._pending
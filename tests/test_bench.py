@@ -0,0 +1,18 @@
+"""
+Tests for the micro-benchmark helpers
+"""
+from langchain.globals import get_llm_cache
+from rss_feed_summarizer import cache_utils
+from rss_feed_summarizer.bench import bench_cache_lookups, generate_articles
+
+
+def test_cache_lookups_restore_the_llm_cache(mock_backend):
+    previous_llm_cache = get_llm_cache()
+    previous_llm_cache_path = cache_utils._llm_cache_path
+
+    samples, unit, count = bench_cache_lookups(generate_articles(10), repeat=1)
+
+    assert len(samples) == count == 10
+    # Nothing is left pointing at the benchmark's deleted temporary directory
+    assert get_llm_cache() is previous_llm_cache
+    assert cache_utils._llm_cache_path == previous_llm_cache_path
@@ -0,0 +1,31 @@
+"""
+Tests for run checkpoints
+"""
+from unittest import mock
+import pytest
+from rss_feed_summarizer.checkpoint import RunCheckpoint
+
+
+def test_new_runs_in_the_same_second_get_separate_directories(tmp_path):
+    first = RunCheckpoint(checkpoint_dir=str(tmp_path))
+    first.save("fetch", [{'title': "A"}])
+    second = RunCheckpoint(checkpoint_dir=str(tmp_path))
+
+    assert second.run_id != first.run_id
+    assert not second.has("fetch")
+
+
+def test_new_run_never_reuses_an_existing_directory(tmp_path):
+    existing = RunCheckpoint(checkpoint_dir=str(tmp_path))
+    with mock.patch("rss_feed_summarizer.checkpoint.datetime") as clock:
+        clock.now.return_value.strftime.return_value = existing.run_id
+        with pytest.raises(FileExistsError):
+            RunCheckpoint(checkpoint_dir=str(tmp_path))
+
+
+def test_resume_opens_the_existing_run(tmp_path):
+    first = RunCheckpoint(checkpoint_dir=str(tmp_path))
+    first.save("fetch", [{'title': "A"}])
+    resumed = RunCheckpoint(first.run_id, checkpoint_dir=str(tmp_path))
+
+    assert resumed.load("fetch") == [{'title': "A"}]
@@ -0,0 +1,33 @@
+"""
+Tests for token-budgeted content preparation
+"""
+import pytest
+import tiktoken
+from rss_feed_summarizer import content_prep
+from rss_feed_summarizer.content_prep import count_tokens, split_into_chunks, truncate_tokens
+
+# One token per byte, so every non-ASCII character spans several tokens
+BYTE_ENCODING = tiktoken.Encoding(name="bytes", pat_str=r"[\s\S]",
+                                  mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={})
+
+
+@pytest.fixture(autouse=True)
+def byte_tokenizer(monkeypatch):
+    monkeypatch.setattr(content_prep, "_get_encoding", lambda model: BYTE_ENCODING)
+
+
+@pytest.mark.parametrize("text", ["日本語のテキスト🙂" * 10, " ".join(["Größere Änderungen – café naïve"] * 20)])
+@pytest.mark.parametrize("chunk_tokens", [1, 7, 50])
+def test_hard_split_keeps_every_character_once(text, chunk_tokens):
+    chunks = split_into_chunks(text, chunk_tokens)
+
+    assert "".join(chunks) == text
+    assert not any("�" in chunk for chunk in chunks)
+    # A character is never split, so only a character longer than the limit goes over it
+    assert all(count_tokens(chunk) <= max(chunk_tokens, 4) for chunk in chunks)
+
+
+def test_truncate_cuts_before_a_split_character():
+    assert truncate_tokens("ab日本", 4) == "ab"
+    assert truncate_tokens("ab日本", 5) == "ab日"
+    assert truncate_tokens("ab日本", 8) == "ab日本"
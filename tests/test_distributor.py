@@ -0,0 +1,103 @@
+"""
+Tests for digest rendering and email delivery in the distributor
+"""
+import threading
+import time
+import pytest
+from rss_feed_summarizer.bench import LocalSMTPServer
+from rss_feed_summarizer.distributor import DigestEmail, EmailOutbox, MarkdownDistributor, _clean_html
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Use vector&lt;int&gt; in C++", "Use vector&lt;int&gt; in C++"),
+    ("latency &lt; 5ms and throughput &gt; 10k", "latency &lt; 5ms and throughput &gt; 10k"),
+    ("<p>R&amp;D&nbsp;costs&#8230;</p><p>more</p>", "R&D costs...\n\nmore"),
+    ("line<br>one<br/>two<br />three", "line\none\ntwo\nthree"),
+    ("<b>bold</b> and <a href='x'>link</a>\n\n\n\nend&#160;", "bold and link\n\nend"),
+    ("&amp;lt;b&amp;gt;", "&lt;b&gt;"),
+])
+def test_clean_html(text, expected):
+    assert _clean_html(text) == expected
+
+
+def test_format_articles_keeps_escaped_text(tmp_path):
+    """Escaped angle brackets in a summary are kept, not stripped as tags"""
+    article = {'title': "C++ release", 'link': "https://example.com/cpp", 'source': "Example",
+               'ai_summary': "<p>Adds vector&lt;int&gt; overloads; latency &lt; 5ms.</p>"}
+    markdown = MarkdownDistributor(output_dir=str(tmp_path)).format_articles(
+        [article], {"INDUSTRY_AND_MARKET": [article]})
+
+    assert "Adds vector&lt;int&gt; overloads; latency &lt; 5ms." in markdown
+    assert "**[C++ release](https://example.com/cpp)**" in markdown
+
+
+@pytest.fixture
+def email_settings(tmp_path):
+    return {'smtp_server': "127.0.0.1", 'smtp_security': "none", 'smtp_password': "test", 'pool_size': 2,
+            'max_retries': 1, 'retry_backoff': 0.0, 'outbox_db': str(tmp_path / "outbox.db"),
+            'max_attempts': 3, 'attempt_backoff': 0}
+
+
+@pytest.mark.parametrize("smtputf8", [False, True])
+def test_outbox_non_ascii_recipient(tmp_path, email_settings, smtputf8):
+    """A non-ASCII address is sent with SMTPUTF8 when the server supports it, and fails for good (not retried) when not"""
+    recipients = ["reader@example.com", "lecteur@exämple.com"]
+    digest = DigestEmail("digest@example.com", "Digest", "hello", "<p>hello</p>")
+    distributor = MarkdownDistributor(output_dir=str(tmp_path))
+
+    with LocalSMTPServer(smtputf8=smtputf8) as server:
+        settings = dict(email_settings, smtp_port=server.port)
+        outbox = EmailOutbox(settings=settings)
+        outbox.enqueue(digest, recipients)
+        stats = distributor.drain_outbox(outbox, settings)
+        delivered = sorted(rcpt for rcpts, _ in server.messages for rcpt in rcpts)
+
+    if smtputf8:
+        assert delivered == sorted(recipients)
+        assert outbox.counts() == {'pending': 0, 'sending': 0, 'sent': 2, 'failed': 0}
+    else:
+        assert delivered == ["reader@example.com"]
+        assert outbox.counts() == {'pending': 0, 'sending': 0, 'sent': 1, 'failed': 1}
+        assert stats['retrying'] == 0
+
+
+def test_expired_lease_is_not_sent_or_recorded_by_its_old_owner(tmp_path, email_settings):
+    """A worker whose lease ran out neither sends nor overwrites a job another worker reclaimed"""
+    settings = dict(email_settings, lease_seconds=0.05)
+    stalled, worker = EmailOutbox(settings=settings), EmailOutbox(settings=settings)
+    digest = DigestEmail("digest@example.com", "Digest", "hello", "<p>hello</p>")
+    stalled.enqueue(digest, ["reader@example.com"])
+
+    stalled_owner, _ = stalled.claim()
+    time.sleep(0.1)
+    owner, claimed = worker.claim()
+
+    assert claimed == {digest.digest_id: ["reader@example.com"]}
+    assert not stalled.start_send(digest.digest_id, "reader@example.com", stalled_owner)
+    assert worker.start_send(digest.digest_id, "reader@example.com", owner)
+    assert not stalled.mark_sent(digest.digest_id, "reader@example.com", stalled_owner)
+    assert stalled.mark_failed(digest.digest_id, "reader@example.com", stalled_owner, OSError("late")) is None
+    assert worker.counts()['sending'] == 1
+    assert worker.mark_sent(digest.digest_id, "reader@example.com", owner)
+    assert worker.counts()['sent'] == 1
+
+
+def test_two_workers_on_a_throttled_server_send_each_recipient_once(tmp_path, email_settings):
+    """A batch that takes longer than the lease keeps it renewed, so a second worker finds nothing to reclaim"""
+    recipients = [f"reader{i}@example.com" for i in range(6)]
+    digest = DigestEmail("digest@example.com", "Digest", "hello", "<p>hello</p>")
+
+    with LocalSMTPServer(latency=0.1) as server:
+        settings = dict(email_settings, smtp_port=server.port, pool_size=1, lease_seconds=0.2)
+        EmailOutbox(settings=settings).enqueue(digest, recipients)
+        first = threading.Thread(target=MarkdownDistributor(output_dir=str(tmp_path)).drain_outbox,
+                                 args=(EmailOutbox(settings=settings), settings))
+        first.start()
+        time.sleep(0.35)  # Past the first worker's original lease
+        stats = MarkdownDistributor(output_dir=str(tmp_path)).drain_outbox(EmailOutbox(settings=settings), settings)
+        first.join()
+        delivered = [rcpt for rcpts, _ in server.messages for rcpt in rcpts]
+
+    assert stats['claimed'] == 0
+    assert sorted(delivered) == sorted(recipients)
+    assert EmailOutbox(settings=settings).counts()['sent'] == len(recipients)
@@ -0,0 +1,86 @@
+"""
+Tests for hedged LLM requests
+"""
+import threading
+import time
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from rss_feed_summarizer import config, hedging
+
+
+class SlowChatModel(BaseChatModel):
+    """Answers after a fixed delay and remembers which threads served its calls"""
+
+    delay: float = 0.0
+    threads: list = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-test"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+
+@pytest.fixture
+def hedge_settings(monkeypatch):
+    monkeypatch.setattr(config, "HEDGING", dict(config.HEDGING, enabled=True, min_samples=5, min_threshold=0.0,
+                                                max_extra_fraction=1.0, max_workers=1))
+    hedging.reset_hedging()
+    yield
+    hedging.reset_hedging()
+
+
+def _warm_up(agent: str, seconds: float):
+    """Fill an agent's latency window so hedging starts at about this threshold"""
+    tracker = hedging.get_tracker(agent)
+    for _ in range(tracker.min_samples):
+        tracker.record_primary(seconds)
+    return tracker
+
+
+def test_primary_runs_on_the_callers_thread_until_hedging_can_start(hedge_settings):
+    inner = SlowChatModel(threads=[])
+    model = hedging.HedgedChatModel(inner=inner, agent="cold", cache=False)
+
+    model.invoke("hello")
+
+    assert inner.threads == [threading.current_thread().name]
+    assert hedging.get_tracker("cold").get_stats()['hedges'] == 0
+
+
+def test_no_hedge_while_the_pool_is_busy(hedge_settings):
+    tracker = _warm_up("busy", 0.02)
+    inner = SlowChatModel(delay=0.3, threads=[])
+    model = hedging.HedgedChatModel(inner=inner, agent="busy", cache=False)
+
+    callers = [threading.Thread(target=model.invoke, args=(f"call {i}",)) for i in range(3)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    stats = tracker.get_stats()
+    # One hedge thread: the first slow call gets it, the others are not queued behind it
+    assert stats['hedges'] == 1
+    assert stats['hedges_skipped'] == 2
+    assert sum(name.startswith("llm-hedge") for name in inner.threads) == 1
+
+
+def test_primary_latency_is_measured_from_when_it_runs(hedge_settings):
+    tracker = _warm_up("latency", 0.02)
+    model = hedging.HedgedChatModel(inner=SlowChatModel(delay=0.1, threads=[]), agent="latency", cache=False)
+
+    callers = [threading.Thread(target=model.invoke, args=(f"call {i}",)) for i in range(8)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    primaries = list(tracker.window)[tracker.min_samples:]
+    assert len(primaries) == 8
+    assert max(primaries) < 0.25
@@ -0,0 +1,28 @@
+"""
+Import-time guard: the CLI must not load LangChain, OpenAI or other heavy dependencies
+"""
+import os
+import subprocess
+import sys
+from rss_feed_summarizer.bench import HEAVY_MODULES
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _imported_modules(statement: str) -> list:
+    """Modules a fresh interpreter imports for a statement, from python -X importtime"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PACKAGE_ROOT, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True, text=True, env=env, check=True)
+    # Lines look like: "import time:       123 |        456 |     package.module"
+    return [line.rsplit("|", 1)[1].strip() for line in result.stderr.splitlines()
+            if line.startswith("import time:") and line.count("|") == 2]
+
+
+def test_cli_import_loads_no_heavy_modules():
+    modules = _imported_modules("import rss_feed_summarizer.cli")
+
+    assert "rss_feed_summarizer.cli" in modules
+    # Prefix match, so langchain_core and langchain_community count as LangChain too
+    heavy = sorted({module for module in modules if module.split(".")[0].startswith(tuple(HEAVY_MODULES))})
+    assert not heavy, f"importing the CLI loaded {', '.join(heavy)}"
@@ -0,0 +1,36 @@
+"""
+Tests for rate-limited per-item logging
+"""
+import logging
+from rss_feed_summarizer.logging_utils import ItemLogger
+
+
+def _logger(name: str, level: int) -> logging.Logger:
+    logger = logging.getLogger(f"rss_feed_summarizer.test.{name}")
+    logger.setLevel(level)
+    return logger
+
+
+def test_warnings_are_never_suppressed(caplog):
+    """Per-recipient failures stay visible, also when only warnings are logged (--quiet)"""
+    item_log = ItemLogger(_logger("warnings", logging.WARNING), interval=60)
+    with caplog.at_level(logging.WARNING):
+        for i in range(5):
+            item_log.warning("send_error", "Failed to send to %s", f"reader{i}@example.com")
+        item_log.flush()
+
+    assert [record.getMessage() for record in caplog.records] == [
+        f"Failed to send to reader{i}@example.com" for i in range(5)
+    ]
+
+
+def test_info_lines_are_rate_limited_and_counted(caplog):
+    item_log = ItemLogger(_logger("info", logging.INFO), interval=60)
+    with caplog.at_level(logging.INFO):
+        for i in range(5):
+            item_log.info("decision", "Article %d kept", i)
+        item_log.flush()
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == ["Article 0 kept", "4 more 'decision' messages from info suppressed (5 total)"]
+    assert caplog.records[-1].levelno == logging.INFO
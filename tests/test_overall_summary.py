@@ -0,0 +1,25 @@
+"""
+Tests for the macro summary agent's incremental (per-category) overview
+"""
+from rss_feed_summarizer.bench import generate_articles
+from rss_feed_summarizer.overall_summary import MacroSummaryAgent
+
+
+def test_reduce_cache_does_not_depend_on_category_order(mock_backend):
+    articles = [dict(article, summary=f"Summary of {article['title']}") for article in generate_articles(6)]
+    by_category = {"TOOLS_AND_FRAMEWORKS": articles[:3], "INDUSTRY_AND_MARKET": articles[3:]}
+    agent = MacroSummaryAgent()
+
+    first = agent.generate_overview_from_summaries(by_category)
+    hits = agent.cache_tracker.get_stats()['hits']
+    second = agent.generate_overview_from_summaries(dict(reversed(list(by_category.items()))))
+
+    assert second == first
+    # Two category partials plus the reduce, all served from the cache
+    assert agent.cache_tracker.get_stats()['hits'] == hits + 3
+
+    # The summaries are part of the key: an edited one recomputes its category and the reduce
+    misses = agent.cache_tracker.get_stats()['misses']
+    edited = dict(by_category, INDUSTRY_AND_MARKET=[dict(articles[3], summary="Updated summary")] + articles[4:])
+    agent.generate_overview_from_summaries(edited)
+    assert agent.cache_tracker.get_stats()['misses'] == misses + 2
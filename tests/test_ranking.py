@@ -0,0 +1,43 @@
+"""
+Tests for tournament ranking against the local mock LLM
+"""
+import pytest
+from rss_feed_summarizer import config
+from rss_feed_summarizer.bench import generate_articles
+from rss_feed_summarizer.keyword_filter import score_relevance
+from rss_feed_summarizer.mock_llm import _rng
+from rss_feed_summarizer.ranking import RankingAgent
+
+
+@pytest.fixture(autouse=True)
+def tournament_settings(monkeypatch):
+    monkeypatch.setattr(config, "RANKING", dict(config.RANKING, chunk_size=20, max_workers=4))
+
+
+def _mock_order(article):
+    """The order MockChatModel ranks a listwise prompt in (keyword score, then a seeded tie-break)"""
+    line = f"{article['title']} (from {article['source']})"
+    return -score_relevance({'title': line}), _rng(config.MOCK_LLM["seed"], line).random()
+
+
+@pytest.mark.parametrize("max_articles", [5, 10])
+def test_tournament_ranks_500_articles(mock_backend, max_articles):
+    articles = generate_articles(500)
+    agent = RankingAgent(mode="tournament")
+
+    ranked = agent.rank_articles(articles, max_articles=max_articles)
+
+    titles = [article['title'] for article in ranked]
+    assert len(titles) == max_articles
+    assert len(set(titles)) == len(titles), "an article was ranked twice"
+    assert all(article in articles for article in ranked)
+    # A tournament over a consistent order finds the same top N as ranking everything at once
+    expected = sorted(articles, key=_mock_order)[:max_articles]
+    assert titles == [article['title'] for article in expected]
+
+
+def test_tournament_keeps_every_article_of_a_small_category(mock_backend):
+    articles = generate_articles(4)
+    agent = RankingAgent(mode="tournament")
+
+    assert agent.rank_articles(articles, max_articles=5) == articles
@@ -0,0 +1,22 @@
+"""
+Tests for the shared structured-output layer
+"""
+import pytest
+from rss_feed_summarizer.structured_output import supports_json_mode
+
+
+@pytest.mark.parametrize("model, supported", [
+    ("gpt-3.5-turbo", True),
+    ("gpt-3.5-turbo-1106", True),
+    ("gpt-3.5-turbo-0125", True),
+    ("gpt-3.5-turbo-0613", False),
+    ("gpt-3.5-turbo-0301", False),
+    ("gpt-3.5-turbo-16k-0613", False),
+    ("gpt-4-turbo-2024-04-09", True),
+    ("gpt-4-1106-preview", True),
+    ("gpt-4o-mini", True),
+    ("gpt-4", False),
+    ("gpt-4-0613", False),
+])
+def test_supports_json_mode(model, supported):
+    assert supports_json_mode(model) is supported